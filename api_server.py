@@ -0,0 +1,436 @@
+"""
+Local HTTP/JSON API over TaskManagerLogic, for tools that want to read and write tasks without the GUI.
+
+Start it with `python -m cli serve [--host 127.0.0.1] [--port 8765]`. Endpoints:
+    GET    /tasks                     all tasks (?offset=N&limit=N)
+    GET    /tasks/{id}                one task with its subtasks
+    GET    /query                     tasks matching ?text=&status=&category=&priority=&due_from=&due_to=
+                                      &start_from=&start_to=&sort=FIELD,-FIELD&limit=N
+    GET    /subtasks                  all subtasks, or those of ?task_id=N
+    POST   /tasks, /subtasks          add one record (JSON object); returns it with its new ID (201)
+    POST   /tasks/bulk, /subtasks/bulk   add a JSON array of records (?skip_invalid=1)
+    PATCH  /tasks/{id}, /subtasks/{id}   change the attributes given in a JSON object; returns the record
+    DELETE /tasks/{id}, /subtasks/{id}
+    GET    /metrics                   instrumentation in Prometheus text format (?format=json for JSON); values
+                                      are recorded when started with --metrics FILE or TASK_MANAGER_METRICS=1
+
+Every GET response carries an ETag that changes whenever the data changes; a request with a matching
+If-None-Match header is answered with 304 Not Modified and no body, so polling clients cost almost nothing.
+"""
+import asyncio  # Import asyncio for the event loop, streams and the mutation queue
+import json  # Import json to parse request bodies and encode responses
+import logging  # Import logging to report background errors on standard error
+import uuid  # Import uuid to make ETags unique to this server process
+from urllib.parse import urlsplit, parse_qs  # Import URL helpers to read the path and query string
+import events  # Import the change event kinds, used to notice when the data changes
+import metrics  # Import the opt-in instrumentation served at /metrics
+from bulk_io import json_value  # Import json_value to encode dates as ISO text
+from task_model import parse_date  # Import the date parser for query filters
+
+logger = logging.getLogger(__name__)  # Background errors (e.g. failed merges); shown on stderr by default
+MAX_BODY = 64 * 2**20  # Largest accepted request body (bulk adds), in bytes
+DATA_EVENTS = {events.TASK_ADDED, events.TASK_UPDATED, events.TASK_DELETED, events.SUBTASK_ADDED,
+               events.SUBTASK_UPDATED, events.SUBTASK_DELETED, events.BULK_RELOAD}  # Events that change the data
+REASONS = {200: "OK", 201: "Created", 204: "No Content", 304: "Not Modified", 400: "Bad Request", 404: "Not Found",
+           405: "Method Not Allowed", 413: "Payload Too Large", 500: "Internal Server Error",
+           503: "Service Unavailable"}
+
+
+class HTTPError(Exception):
+    """An error answered with the given status code and a JSON {"error": message} body."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def record_json(record) -> dict:
+    """
+    Convert a Task or Subtask into a JSON-ready dictionary keyed by field name.
+    """
+    return {field: json_value(value) for field, value in zip(record.FIELDS, record.as_row())}
+
+
+class Snapshot:
+    __slots__ = ("version", "tasks", "subtasks")
+
+    def __init__(self, version: int, tasks: tuple, subtasks: tuple):
+        """
+        An immutable view of the data at one version.
+        TaskManagerLogic replaces Task/Subtask objects on update instead of changing them, so holding
+        references to the objects is enough; responses can be encoded from it on worker threads while
+        the event loop keeps applying writes.
+        """
+        self.version = version
+        self.tasks = tasks
+        self.subtasks = subtasks
+
+
+class TaskApiServer:
+    def __init__(self, logic, host: str = "127.0.0.1", port: int = 8765, merge_interval: float = 2.0):
+        """
+        Initialize the TaskApiServer class.
+        Reads are answered from an immutable Snapshot of the current version; writes go through a single
+        mutation queue, applied in batches on the event loop, and each batch is persisted with one flush of
+        the logic's background writer before its requests are answered.
+        :param logic: The TaskManagerLogic to serve. It must only be used from the server's event loop.
+        :param host: Interface to listen on (local only by default).
+        :param port: TCP port to listen on (0 picks a free port).
+        :param merge_interval: Seconds between merges of changes saved by other processes (None to disable).
+        """
+        self.logic = logic
+        self.host = host
+        self.port = port
+        self.merge_interval = merge_interval
+        self.version = 0  # Goes up whenever the data changes; part of the ETag
+        # Also part of the ETag, so a restarted server (whose version starts at 0 again) never matches an old one
+        self.instance = uuid.uuid4().hex[:12]
+        self._snapshot = None  # Snapshot of the current version, built on first read
+        self._responses = {}  # Encoded GET responses of the current version, keyed by request target
+        self._mutations = None  # asyncio.Queue of (function, future), created on the server's loop
+        self._server = None
+        logic.events.subscribe(self.on_event)
+
+    def on_event(self, event):
+        """
+        Bumps the version when the data changes (local writes, merges and reloads).
+        """
+        if event.kind in DATA_EVENTS:
+            self.version += 1
+            self._snapshot = None
+            self._responses = {}
+
+    def snapshot(self) -> Snapshot:
+        """
+        Returns the immutable snapshot of the current version.
+        """
+        if self._snapshot is None or self._snapshot.version != self.version:
+            self._snapshot = Snapshot(self.version, tuple(self.logic.tasks), tuple(self.logic.subtasks))
+        return self._snapshot
+
+    def etag(self, version: int) -> str:
+        """
+        Returns the ETag of a data version of this server process.
+        """
+        return f'"{self.instance}-{version}"'
+
+    async def start(self):
+        """
+        Start listening and processing mutations. Returns once the server is accepting connections.
+        """
+        self._mutations = asyncio.Queue()
+        self._writer_task = asyncio.create_task(self._apply_mutations())
+        self._merge_task = asyncio.create_task(self._merge_periodically()) if self.merge_interval else None
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        """
+        Start the server (if needed) and run until cancelled.
+        """
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def stop(self):
+        """
+        Stop accepting connections and let queued mutations finish.
+        """
+        self._server.close()
+        await self._server.wait_closed()
+        await self._mutations.join()
+        for task in (self._writer_task, self._merge_task):
+            if task is not None:
+                task.cancel()
+
+    async def mutate(self, function):
+        """
+        Queue a mutation and wait until it is applied and persisted.
+        :param function: Callable run on the event loop with no arguments; its return value is returned.
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self._mutations.put((function, future))
+        return await future
+
+    async def _apply_mutations(self):
+        """
+        The single writer: apply every queued mutation in order, then persist the whole batch with one flush.
+        Mutations queued while a flush is in progress form the next batch. If the flush fails, the requests of
+        the batch are answered with 503 (unless they failed on their own): their changes are applied in memory
+        and the background writer keeps retrying the save, but they are not on disk yet.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._mutations.get()]
+            while not self._mutations.empty():
+                batch.append(self._mutations.get_nowait())
+            results = []
+            for function, future in batch:
+                try:
+                    results.append((future, function(), None))
+                except Exception as error:
+                    results.append((future, None, error))
+            flushed = await loop.run_in_executor(None, self.logic.flush)  # One write for the whole batch
+            for future, result, error in results:
+                if not future.done():
+                    if error is not None:
+                        future.set_exception(error)
+                    elif not flushed:
+                        future.set_exception(HTTPError(503, f"could not save changes: {self.logic.save_error}"))
+                    else:
+                        future.set_result(result)
+            for _ in batch:
+                self._mutations.task_done()
+
+    async def _merge_periodically(self):
+        """
+        Fold in changes that other processes saved to the same data, through the mutation queue.
+        """
+        while True:
+            await asyncio.sleep(self.merge_interval)
+            try:
+                await self.mutate(self.logic.merge_remote_changes)
+            except Exception as error:  # Keep merging; a busy or unreadable file is retried next time
+                logger.warning("Could not merge changes from other processes: %s", error)
+
+    async def _handle_connection(self, reader, writer):
+        """
+        Serve HTTP/1.1 requests on one connection until the client closes it or asks to close.
+        """
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, target, version = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", 0))
+                if length > MAX_BODY:
+                    await self._send(writer, 413, {"error": "request body too large"}, close=True)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                keep_alive = headers.get("connection", "").lower() != "close" and version.strip() == "HTTP/1.1"
+                with metrics.span("api_request"):
+                    status, payload, etag = await self._respond(method.upper(), target, headers, body)
+                await self._send(writer, status, payload, etag, close=not keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass  # Malformed request or client went away
+        finally:
+            writer.close()
+
+    async def _respond(self, method: str, target: str, headers: dict, body: bytes) -> tuple:
+        """
+        Route one request.
+        :return: (status, payload, etag); payload is encoded bytes, an object to encode, or None.
+        """
+        try:
+            if method == "GET" and urlsplit(target).path == "/metrics":
+                if "format=json" in urlsplit(target).query:
+                    return 200, metrics.REGISTRY.as_dict(), None
+                return 200, metrics.REGISTRY.prometheus_text(), None  # Never cached: the values change all the time
+            if method == "GET":
+                etag = self.etag(self.version)
+                if headers.get("if-none-match") == etag:
+                    return 304, None, etag  # The client already has this version
+                encoded = self._responses.get(target)
+                if encoded is None:
+                    snapshot = self.snapshot()
+                    build = self._read(target, snapshot)
+                    # Build and encode the body on a worker thread; the records it refers to are never changed,
+                    # so the event loop can go on applying writes meanwhile
+                    encoded = await asyncio.get_running_loop().run_in_executor(None, lambda: encode(build()))
+                    if snapshot.version == self.version:
+                        self._responses[target] = encoded
+                    etag = self.etag(snapshot.version)
+                return 200, encoded, etag
+            if method in ("POST", "PATCH", "DELETE"):
+                return (*await self._write(method, target, body), None)
+            raise HTTPError(405, f"method {method} not allowed")
+        except HTTPError as error:
+            return error.status, {"error": str(error)}, None
+        except ValueError as error:
+            return 400, {"error": str(error)}, None
+        except Exception as error:
+            return 500, {"error": f"{type(error).__name__}: {error}"}, None
+
+    def _read(self, target: str, snapshot: Snapshot):
+        """
+        Answer a GET request from a snapshot (and, for /query, the logic's indexes at the same version).
+        The records are selected here, on the event loop; the returned function turns them into the response
+        object and is safe to run on another thread.
+        :return: A function returning an object ready to be encoded as JSON.
+        """
+        url = urlsplit(target)
+        parts = [part for part in url.path.split("/") if part]
+        params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+
+        if parts == ["tasks"]:
+            offset = int(params.get("offset", 0))
+            limit = int(params["limit"]) if "limit" in params else None
+            tasks = snapshot.tasks[offset:None if limit is None else offset + limit]
+            return lambda: {"version": snapshot.version, "total": len(snapshot.tasks),
+                            "tasks": [record_json(task) for task in tasks]}
+        if len(parts) == 2 and parts[0] == "tasks":
+            task = self.logic.get_task(parse_id(parts[1]))
+            if task is None:
+                raise HTTPError(404, f"task {parts[1]} does not exist")
+            subtasks = list(self.logic.get_subtasks(task.task_id))
+            return lambda: {"version": snapshot.version, "task": record_json(task),
+                            "subtasks": [record_json(subtask) for subtask in subtasks]}
+        if parts == ["query"]:
+            filters = {name: params[name] for name in ("text", "status", "category", "priority") if name in params}
+            for name in ("due_from", "due_to", "start_from", "start_to"):
+                if name in params:
+                    filters[name] = parse_date(params[name])
+            if "sort" in params:
+                filters["sort"] = [field for field in params["sort"].split(",") if field]
+            if "limit" in params:
+                filters["limit"] = int(params["limit"])
+            tasks = self.logic.query(**filters)
+            return lambda: {"version": snapshot.version, "total": len(tasks),
+                            "tasks": [record_json(task) for task in tasks]}
+        if parts == ["subtasks"]:
+            if "task_id" in params:
+                subtasks = list(self.logic.get_subtasks(parse_id(params["task_id"])))
+            else:
+                subtasks = snapshot.subtasks
+            return lambda: {"version": snapshot.version, "subtasks": [record_json(subtask) for subtask in subtasks]}
+        raise HTTPError(404, f"no such resource {url.path}")
+
+    async def _write(self, method: str, target: str, body: bytes) -> tuple:
+        """
+        Answer a POST, PATCH or DELETE request through the mutation queue.
+        :return: (status, payload).
+        """
+        url = urlsplit(target)
+        parts = [part for part in url.path.split("/") if part]
+        params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        logic = self.logic
+
+        if method == "DELETE" and len(parts) == 2 and parts[0] in ("tasks", "subtasks"):
+            record_id = parse_id(parts[1])
+            if parts[0] == "tasks":
+                def delete():
+                    if not logic.task_exists(record_id):
+                        raise HTTPError(404, f"task {record_id} does not exist")
+                    logic.delete_task(record_id)
+            else:
+                def delete():
+                    if logic.store.get_subtask(record_id) is None:
+                        raise HTTPError(404, f"subtask {record_id} does not exist")
+                    logic.delete_subtask(record_id)
+            await self.mutate(delete)
+            return 204, None
+
+        if method == "PATCH" and len(parts) == 2 and parts[0] in ("tasks", "subtasks"):
+            record_id = parse_id(parts[1])
+            changes = json.loads(body or b"null")
+            if not isinstance(changes, dict):
+                raise HTTPError(400, "expected a JSON object")
+            kind = "task" if parts[0] == "tasks" else "subtask"
+            update = logic.update_task if kind == "task" else logic.update_subtask
+
+            def apply():
+                try:
+                    return update(record_id, changes)
+                except KeyError:
+                    raise HTTPError(404, f"{kind} {record_id} does not exist") from None
+            return 200, record_json(await self.mutate(apply))
+
+        if method == "POST" and parts and parts[0] in ("tasks", "subtasks") and len(parts) <= 2:
+            data = json.loads(body or b"null")
+            kind = parts[0]
+            if parts[1:] == ["bulk"]:
+                if not isinstance(data, list):
+                    raise HTTPError(400, "expected a JSON array of records")
+                for number, record in enumerate(data, start=1):
+                    if not isinstance(record, dict):
+                        raise HTTPError(400, f"row {number}: expected a JSON object")
+                add_bulk = logic.add_tasks_bulk if kind == "tasks" else logic.add_subtasks_bulk
+                skip_invalid = params.get("skip_invalid") in ("1", "true")
+                new_records, errors = await self.mutate(lambda: add_bulk(data, skip_invalid=skip_invalid))
+                return 201, {"added": [record_json(record) for record in new_records],
+                             "skipped": [{"row": number, "error": message} for number, message in errors]}
+            if parts[1:]:
+                raise HTTPError(404, f"no such resource {url.path}")
+            if not isinstance(data, dict):
+                raise HTTPError(400, "expected a JSON object")
+            if kind == "tasks":
+                record = await self.mutate(lambda: logic.add_task(logic.prepare_task_data(data)))
+            else:
+                record = await self.mutate(lambda: logic.add_subtask(logic.prepare_subtask_data(data)))
+            return 201, record_json(record)
+
+        raise HTTPError(404, f"no such resource {url.path}")
+
+    @staticmethod
+    async def _send(writer, status: int, payload, etag: str = None, close: bool = False):
+        """
+        Write one HTTP response.
+        """
+        content_type = "application/json"
+        if payload is None:
+            body = b""
+        elif isinstance(payload, str):
+            body, content_type = payload.encode("utf-8"), "text/plain; version=0.0.4; charset=utf-8"
+        elif isinstance(payload, bytes):
+            body = payload
+        else:
+            body = encode(payload)
+        head = [f"HTTP/1.1 {status} {REASONS.get(status, '')}", f"Content-Length: {len(body)}"]
+        if body:
+            head.append(f"Content-Type: {content_type}")
+        if etag is not None:
+            head.append(f"ETag: {etag}")
+        if close:
+            head.append("Connection: close")
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+
+def encode(payload) -> bytes:
+    """
+    Encode a response payload as compact JSON.
+    """
+    return json.dumps(payload, separators=(",", ":")).encode("utf-8")
+
+
+def parse_id(text: str) -> int:
+    """
+    Parse a record ID from a URL, answering 404 for anything that is not a number.
+    """
+    try:
+        return int(text)
+    except ValueError:
+        raise HTTPError(404, f"no such record {text!r}") from None
+
+
+def serve(logic, host: str = "127.0.0.1", port: int = 8765):
+    """
+    Run the API server until interrupted (Ctrl+C), then flush and close the logic.
+    :return: True if all changes were saved (see TaskManagerLogic.close).
+    """
+    server = TaskApiServer(logic, host, port)
+
+    async def run():
+        await server.start()
+        print(f"serving {len(logic.tasks)} tasks on http://{server.host}:{server.port}", flush=True)
+        await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        saved = logic.close()
+    return saved
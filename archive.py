@@ -0,0 +1,215 @@
+import json  # Import json to store archived records as one JSON object per line
+import os
+from datetime import date  # Import date to pick the shard of a task from its due date
+from bulk_io import json_value  # Import json_value to write dates as ISO text
+from file_lock import FileLock  # Import the advisory lock shared by all processes using the same archive
+from storage import replace_atomically  # Import the atomic file writer used for shards and the manifest
+from task_model import Task, Subtask  # Import the Task and Subtask models
+from task_store import TaskStore  # Import the store that holds a loaded shard
+from task_query import TaskIndex, TaskQuery, sort_tasks  # Import the indexes and queries run over loaded shards
+from search_index import SearchIndex  # Import the full-text index, so archived tasks can be searched too
+
+SHARD_EXTENSION = ".jsonl"
+UNDATED = "undated"  # Shard of tasks whose due date is not a real date
+
+
+class ArchiveShard:
+    def __init__(self, tasks: list[Task], subtasks: list[Subtask], stamp: tuple):
+        """
+        Initialize the ArchiveShard class.
+        A shard loaded into memory: its tasks and subtasks in a TaskStore with the same secondary indexes
+        and queries as the active data.
+        :param stamp: (size, mtime) of the shard file when it was read, used to notice changes.
+        """
+        self.store = TaskStore()
+        self.index = TaskIndex()
+        self.store.add_index(self.index)
+        self.search_index = SearchIndex()
+        self.store.add_index(self.search_index)
+        self.store.load(tasks, subtasks)
+        self.queries = TaskQuery(self.store, self.index, self.search_index)
+        self.stamp = stamp
+
+
+class Archive:
+    def __init__(self, directory: str):
+        """
+        Initialize the Archive class.
+        The archive keeps tasks that were moved out of the active data, together with their subtasks, in dated
+        shards: one JSON Lines file per month of the task's due date ('2024-05.jsonl', plus 'undated.jsonl'),
+        each line holding a task and its subtasks. A small manifest ('manifest.json') records the number of
+        records per shard and the next free IDs, so archived IDs are never handed out again.
+        Nothing is read when the archive is created; a shard is only loaded when a query needs it, and is then
+        kept in memory until its file changes. Loading, saving and refreshing the active data therefore cost
+        the same no matter how much history has been archived.
+        All file access happens under an advisory lock ('<directory>/archive.lock').
+        :param directory: Directory holding the shards (created on the first write).
+        """
+        self.directory = directory
+        self.manifest_file = os.path.join(directory, "manifest.json")
+        self.lock = FileLock(os.path.join(directory, "archive.lock"))
+        self.shards = {}  # Shard name -> ArchiveShard loaded so far
+
+    @staticmethod
+    def shard_name(task: Task) -> str:
+        """
+        Returns the name of the shard a task is archived in: the year and month of its due date.
+        """
+        due_date = task.due_date
+        return f"{due_date.year:04d}-{due_date.month:02d}" if isinstance(due_date, date) else UNDATED
+
+    def shard_path(self, name: str) -> str:
+        return os.path.join(self.directory, name + SHARD_EXTENSION)
+
+    def shard_names(self) -> list[str]:
+        """
+        Returns the names of all shards, oldest first (the undated shard last).
+        """
+        try:
+            files = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        names = [name[:-len(SHARD_EXTENSION)] for name in files if name.endswith(SHARD_EXTENSION)]
+        return sorted(names, key=lambda name: (name == UNDATED, name))
+
+    def manifest(self) -> dict:
+        """
+        Returns the manifest: {"next_task_id", "next_subtask_id", "shards": {name: {"tasks", "subtasks"}}}.
+        """
+        try:
+            with open(self.manifest_file, encoding="utf-8") as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return {"next_task_id": 1, "next_subtask_id": 1, "shards": {}}
+
+    def add(self, tasks: list[Task], subtasks_by_task: dict) -> dict:
+        """
+        Write tasks and their subtasks to their shards. Only the shards that receive records are rewritten.
+        A task that is already archived is replaced, so archiving the same task twice (e.g. after a crash
+        between writing the archive and saving the active data) keeps one copy.
+        The shards are written before the manifest, and the caller removes the tasks from the active data
+        only after this returns, so a crash at any point loses nothing.
+        :param tasks: The Task objects to archive.
+        :param subtasks_by_task: Task ID -> list of the task's Subtask objects.
+        :return: Shard name -> number of tasks added to it.
+        """
+        by_shard = {}
+        for task in tasks:
+            by_shard.setdefault(self.shard_name(task), []).append(task)
+        os.makedirs(self.directory, exist_ok=True)
+        with self.lock:
+            manifest = self.manifest()
+            for name, shard_tasks in by_shard.items():
+                lines, subtask_counts = self._read_lines(name)  # Task ID -> JSON line, number of subtasks
+                for task in shard_tasks:
+                    subtasks = subtasks_by_task.get(task.task_id, ())
+                    lines[task.task_id] = self._encode(task, subtasks)
+                    subtask_counts[task.task_id] = len(subtasks)
+                self._write_lines(name, lines)
+                manifest["shards"][name] = {"tasks": len(lines), "subtasks": sum(subtask_counts.values())}
+                self.shards.pop(name, None)
+            manifest["next_task_id"] = max([manifest["next_task_id"]] + [task.task_id + 1 for task in tasks])
+            manifest["next_subtask_id"] = max([manifest["next_subtask_id"]] +
+                                              [subtask.subtask_id + 1 for subtasks in subtasks_by_task.values()
+                                               for subtask in subtasks])
+
+            def write(path):
+                with open(path, "w", encoding="utf-8") as file:
+                    json.dump(manifest, file, indent=2, sort_keys=True)
+            replace_atomically(self.manifest_file, write)
+        return {name: len(shard_tasks) for name, shard_tasks in by_shard.items()}
+
+    @staticmethod
+    def _encode(task: Task, subtasks) -> str:
+        record = {"task": {field: json_value(value) for field, value in zip(Task.FIELDS, task.as_row())},
+                  "subtasks": [{field: json_value(value) for field, value in zip(Subtask.FIELDS, subtask.as_row())}
+                               for subtask in subtasks]}
+        return json.dumps(record)
+
+    def _read_lines(self, name: str) -> tuple[dict, dict]:
+        """
+        Returns Task ID -> JSON line of the tasks in a shard, in file order, and Task ID -> number of the
+        task's subtasks (counted from the parsed records).
+        """
+        lines, subtask_counts = {}, {}
+        try:
+            with open(self.shard_path(name), encoding="utf-8") as file:
+                for line in file:
+                    if line.strip():
+                        record = json.loads(line)
+                        task_id = record["task"]["task_id"]
+                        lines[task_id] = line.rstrip("\n")
+                        subtask_counts[task_id] = len(record["subtasks"])
+        except FileNotFoundError:
+            pass
+        return lines, subtask_counts
+
+    def _write_lines(self, name: str, lines: dict):
+        def write(path):
+            with open(path, "w", encoding="utf-8") as file:
+                for line in lines.values():
+                    file.write(line + "\n")
+        replace_atomically(self.shard_path(name), write)
+
+    def load_shard(self, name: str) -> ArchiveShard:
+        """
+        Returns a shard loaded into memory, reading it only if it was not loaded yet or its file changed.
+        """
+        path = self.shard_path(name)
+        if not os.path.isdir(self.directory):
+            return ArchiveShard([], [], None)  # Nothing archived yet
+        with self.lock.shared():
+            try:
+                status = os.stat(path)
+            except FileNotFoundError:
+                self.shards.pop(name, None)
+                return ArchiveShard([], [], None)
+            stamp = (status.st_size, status.st_mtime_ns)
+            shard = self.shards.get(name)
+            if shard is not None and shard.stamp == stamp:
+                return shard
+            tasks, subtasks = [], []
+            with open(path, encoding="utf-8") as file:
+                for line in file:
+                    if not line.strip():
+                        continue
+                    record = json.loads(line)
+                    tasks.append(Task(**record["task"]))
+                    subtasks.extend(Subtask(**subtask) for subtask in record["subtasks"])
+        shard = self.shards[name] = ArchiveShard(tasks, subtasks, stamp)
+        return shard
+
+    def query(self, due_from=None, due_to=None, sort=None, limit: int = None, **filters) -> list[Task]:
+        """
+        Find archived tasks matching the same filters as TaskQuery.query.
+        With a due date range, only the shards of the months in that range are loaded.
+        :return: A list of matching Task objects.
+        """
+        names = self.shard_names()
+        if due_from is not None or due_to is not None:
+            first = f"{due_from.year:04d}-{due_from.month:02d}" if isinstance(due_from, date) else ""
+            last = f"{due_to.year:04d}-{due_to.month:02d}" if isinstance(due_to, date) else "9999-99"
+            names = [name for name in names if name != UNDATED and first <= name <= last]
+        tasks = []
+        for name in names:
+            tasks.extend(self.load_shard(name).queries.query(due_from=due_from, due_to=due_to, sort=sort,
+                                                             limit=limit, **filters))
+        if len(names) > 1:
+            tasks.sort(key=lambda task: task.task_id)  # Same order as an unsorted query of the active data
+            tasks = sort_tasks(tasks, sort)
+        return tasks if limit is None else tasks[:limit]
+
+    def subtasks_of(self, task: Task) -> list[Subtask]:
+        """
+        Returns the archived subtasks of an archived task.
+        """
+        return list(self.load_shard(self.shard_name(task)).store.subtasks_of(task.task_id))
+
+    def stats(self) -> dict:
+        """
+        Returns the number of archived tasks and subtasks and the number of shards, from the manifest.
+        """
+        shards = self.manifest()["shards"]
+        return {"tasks": sum(shard["tasks"] for shard in shards.values()),
+                "subtasks": sum(shard["subtasks"] for shard in shards.values()),
+                "shards": len(shards)}
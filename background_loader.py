@@ -0,0 +1,89 @@
+import queue  # Import queue to hand loaded chunks from the worker thread to the Tk thread
+import threading  # Import threading for the worker that reads the data file
+from time import perf_counter  # Import perf_counter to limit how long each Tk callback adds records
+
+DONE = object()  # Put on the queue by the worker once every chunk has been read
+
+
+class BackgroundLoader:
+    POLL_INTERVAL = 10  # Milliseconds between checks for new chunks
+    TIME_BUDGET = 0.02  # Seconds of adding records per Tk callback; the views update and input is handled in between
+
+    def __init__(self, root, logic, on_progress=None, on_done=None, chunk_size: int = 1000):
+        """
+        Initialize the BackgroundLoader class.
+        This class loads the data of a TaskManagerLogic created with load=False without blocking the Tk event loop:
+        a worker thread reads (parses) the data file in chunks and queues them, and the Tk thread adds the queued
+        chunks to the logic through root.after, a few at a time. Each chunk publishes TASK_ADDED/SUBTASK_ADDED
+        events, so the views fill up progressively while the window stays responsive.
+        The store is only ever touched on the Tk thread.
+        :param root: The Tk root window.
+        :param logic: The TaskManagerLogic to load.
+        :param on_progress: Called on the Tk thread with (tasks loaded, subtasks loaded) after each batch of chunks.
+        :param on_done: Called on the Tk thread with None when loading finished, or with the exception if it failed.
+        :param chunk_size: Maximum number of records read and added at a time.
+        """
+        self.root = root
+        self.logic = logic
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self.chunk_size = chunk_size
+        self.tasks_loaded = 0  # Number of tasks added so far
+        self.subtasks_loaded = 0  # Number of subtasks added so far
+        self._queue = queue.SimpleQueue()  # Chunks read by the worker and not added yet
+        self._cancelled = threading.Event()  # Set by cancel() to stop the worker after the current chunk
+
+        self.logic.begin_loading()
+        self._thread = threading.Thread(target=self._read, name="BackgroundLoader", daemon=True)
+        self._thread.start()
+        self.root.after(self.POLL_INTERVAL, self._poll)
+
+    def _read(self):
+        """
+        Worker thread: read the chunks from storage and queue them, followed by DONE (or the exception).
+        """
+        chunks = self.logic.iter_load_chunks(self.chunk_size)
+        try:
+            for chunk in chunks:
+                if self._cancelled.is_set():
+                    return
+                self._queue.put(chunk)
+            self._queue.put(DONE)
+        except Exception as error:
+            self._queue.put(error)
+        finally:
+            chunks.close()  # Releases anything the storage holds while reading (e.g. the data file lock)
+
+    def _poll(self):
+        """
+        Tk thread: add queued chunks to the logic until the time budget is used up, then check again later.
+        """
+        if self._cancelled.is_set():
+            return
+        deadline = perf_counter() + self.TIME_BUDGET
+        added = False
+        while perf_counter() < deadline:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is DONE:
+                self.logic.finish_loading()
+            if item is DONE or isinstance(item, Exception):  # After a failure the logic stays in loading mode
+                if self.on_done is not None:
+                    self.on_done(None if item is DONE else item)
+                return
+            tasks, subtasks, changes = item
+            self.logic.load_chunk(tasks, subtasks, changes)
+            self.tasks_loaded += len(tasks)
+            self.subtasks_loaded += len(subtasks)
+            added = True
+        if added and self.on_progress is not None:
+            self.on_progress(self.tasks_loaded, self.subtasks_loaded)
+        self.root.after(self.POLL_INTERVAL, self._poll)
+
+    def cancel(self):
+        """
+        Stop loading (e.g. when the window is closed); the worker stops after the chunk it is reading.
+        """
+        self._cancelled.set()
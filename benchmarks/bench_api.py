@@ -0,0 +1,138 @@
+"""
+Load-test the local HTTP/JSON API server.
+
+Usage: python benchmarks/bench_api.py [tasks] [connections] [seconds]
+A server (`python -m cli serve`, SQLite storage) is started in a separate process on a temporary database
+with `tasks` tasks (default 10,000). `connections` keep-alive clients (default 32) then send requests for
+`seconds` seconds (default 10) in this mix:
+    40% GET /tasks/{id}          single task with subtasks
+    20% GET /query               indexed filter, sorted, limited to 50
+    30% GET /tasks?limit=100     conditional poll with If-None-Match (mostly 304 Not Modified)
+    10% POST /tasks              add a task (applied through the mutation queue, persisted in batches)
+Throughput and p50/p99 latency are printed per request type and overall.
+"""
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # Directory containing the app modules
+
+
+async def request(reader, writer, method: str, path: str, body: bytes = b"", headers: dict = None) -> tuple:
+    """
+    Send one HTTP/1.1 request on a keep-alive connection and read the response.
+    :return: (status, headers, body).
+    """
+    lines = [f"{method} {path} HTTP/1.1", "Host: localhost", f"Content-Length: {len(body)}"]
+    lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+    status = int((await reader.readline()).split()[1])
+    response_headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        response_headers[name.strip().lower()] = value.strip()
+    length = int(response_headers.get("content-length", 0))
+    return status, response_headers, await reader.readexactly(length) if length else b""
+
+
+async def client(port: int, task_count: int, deadline: float, latencies: dict, rng: random.Random):
+    """
+    One keep-alive connection sending the request mix until the deadline.
+    """
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    etag = None
+    new_task = json.dumps({"name": "Load test", "category": "Load", "start_date": "2024-01-01",
+                           "due_date": "2024-02-01", "status": "Open"}).encode()
+    while time.perf_counter() < deadline:
+        choice = rng.random()
+        start = time.perf_counter()
+        if choice < 0.4:
+            kind = "get"
+            status, _, _ = await request(reader, writer, "GET", f"/tasks/{rng.randrange(1, task_count + 1)}")
+        elif choice < 0.6:
+            kind = "query"
+            status, _, _ = await request(reader, writer, "GET",
+                                         f"/query?category=Category%20{rng.randrange(20)}&status=Open"
+                                         f"&sort=due_date&limit=50")
+        elif choice < 0.9:
+            status, headers, _ = await request(reader, writer, "GET", "/tasks?limit=100",
+                                               headers={"If-None-Match": etag} if etag else None)
+            kind = "poll (304)" if status == 304 else "poll (200)"
+            etag = headers.get("etag", etag)
+            status = 200 if status == 304 else status
+        else:
+            kind = "add"
+            status, _, _ = await request(reader, writer, "POST", "/tasks", new_task)
+            status = 200 if status == 201 else status
+        if status not in (200, 404):
+            raise RuntimeError(f"{kind} request failed with status {status}")
+        latencies.setdefault(kind, []).append(time.perf_counter() - start)
+    writer.close()
+
+
+def percentile(values: list, fraction: float) -> float:
+    """
+    Returns the given percentile of a list of values.
+    """
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def run_load(port: int, task_count: int, connections: int, seconds: float) -> dict:
+    """
+    Run all clients concurrently and return the latencies per request type.
+    """
+    latencies = {}
+    deadline = time.perf_counter() + seconds
+    await asyncio.gather(*(client(port, task_count, deadline, latencies, random.Random(number))
+                           for number in range(connections)))
+    return latencies
+
+
+if __name__ == "__main__":
+    task_count = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    connections = int(sys.argv[2]) if len(sys.argv) > 2 else 32
+    seconds = float(sys.argv[3]) if len(sys.argv) > 3 else 10
+    environment = dict(os.environ, PYTHONPATH=ROOT)
+    with tempfile.TemporaryDirectory() as directory:
+        # Create the data with the bulk importer
+        rng = random.Random(1)
+        with open(os.path.join(directory, "tasks.jsonl"), "w") as file:
+            for number in range(task_count):
+                file.write(json.dumps({"name": f"Task {number}", "category": f"Category {rng.randrange(20)}",
+                                       "priority": rng.choice(["High", "Medium", "Low"]),
+                                       "start_date": "2024-01-01", "due_date": f"2024-{rng.randrange(1, 13):02d}-15",
+                                       "status": rng.choice(["Open", "In Progress", "Completed"])}) + "\n")
+        storage = ["--storage", "sqlite", "--db", "bench.db", "--file", "none.xlsx"]
+        subprocess.run([sys.executable, "-m", "cli", *storage, "import", "tasks", "tasks.jsonl"], cwd=directory,
+                       env=environment, check=True, stdout=subprocess.DEVNULL)
+
+        server = subprocess.Popen([sys.executable, "-m", "cli", *storage, "serve", "--port", "0"], cwd=directory,
+                                  env=environment, stdout=subprocess.PIPE, text=True)
+        try:
+            port = int(server.stdout.readline().rsplit(":", 1)[1])  # "serving N tasks on http://127.0.0.1:PORT"
+            latencies = asyncio.run(run_load(port, task_count, connections, seconds))
+        finally:
+            server.terminate()
+            server.wait()
+
+    print(f"{task_count} tasks, {connections} connections, {seconds:.0f} s")
+    print(f"{'request':<14}{'count':>8}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    everything = []
+    for kind in ("get", "query", "poll (304)", "poll (200)", "add"):
+        values = latencies.get(kind, [])
+        everything += values
+        if values:
+            print(f"{kind:<14}{len(values):>8}{len(values) / seconds:>10.0f}"
+                  f"{statistics.median(values) * 1000:>10.2f}{percentile(values, 0.99) * 1000:>10.2f}")
+    print(f"{'total':<14}{len(everything):>8}{len(everything) / seconds:>10.0f}"
+          f"{statistics.median(everything) * 1000:>10.2f}{percentile(everything, 0.99) * 1000:>10.2f}")
@@ -0,0 +1,112 @@
+"""
+Show that archiving keeps the cost of the active data independent of the amount of history.
+
+Usage: python benchmarks/bench_archive.py [active] [history ...]
+For each history size (default 0, 20,000 and 80,000 completed tasks, each with one subtask), a journaled
+Excel file holds `active` open tasks (default 5,000) and the history is in the archive next to it. The
+following are timed:
+    load        creating TaskManagerLogic (the workbook is parsed; the parsed-row cache is off)
+    save        one update plus the full snapshot written when the app closes
+    refresh     the query behind a filtered task table refresh, and building its rows
+    archive     the first query that includes the archive (loads the matching shards), and a repeat
+With --unarchived, the same data is also timed with the history kept in the active file, which is
+what archiving avoids (this takes a few minutes for the default sizes, as the workbook is saved whole).
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # Make the app modules importable
+
+from archive import Archive
+from excel_handler import ExcelHandler
+from journal import JournaledStorage
+from task_manager_logic import TaskManagerLogic
+from task_model import Task, Subtask
+
+
+def history_records(count: int) -> tuple[list[Task], dict]:
+    """
+    Returns `count` completed tasks due in 2020-2022 and their subtasks (Task ID -> [Subtask]).
+    """
+    tasks, subtasks = [], {}
+    for task_id in range(1, count + 1):
+        due = date(2020, 1, 1) + timedelta(days=task_id % 1000)
+        tasks.append(Task(task_id, f"Old task {task_id}", f"Category {task_id % 20}", "Low", due - timedelta(days=30),
+                          due, "Completed", 100, "Finished"))
+        subtasks[task_id] = [Subtask(task_id, task_id, f"Old subtask {task_id}", "Completed", 100, due, due)]
+    return tasks, subtasks
+
+
+def active_records(count: int, first_id: int) -> tuple[list[Task], list[Subtask]]:
+    """
+    Returns `count` open tasks due from today on, with one subtask each, numbered from first_id.
+    """
+    today = date.today()
+    tasks = [Task(task_id, f"Task {task_id}", f"Category {task_id % 20}", "High", today,
+                  today + timedelta(days=task_id % 300), "Open", 10, "")
+             for task_id in range(first_id, first_id + count)]
+    subtasks = [Subtask(task.task_id, task.task_id, f"Subtask {task.task_id}", "Open", 0, task.due_date, None)
+                for task in tasks]
+    return tasks, subtasks
+
+
+def time_active_set(path: str) -> dict:
+    """
+    Time load, save and refresh of the data file at `path` (and queries of its archive, if it has one).
+    """
+    result = {}
+    start = time.perf_counter()
+    logic = TaskManagerLogic(JournaledStorage(ExcelHandler(path, cache=False)))
+    result["load"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    tasks = logic.query(status="Open", sort=["due_date"])
+    rows = {task.task_id: task.as_row() for task in tasks}
+    result["refresh"] = time.perf_counter() - start
+
+    if logic.archive_stats()["tasks"]:
+        for label in ("archive first", "archive again"):
+            start = time.perf_counter()
+            logic.query(include_archive=True, category="Category 3", due_from=date(2020, 3, 1),
+                        due_to=date(2020, 5, 31))
+            result[label] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    logic.update_task(next(iter(rows)), {"progress": 50})
+    logic.close()  # Journals the update, then writes the full snapshot
+    result["save"] = time.perf_counter() - start
+    return result
+
+
+if __name__ == "__main__":
+    unarchived = "--unarchived" in sys.argv
+    numbers = [int(arg) for arg in sys.argv[1:] if not arg.startswith("--")]
+    active = numbers[0] if numbers else 5000
+    history_sizes = numbers[1:] or [0, 20000, 80000]
+
+    print(f"{'history':>8} {'layout':<10} {'file MiB':>8} {'load s':>8} {'save s':>8} {'refresh ms':>10} "
+          f"{'archive first ms':>16} {'again ms':>8}")
+    for history in history_sizes:
+        old_tasks, old_subtasks = history_records(history)
+        new_tasks, new_subtasks = active_records(active, history + 1)
+        layouts = ["archived"] + (["unarchived"] if unarchived and history else [])
+        for layout in layouts:
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, "bench.xlsx")
+                handler = ExcelHandler(path, cache=False)
+                handler.create_excel_file()
+                if layout == "archived":
+                    if old_tasks:
+                        Archive(handler.archive_directory()).add(old_tasks, old_subtasks)
+                    handler.save_data(new_tasks, new_subtasks)
+                else:
+                    handler.save_data(old_tasks + new_tasks,
+                                      [subtasks[0] for subtasks in old_subtasks.values()] + new_subtasks)
+                size = os.path.getsize(path) / 2**20
+                result = time_active_set(path)
+                print(f"{history:>8} {layout:<10} {size:>8.1f} {result['load']:>8.2f} {result['save']:>8.2f} "
+                      f"{result['refresh'] * 1000:>10.1f} {result.get('archive first', 0) * 1000:>16.1f} "
+                      f"{result.get('archive again', 0) * 1000:>8.1f}")
@@ -0,0 +1,94 @@
+"""
+Measure how long the Tk thread is blocked when the app loads its data, with and without BackgroundLoader.
+
+Usage: python benchmarks/bench_background_load.py [rows]
+A journaled workbook with `rows` tasks and `rows` subtasks (default 50,000) is generated and loaded:
+    blocking     TaskManagerLogic() loads everything before the window could be drawn
+    background   BackgroundLoader, parsing the workbook (cold) and from the parsed-row cache (warm)
+The background runs use a stand-in for the Tk root that runs the after() callbacks in a loop, so no display
+is needed. Reported are the time until the first rows are in the store (when the table starts filling), the
+longest single callback on the Tk thread (how long input can go unanswered), and the total load time.
+Updating the Treeviews is not included; it adds to each callback in the app.
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # Make the app modules importable
+
+from background_loader import BackgroundLoader
+from excel_handler import ExcelHandler
+from generate_dataset import write_workbook
+from journal import JournaledStorage
+from task_manager_logic import TaskManagerLogic
+
+
+class FakeRoot:
+    def __init__(self):
+        """
+        Stands in for the Tk root window: after() callbacks are collected and run by run_until().
+        """
+        self.callbacks = []
+
+    def after(self, milliseconds: int, callback):
+        self.callbacks.append(callback)
+
+    def run_until(self, condition, store) -> tuple[float, float]:
+        """
+        Run the callbacks until condition() is true.
+        :return: (seconds until the store had its first task, longest callback in seconds).
+        """
+        start = time.perf_counter()
+        first_rows = None
+        longest = 0.0
+        while not condition():
+            if not self.callbacks:
+                time.sleep(0.001)
+                continue
+            callback = self.callbacks.pop(0)
+            before = time.perf_counter()
+            callback()
+            longest = max(longest, time.perf_counter() - before)
+            if first_rows is None and store.tasks_by_id:
+                first_rows = time.perf_counter() - start
+            time.sleep(0.001)  # Stand-in for the rest of the event loop
+        return first_rows or 0.0, longest
+
+
+def background_load(path: str, cache: bool) -> dict:
+    """
+    Load the workbook at `path` with a BackgroundLoader and return the timings.
+    """
+    root = FakeRoot()
+    start = time.perf_counter()
+    logic = TaskManagerLogic(JournaledStorage(ExcelHandler(path, cache=cache)), load=False)
+    done = []
+    BackgroundLoader(root, logic, on_done=done.append)
+    first_rows, longest = root.run_until(lambda: done, logic.store)
+    total = time.perf_counter() - start
+    if done[0] is not None:
+        raise done[0]
+    logic.close()
+    return {"first rows": first_rows, "longest": longest, "total": total, "tasks": len(logic.tasks)}
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench.xlsx")
+        write_workbook(path, rows)
+
+        start = time.perf_counter()
+        blocking = TaskManagerLogic(JournaledStorage(ExcelHandler(path, cache=False)))
+        elapsed = time.perf_counter() - start
+        blocking.close()
+        print(f"{'blocking':<18} first rows {elapsed:7.2f} s  longest Tk callback {elapsed * 1000:8.1f} ms  "
+              f"total {elapsed:6.2f} s")
+
+        for label, cache in (("background, cold", False), ("background, warm", True)):
+            if cache:
+                ExcelHandler(path).load_data()  # Write the parsed-row cache
+            result = background_load(path, cache)
+            print(f"{label:<18} first rows {result['first rows']:7.2f} s  longest Tk callback "
+                  f"{result['longest'] * 1000:8.1f} ms  total {result['total']:6.2f} s")
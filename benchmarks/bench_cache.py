@@ -0,0 +1,48 @@
+"""
+Compare cold starts (parsing the workbook) with warm starts (loading the parsed-data cache).
+
+Usage: python benchmarks/bench_cache.py [rows ...]
+For each size (default 1,000, 10,000 and 50,000) a workbook with that many tasks and subtasks is generated.
+Each start runs `python -m cli list tasks` in a fresh interpreter with output discarded, so the times include
+interpreter startup, imports and the load; the cache file is deleted before each cold start.
+"""
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # Directory containing the app modules
+sys.path.insert(0, ROOT)  # Make the app modules importable
+
+from bench_load import write_workbook
+
+
+def start_time(directory: str, excel_file: str) -> float:
+    """
+    Run the CLI once against the workbook and return its wall time in seconds.
+    """
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-m", "cli", "--file", excel_file, "list", "tasks"], cwd=directory,
+                   env=dict(os.environ, PYTHONPATH=ROOT), check=True, stdout=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    sizes = [int(argument) for argument in sys.argv[1:]] or [1_000, 10_000, 50_000]
+    print(f"{'rows':>8}{'cold':>10}{'warm':>10}{'speed-up':>10}{'cache size':>12}")
+    with tempfile.TemporaryDirectory() as directory:
+        for rows in sizes:
+            excel_file = os.path.join(directory, f"bench_{rows}.xlsx")
+            cache_file = excel_file + ".cache"
+            write_workbook(excel_file, rows)
+            cold, warm = [], []
+            for _ in range(3):
+                if os.path.exists(cache_file):
+                    os.remove(cache_file)
+                cold.append(start_time(directory, excel_file))  # Parses the workbook and writes the cache
+                warm.append(start_time(directory, excel_file))  # Loads the cache
+            cold_s, warm_s = statistics.median(cold), statistics.median(warm)
+            print(f"{rows:>8}{cold_s:>9.2f}s{warm_s:>9.2f}s{cold_s / warm_s:>9.1f}x"
+                  f"{os.path.getsize(cache_file) / 2**20:>9.1f} MiB")
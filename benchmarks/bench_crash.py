@@ -0,0 +1,54 @@
+"""
+Compare the cost of saving one change through the journal with a full rewrite of the Excel file.
+That killed writers lose no acknowledged save is checked by tests/test_crash_recovery.py.
+
+Usage: python benchmarks/bench_crash.py [tasks]
+A workbook with `tasks` tasks (default 1,000) is written, then one changed task is saved 50 times through the
+journal and the whole workbook is rewritten 5 times; the average time of each is reported.
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # Make the app modules importable
+
+from excel_handler import ExcelHandler
+from journal import JournaledStorage
+from task_manager_logic import TaskManagerLogic
+from task_model import Task
+
+
+def save_costs(excel_file: str, count: int = 50) -> tuple[float, float]:
+    """
+    Return the average time in milliseconds of a journaled save and of a full Excel rewrite.
+    """
+    storage = JournaledStorage(ExcelHandler(excel_file), checkpoint_bytes=10 ** 12)
+    logic = TaskManagerLogic(storage)
+    tasks, subtasks = list(logic.tasks), list(logic.subtasks)
+    task = tasks[0]
+
+    start = time.perf_counter()
+    for _ in range(count):
+        storage.apply_changes(None, None, [("upsert_task", task)])
+    journaled = (time.perf_counter() - start) / count
+
+    start = time.perf_counter()
+    for _ in range(5):
+        storage.save_data(tasks, subtasks)
+    full = (time.perf_counter() - start) / 5
+    logic.close()
+    return journaled * 1000, full * 1000
+
+
+if __name__ == "__main__":
+    task_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    with tempfile.TemporaryDirectory() as directory:
+        excel_file = os.path.join(directory, "crash.xlsx")
+        handler = ExcelHandler(excel_file)
+        handler.create_excel_file()
+        handler.save_data([Task(i, f"Task {i}", "Crash", "High", "2024-01-01", "2024-02-01", "Open", 0, "x" * 200)
+                           for i in range(1, task_count + 1)], [])
+        journaled_ms, full_ms = save_costs(excel_file)
+        print(f"save of one change with {task_count} tasks: journaled {journaled_ms:.2f} ms, "
+              f"full Excel rewrite {full_ms:.1f} ms")
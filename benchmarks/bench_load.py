@@ -0,0 +1,71 @@
+"""
+Compare the streaming (read-only) load path of ExcelHandler with the original full-workbook load.
+
+Usage: python benchmarks/bench_load.py [rows] [--memory]
+A temporary workbook with `rows` tasks and `rows` subtasks is generated and loaded with both paths.
+--memory also reports peak traced memory (much slower).
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # Make the app modules importable
+
+import openpyxl
+from excel_handler import ExcelHandler
+
+
+def write_workbook(path: str, rows: int):
+    """
+    Write a workbook in the ExcelHandler format with `rows` tasks and `rows` subtasks.
+    """
+    workbook = openpyxl.Workbook(write_only=True)  # Write-only mode keeps generation fast for large files
+    main_task_sheet = workbook.create_sheet("Main Tasks")
+    main_task_sheet.append(["Task ID", "Task Name", "Category", "Priority", "Start Date", "Due Date", "Status",
+                            "Progress", "Notes"])
+    for i in range(1, rows + 1):
+        main_task_sheet.append([i, f"Task {i}", "Work", "High", "2024-01-01", "2024-02-01", "In Progress", "50%",
+                                "Some notes"])
+    subtask_sheet = workbook.create_sheet("Subtasks")
+    subtask_sheet.append(["Subtask ID", "Task ID", "Subtask Name", "Subtask Status", "Subtask Progress",
+                          "Subtask Due Date", "Subtask Completed Date"])
+    for i in range(1, rows + 1):
+        subtask_sheet.append([i, (i % rows) + 1, f"Subtask {i}", "Open", "10%", "2024-01-15", None])
+    workbook.save(path)
+
+
+def measure(label: str, load, memory: bool):
+    """
+    Run a load function and print its wall time. With `memory`, it is run a second time under
+    tracemalloc to report peak memory (tracing slows it down too much to time the same run).
+    """
+    start = time.perf_counter()
+    tasks, subtasks = load()
+    elapsed = time.perf_counter() - start
+    line = f"{label:<10} {elapsed:8.2f} s  ({len(tasks)} tasks, {len(subtasks)} subtasks)"
+    if memory:
+        del tasks, subtasks
+        tracemalloc.start()
+        load()
+        line += f"  peak {tracemalloc.get_traced_memory()[1] / 2**20:.1f} MiB"
+        tracemalloc.stop()
+    print(line)
+
+
+if __name__ == "__main__":
+    arguments = [argument for argument in sys.argv[1:] if argument != "--memory"]
+    rows = int(arguments[0]) if arguments else 100_000
+    memory = "--memory" in sys.argv
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench.xlsx")
+        write_workbook(path, rows)
+        handler = ExcelHandler(path, cache=False)  # Measure parsing, not the parsed-data cache
+        measure("full", lambda: handler.load_data(streaming=False), memory)
+        measure("streaming", lambda: handler.load_data(), memory)
+
+        # Time until the first chunk of tasks is available (what a progressive UI would show first)
+        start = time.perf_counter()
+        next(handler.iter_chunks())
+        print(f"first chunk {time.perf_counter() - start:6.3f} s")
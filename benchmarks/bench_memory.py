@@ -0,0 +1,65 @@
+"""
+Measure the memory used by Subtask objects compared with the previous __dict__-based class.
+
+Usage: python benchmarks/bench_memory.py [count]
+`count` subtasks (default 1,000,000) are created with each class and the traced memory is reported.
+"""
+import gc
+import os
+import sys
+import time
+import tracemalloc
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # Make the app modules importable
+
+from task_model import Subtask
+
+
+class DictSubtask:
+    """
+    The Subtask class as it was before __slots__: one __dict__ per instance and a new list per as_list() call.
+    """
+
+    def __init__(self, subtask_id, task_id, name, status, progress, due_date, completed_date):
+        self.subtask_id = subtask_id
+        self.task_id = task_id
+        self.name = name
+        self.status = status
+        self.progress = progress
+        self.due_date = due_date
+        self.completed_date = completed_date
+
+    def as_list(self) -> list:
+        return [self.subtask_id, self.task_id, self.name, self.status, self.progress, self.due_date,
+                self.completed_date]
+
+
+def measure(label: str, record_class, count: int, due_date):
+    """
+    Create `count` records, print the memory they use, and time one pass over their rows.
+    """
+    gc.collect()
+    tracemalloc.start()
+    records = [record_class(i, i // 10, "Subtask", "Open", 50, due_date, None) for i in range(count)]
+    used = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    if hasattr(record_class, "as_row"):
+        for record in records:
+            record.as_row()
+    else:
+        for record in records:
+            record.as_list()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<10} {used / 2**20:8.1f} MiB  {used / count:6.1f} bytes/object  rows {elapsed:.2f} s")
+    return used
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    shared_date = date(2024, 1, 15)  # Shared so both runs measure the record objects, not the dates
+    before = measure("__dict__", DictSubtask, count, "2024-01-15")
+    after = measure("__slots__", Subtask, count, shared_date)
+    print(f"saved {(before - after) / count:.1f} bytes per subtask ({(1 - after / before) * 100:.0f}%)")
@@ -0,0 +1,171 @@
+"""
+Measure the overhead of the instrumentation in metrics.py on the logic's mutations.
+
+Usage: python benchmarks/bench_metrics.py [tasks] [operations] [runs]
+A store with `tasks` tasks (default 100,000) is loaded, and `operations` rounds (default 20,000) of
+add_task + update_task + delete_task are timed with metrics off (the default; @metrics.timed methods are
+then the plain methods) and on, in two settings:
+    in memory    writes are held back (long debounce), so only the in-memory mutations are timed. These are
+                 the cheapest instrumented calls, so this is the worst case for the relative overhead.
+    persisted    every round is flushed to a journaled Excel file, as when a user edits tasks in the app.
+Each setting is timed `runs` times (default 15) with metrics off and on, alternating which goes first; the
+median time per round and its interquartile range are reported for both, and so is the median (and
+interquartile range) of the difference between the two runs of each pair.
+
+The overhead itself is a few percent of a microsecond-scale round, far less than the run-to-run noise of a
+whole round (often several percent), so comparing the two timings cannot show whether it is under 1%.
+It is therefore computed from its parts: the cost of one instrumented call (a @metrics.timed method with
+metrics on, minus the plain call, over many calls) times the number of values recorded per round, divided
+by the median round time with metrics off. The budget is an overhead under 1% for the persisted setting,
+which is what the app does; the script exits with status 1 if that estimate is above it. The in-memory
+setting is reported for reference: a bare in-memory mutation takes only tens of microseconds, so there the
+overhead is above 1%. Loads, saves and refreshes take milliseconds to seconds per call, so their overhead
+is far below both numbers.
+"""
+import gc
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # Make the app modules importable
+
+import metrics
+from excel_handler import ExcelHandler
+from journal import JournaledStorage
+from sqlite_handler import SQLiteHandler
+from task_manager_logic import TaskManagerLogic
+from task_model import Task
+
+
+class Probe:
+    """An instrumented method that does nothing, to time the instrumentation alone."""
+
+    @metrics.timed("bench_probe")
+    def call(self):
+        pass
+
+
+def mutations(logic, operations: int, flush: bool = False) -> float:
+    """
+    Time `operations` rounds of add, update and delete and return the time per round in microseconds.
+    """
+    data = {"name": "Task", "category": "Work", "priority": "High", "start_date": "2024-01-01",
+            "due_date": "2024-02-01", "status": "Open", "progress": 0, "notes": ""}
+    gc.disable()  # Collections would land in one run or the other at random
+    start = time.perf_counter()
+    for _ in range(operations):
+        task = logic.add_task(data)
+        logic.update_task(task.task_id, {"status": "Completed"})
+        logic.delete_task(task.task_id)
+        if flush:
+            logic.flush()
+    elapsed = time.perf_counter() - start
+    gc.enable()
+    return elapsed / operations * 1e6
+
+
+def set_metrics(state: str):
+    """
+    Turn the instrumentation "on" or "off".
+    """
+    if state == "on":
+        metrics.enable()
+    else:
+        metrics.disable()
+
+
+def compare(function, runs: int) -> dict:
+    """
+    Call a timing function `runs` times with metrics off and on, alternating which state goes first.
+    :return: {"off": [...], "on": [...]} with the result of every run, in run order.
+    """
+    times = {"off": [], "on": []}
+    for run in range(runs):
+        for state in ("off", "on") if run % 2 == 0 else ("on", "off"):
+            set_metrics(state)
+            times[state].append(function())
+    metrics.disable()
+    return times
+
+
+def median_iqr(values: list) -> tuple:
+    """
+    Returns the median and the first and third quartiles of the values.
+    """
+    first, median, third = statistics.quantiles(values, n=4, method="inclusive")
+    return median, first, third
+
+
+def call_cost(calls: int = 200_000, runs: int = 15) -> tuple:
+    """
+    Returns the median (and quartiles) of the extra time in microseconds one @metrics.timed call costs with
+    metrics on, measured over `calls` calls per run.
+    """
+    def run():
+        probe = Probe()  # Looked up after set_metrics, so it gets the current version of the method
+        call = probe.call
+        gc.disable()
+        start = time.perf_counter()
+        for _ in range(calls):
+            call()
+        elapsed = time.perf_counter() - start
+        gc.enable()
+        return elapsed / calls * 1e6
+
+    times = compare(run, runs)
+    return median_iqr([on - off for off, on in zip(times["off"], times["on"])])
+
+
+def recorded_per_round(function, operations: int) -> float:
+    """
+    Run a timing function once with metrics on and return the number of values recorded per round.
+    """
+    metrics.REGISTRY.reset()
+    metrics.enable()
+    function()
+    metrics.disable()
+    timings = metrics.REGISTRY.as_dict()["timings"]
+    return sum(timing["count"] for timing in timings.values()) / operations
+
+
+if __name__ == "__main__":
+    task_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    operations = int(sys.argv[2]) if len(sys.argv) > 2 else 20_000
+    runs = int(sys.argv[3]) if len(sys.argv) > 3 else 15
+    with tempfile.TemporaryDirectory() as directory:
+        tasks = [Task(i, f"Task {i}", "Work", "High", "2024-01-01", "2024-02-01", "Open", 0, "")
+                 for i in range(1, task_count + 1)]
+        storage = SQLiteHandler(os.path.join(directory, "bench.db"), os.path.join(directory, "none.xlsx"))
+        storage.save_data(tasks, [])
+        logic = TaskManagerLogic(storage)
+        logic.save_queue.debounce = 3600  # Nothing is written while timing
+        logic.save_queue.max_wait = 3600
+        journaled = TaskManagerLogic(JournaledStorage(ExcelHandler(os.path.join(directory, "bench.xlsx")),
+                                                      checkpoint_bytes=10**12))
+        settings = {"in memory": (lambda: mutations(logic, operations), operations),
+                    "persisted": (lambda: mutations(journaled, operations // 20, flush=True), operations // 20)}
+
+        cost, cost_first, cost_third = call_cost(runs=runs)
+        print(f"one instrumented call costs {cost:.3f} us ({cost_first:.3f}-{cost_third:.3f}) more with metrics on")
+        print(f"add+update+delete per round, median (interquartile range) of {runs} runs each:")
+        estimates = {}
+        for label, (function, rounds) in settings.items():
+            times = compare(function, runs)
+            off, off_first, off_third = median_iqr(times["off"])
+            on, on_first, on_third = median_iqr(times["on"])
+            measured = median_iqr([(on_time / off_time - 1) * 100
+                                   for off_time, on_time in zip(times["off"], times["on"])])
+            recorded = recorded_per_round(function, rounds)
+            estimates[label] = cost * recorded / off * 100
+            print(f"{label:<10} metrics off {off:8.2f} us ({off_first:.2f}-{off_third:.2f}), "
+                  f"on {on:8.2f} us ({on_first:.2f}-{on_third:.2f})")
+            print(f"{'':<10} {recorded:.1f} values recorded per round: overhead {estimates[label]:.2f}%; "
+                  f"paired runs differ by {measured[0]:+.1f}% ({measured[1]:+.1f}% to {measured[2]:+.1f}%)")
+        journaled.save_queue.close()
+
+        if estimates["persisted"] > 1.0:
+            sys.exit(f"overhead of {estimates['persisted']:.2f}% with persisted saves is above the 1% budget")
+        print(f"ok: overhead with persisted saves {estimates['persisted']:.2f}% is within the 1% budget "
+              f"(in-memory worst case {estimates['in memory']:.2f}%)")
@@ -0,0 +1,99 @@
+"""
+Time several processes hammering one shared, journaled Excel file at once.
+That no ID is handed out twice and no change is lost is checked by tests/test_multiprocess.py.
+
+Usage: python benchmarks/bench_multiprocess.py [processes] [operations]
+Each process (default 4) performs `operations` (default 200) random operations: adding tasks and subtasks,
+editing tasks (often ones other processes added), deleting its own tasks, and merging the other processes'
+changes now and then. Checkpoints are frequent, so the Excel file is rewritten many times while others write.
+The total time, the operations per second and the number of edit conflicts reported are printed.
+"""
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # Make the app modules importable
+
+from excel_handler import ExcelHandler
+from journal import JournaledStorage
+from task_manager_logic import TaskManagerLogic
+import events
+
+
+def open_logic(excel_file: str) -> TaskManagerLogic:
+    """
+    Open the shared file with small checkpoints, so snapshots are rewritten while other processes write,
+    and with a checkpoint whenever a process that wrote closes.
+    """
+    return TaskManagerLogic(JournaledStorage(ExcelHandler(excel_file), checkpoint_bytes=16 * 1024,
+                                             close_checkpoint_bytes=0))
+
+
+def worker(number: int, excel_file: str, operations: int, barrier, results):
+    rng = random.Random(number)
+    logic = open_logic(excel_file)
+    logic.save_queue.debounce = 0.01
+    conflicts = []
+    logic.events.subscribe(lambda event: conflicts.append(event) if event.kind == events.MERGE_CONFLICT else None)
+    added_tasks, added_subtasks, deleted_tasks = [], [], []
+
+    for step in range(operations):
+        choice = rng.random()
+        task_ids = logic.get_task_ids()
+        if choice < 0.45 or not task_ids:
+            task = logic.add_task({"name": f"p{number}-{step}", "category": f"P{number}", "priority": "High",
+                                   "start_date": "2024-01-01", "due_date": "2024-02-01", "status": "Open",
+                                   "progress": 0, "notes": ""})
+            added_tasks.append(task.task_id)
+        elif choice < 0.65:
+            subtask = logic.add_subtask({"task_id": rng.choice(task_ids), "name": f"p{number}-{step}",
+                                         "status": "Open", "progress": 0, "due_date": None, "completed_date": None})
+            added_subtasks.append(subtask.subtask_id)
+        elif choice < 0.85:
+            task = logic.get_task(rng.choice(task_ids))
+            data = dict(zip(task.FIELDS[1:], task.as_row()[1:]), notes=f"edited by p{number} at {step}")
+            logic.update_task(task.task_id, data)
+        elif choice < 0.92:
+            own = [task_id for task_id in added_tasks if logic.task_exists(task_id) and task_id not in deleted_tasks]
+            if own:
+                task_id = rng.choice(own)
+                logic.delete_task(task_id)
+                deleted_tasks.append(task_id)
+        else:
+            logic.flush()
+            logic.merge_remote_changes()
+
+    logic.flush()
+    barrier.wait()  # Everyone has written everything
+    logic.merge_remote_changes()
+    results.put((len(added_tasks), len(added_subtasks), len(deleted_tasks), len(conflicts)))
+    logic.close()
+
+
+if __name__ == "__main__":
+    processes = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    operations = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    with tempfile.TemporaryDirectory() as directory:
+        excel_file = os.path.join(directory, "shared.xlsx")
+        ExcelHandler(excel_file).create_excel_file()
+
+        barrier, results = multiprocessing.Barrier(processes), multiprocessing.Queue()
+        start = time.perf_counter()
+        children = [multiprocessing.Process(target=worker, args=(number, excel_file, operations, barrier, results))
+                    for number in range(processes)]
+        for child in children:
+            child.start()
+        reports = [results.get() for _ in children]
+        for child in children:
+            child.join()
+        elapsed = time.perf_counter() - start
+
+        tasks, subtasks = JournaledStorage(ExcelHandler(excel_file)).load_data()
+        added_tasks, added_subtasks, deleted, conflicts = (sum(column) for column in zip(*reports))
+        print(f"{processes} processes x {operations} operations in {elapsed:.1f} s "
+              f"({processes * operations / elapsed:.0f} operations/s)")
+        print(f"{added_tasks} tasks and {added_subtasks} subtasks added, {deleted} tasks deleted, "
+              f"{len(tasks)} tasks and {len(subtasks)} subtasks in the file; {conflicts} edit conflicts reported")
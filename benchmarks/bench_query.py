@@ -0,0 +1,86 @@
+"""
+Compare index-backed TaskQuery queries with linear scans over all tasks.
+
+Usage: python benchmarks/bench_query.py [tasks]
+`tasks` synthetic tasks (default 100,000) are added to an in-memory TaskStore with a TaskIndex attached.
+"""
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # Make the app modules importable
+
+from task_model import Task, is_completed
+from task_query import TaskIndex, TaskQuery
+from task_store import TaskStore
+
+STATUSES = ["Open", "In Progress", "Blocked", "Completed"]
+CATEGORIES = [f"Category {i}" for i in range(50)]
+PRIORITIES = ["High", "Medium", "Low"]
+START = date(2024, 1, 1)
+
+
+def build(count: int) -> TaskQuery:
+    """
+    Create a store with `count` random tasks and return a TaskQuery over it.
+    """
+    rng = random.Random(42)
+    store = TaskStore()
+    index = TaskIndex()
+    store.add_index(index)
+    for task_id in range(1, count + 1):
+        start = START + timedelta(days=rng.randrange(730))
+        store.add_task(Task(task_id, f"Task {task_id}", rng.choice(CATEGORIES), rng.choice(PRIORITIES), start,
+                            start + timedelta(days=rng.randrange(1, 90)), rng.choice(STATUSES), rng.randrange(101), ""))
+    return TaskQuery(store, index)
+
+
+def timed(function, repeat: int = 20) -> float:
+    """
+    Return the best of `repeat` runs of function, in milliseconds.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    start = time.perf_counter()
+    queries = build(count)
+    print(f"built {count} tasks with indexes in {time.perf_counter() - start:.2f} s")
+    tasks = list(queries.store.tasks)
+    week_start, week_end = date(2024, 6, 1), date(2024, 6, 7)
+    today = date(2025, 1, 1)
+
+    cases = {
+        "category + status": (
+            lambda: queries.query(category="Category 7", status="Blocked"),
+            lambda: [t for t in tasks if t.category == "Category 7" and t.status == "Blocked"],
+        ),
+        "due this week, sorted": (
+            lambda: queries.query(due_from=week_start, due_to=week_end, sort=["due_date"]),
+            lambda: sorted((t for t in tasks if week_start <= t.due_date <= week_end), key=lambda t: t.due_date),
+        ),
+        "high + due range": (
+            lambda: queries.query(priority="High", due_from=week_start, due_to=week_end),
+            lambda: [t for t in tasks if t.priority == "High" and week_start <= t.due_date <= week_end],
+        ),
+        "overdue count": (
+            lambda: queries.overdue_count(today),
+            lambda: sum(1 for t in tasks if t.due_date < today and not is_completed(t.status)),
+        ),
+        "category progress": (
+            lambda: queries.category_progress(),
+            lambda: {c: sum(t.progress for t in tasks if t.category == c) for c in CATEGORIES},
+        ),
+    }
+    print(f"{'query':<24}{'indexed':>12}{'linear scan':>14}{'speed-up':>10}")
+    for label, (indexed, linear) in cases.items():
+        indexed_ms, linear_ms = timed(indexed), timed(linear, repeat=5)
+        print(f"{label:<24}{indexed_ms:>10.3f}ms{linear_ms:>12.3f}ms{linear_ms / indexed_ms:>9.0f}x")
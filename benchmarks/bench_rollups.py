@@ -0,0 +1,155 @@
+"""
+Time the incrementally maintained rollups (rollups.py) against a brute-force recomputation.
+That the two always agree is checked by tests/test_rollups.py.
+
+Usage: python benchmarks/bench_rollups.py [tasks] [operations]
+A store with `tasks` tasks (default 100,000) and one to three subtasks each is built, then `operations`
+random mutations (default 20,000: subtask adds, updates, moves and deletes, task updates and deletes, and
+day changes) are applied through TaskManagerLogic and timed. Then the cost of one subtask update with the
+rollups is compared with recomputing every derived value from scratch, and with reading the dashboard.
+"""
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # Make the app modules importable
+
+from rollups import subtask_progress
+from storage import StorageBackend
+from task_manager_logic import TaskManagerLogic
+from task_model import Task, Subtask, is_completed
+
+STATUSES = ("Open", "In Progress", "Completed", "Done", "Blocked")
+PROGRESS = (0, 10, 25.5, 50, 100, "n/a", "")
+START = date(2024, 1, 1)
+
+
+class MemoryStorage(StorageBackend):
+    incremental = True
+
+    def __init__(self, tasks, subtasks):
+        self.tasks, self.subtasks = tasks, subtasks
+
+    def load_data(self):
+        return self.tasks, self.subtasks
+
+    def apply_changes(self, tasks, subtasks, changes):
+        pass  # Nothing is persisted; only the in-memory aggregates are timed
+
+
+def random_subtask(rng, subtask_id: int, task_id: int) -> Subtask:
+    due = START + timedelta(days=rng.randrange(120)) if rng.random() < 0.9 else "someday"
+    return Subtask(subtask_id, task_id, f"Subtask {subtask_id}", rng.choice(STATUSES), rng.choice(PROGRESS), due, None)
+
+
+def brute_force(logic, today: date) -> dict:
+    """
+    Recompute every derived value by scanning all tasks and subtasks.
+    """
+    per_task = {}
+    subtasks_by_status = {}
+    overdue_subtasks = 0
+    for subtask in logic.subtasks:
+        totals = per_task.setdefault(subtask.task_id, [0, 0, 0, 0])
+        totals[0] += 1
+        totals[2] += subtask_progress(subtask)
+        if is_completed(subtask.status):
+            totals[1] += 1
+        elif isinstance(subtask.due_date, date) and subtask.due_date < today:
+            totals[3] += 1
+            overdue_subtasks += 1
+        subtasks_by_status[subtask.status] = subtasks_by_status.get(subtask.status, 0) + 1
+
+    by_category_status, windows = {}, {"overdue": 0, "today": 0, "next_7_days": 0, "later": 0, "no_due_date": 0}
+    for task in logic.tasks:
+        statuses = by_category_status.setdefault(task.category, {})
+        statuses[task.status] = statuses.get(task.status, 0) + 1
+        if is_completed(task.status):
+            continue
+        if not isinstance(task.due_date, date):
+            windows["no_due_date"] += 1
+        elif task.due_date < today:
+            windows["overdue"] += 1
+        elif task.due_date == today:
+            windows["today"] += 1
+        elif task.due_date <= today + timedelta(days=7):
+            windows["next_7_days"] += 1
+        else:
+            windows["later"] += 1
+    rollups = {task_id: {"subtasks": totals[0], "completed_subtasks": totals[1],
+                         "progress": totals[2] / totals[0], "overdue_subtasks": totals[3]}
+               for task_id, totals in per_task.items()}
+    return {"rollups": rollups, "by_category_status": by_category_status, "due_windows": windows,
+            "subtasks_by_status": subtasks_by_status, "overdue_subtasks": overdue_subtasks}
+
+
+if __name__ == "__main__":
+    task_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    operations = int(sys.argv[2]) if len(sys.argv) > 2 else 20_000
+    rng = random.Random(1)
+    tasks, subtasks = [], []
+    for task_id in range(1, task_count + 1):
+        due = START + timedelta(days=rng.randrange(120)) if rng.random() < 0.95 else ""
+        tasks.append(Task(task_id, f"Task {task_id}", f"Category {task_id % 12}", "High", START, due,
+                          rng.choice(STATUSES), 0, ""))
+        for _ in range(rng.randrange(1, 4)):
+            subtasks.append(random_subtask(rng, len(subtasks) + 1, task_id))
+    logic = TaskManagerLogic(MemoryStorage(tasks, subtasks))
+    logic.save_queue.debounce = 3600  # Nothing to write; keep the writer out of the way
+    logic.save_queue.max_wait = 3600
+
+    today = START + timedelta(days=60)
+    start = time.perf_counter()
+    for _ in range(operations):
+        choice = rng.random()
+        task_ids = logic.store.tasks_by_id
+        if choice < 0.3:
+            task_id = rng.randrange(1, task_count + 1)
+            if task_id in task_ids:
+                logic.add_subtask({field: value for field, value in
+                                   zip(Subtask.FIELDS[1:], random_subtask(rng, 0, task_id).as_row()[1:])})
+        elif choice < 0.6:
+            subtask_id = rng.randrange(1, logic.store.next_subtask_id)
+            if subtask_id in logic.store.subtasks_by_id:
+                changes = {"status": rng.choice(STATUSES), "progress": rng.choice(PROGRESS)}
+                target = rng.randrange(1, task_count + 1)
+                if rng.random() < 0.1 and target in task_ids:
+                    changes["task_id"] = target  # Move it to another task
+                if rng.random() < 0.3:
+                    changes["due_date"] = START + timedelta(days=rng.randrange(120))
+                logic.update_subtask(subtask_id, changes)
+        elif choice < 0.75:
+            subtask_id = rng.randrange(1, logic.store.next_subtask_id)
+            if subtask_id in logic.store.subtasks_by_id:
+                logic.delete_subtask(subtask_id)
+        elif choice < 0.9:
+            task_id = rng.randrange(1, task_count + 1)
+            if task_id in task_ids:
+                logic.update_task(task_id, {"status": rng.choice(STATUSES),
+                                            "due_date": START + timedelta(days=rng.randrange(120))})
+        elif choice < 0.98:
+            task_id = rng.randrange(1, task_count + 1)
+            if task_id in task_ids:
+                logic.delete_task(task_id)
+        else:
+            today += timedelta(days=rng.choice((-3, 1, 2)))
+            logic.rollups.set_today(today)
+    elapsed = time.perf_counter() - start
+    print(f"{operations} random mutations on {task_count} tasks in {elapsed:.2f} s "
+          f"({elapsed / operations * 1e6:.1f} us each, rollups included)")
+
+    subtask_ids = list(logic.store.subtasks_by_id)[:10_000]
+    start = time.perf_counter()
+    for subtask_id in subtask_ids:
+        logic.update_subtask(subtask_id, {"progress": 40})
+    incremental = (time.perf_counter() - start) / len(subtask_ids)
+    start = time.perf_counter()
+    brute_force(logic, today)
+    recompute = time.perf_counter() - start
+    print(f"update_subtask with incremental rollups {incremental * 1e6:.1f} us; "
+          f"recomputing them from scratch {recompute * 1000:.0f} ms")
+    start = time.perf_counter()
+    logic.dashboard(today)
+    print(f"dashboard() from the maintained aggregates {(time.perf_counter() - start) * 1000:.2f} ms")
@@ -0,0 +1,153 @@
+"""
+Time the due-date scheduler (scheduler.py) against scanning every record for due dates.
+That it fires exactly the deadlines a brute-force recomputation gives is checked by tests/test_scheduler.py.
+
+Usage: python benchmarks/bench_scheduler.py [tasks] [operations]
+A store with `tasks` open tasks (default 100,000) with one subtask each, all due within the next 60 days, is
+built with a simulated clock. The cost of scheduling everything on load, of one update, of firing the due
+deadlines and of scanning all records for due dates (what polling would cost on every tick) are reported.
+Then `operations` random steps (default 50,000: task and subtask updates, completions, deletions, additions,
+and moving the clock forward) are applied through TaskManagerLogic and timed, firing the reached deadlines
+after every clock step.
+"""
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # Make the app modules importable
+
+import events
+from storage import StorageBackend
+from task_manager_logic import TaskManagerLogic
+from task_model import Task, Subtask, is_completed
+
+STATUSES = ("Open", "In Progress", "Completed", "Blocked")
+START = datetime(2024, 1, 1, 9, 30)
+
+
+class MemoryStorage(StorageBackend):
+    incremental = True
+
+    def __init__(self, tasks, subtasks):
+        self.tasks, self.subtasks = tasks, subtasks
+
+    def load_data(self):
+        return self.tasks, self.subtasks
+
+    def apply_changes(self, tasks, subtasks, changes):
+        pass  # Nothing is persisted; only the scheduler is timed
+
+
+class Clock:
+    def __init__(self, now: datetime):
+        self.now = now
+
+    def __call__(self) -> datetime:
+        return self.now
+
+
+def expected_deadline(record, lead: timedelta, now: datetime):
+    """
+    The first stage of a record's deadline after `now`, computed from scratch (None if there is none).
+    """
+    if not isinstance(record.due_date, date) or is_completed(record.status):
+        return None
+    start_of_day = datetime.combine(record.due_date, datetime.min.time())
+    for fire_at in (start_of_day - lead, start_of_day + timedelta(days=1)):
+        if fire_at > now:
+            return fire_at
+    return None
+
+
+def random_due(rng, now: datetime) -> date:
+    return (now + timedelta(days=rng.randrange(-2, 60))).date()
+
+
+if __name__ == "__main__":
+    task_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    operations = int(sys.argv[2]) if len(sys.argv) > 2 else 50_000
+    rng = random.Random(1)
+    clock = Clock(START)
+    tasks = [Task(task_id, f"Task {task_id}", "Work", "High", START.date(), random_due(rng, START), "Open", 0, "")
+             for task_id in range(1, task_count + 1)]
+    subtasks = [Subtask(task_id, task_id, f"Subtask {task_id}", "Open", 0, random_due(rng, START), None)
+                for task_id in range(1, task_count + 1)]
+
+    start = time.perf_counter()
+    logic = TaskManagerLogic(MemoryStorage(tasks, subtasks), load=False)
+    logic.deadlines.clock = clock
+    logic.load_data()
+    load_time = time.perf_counter() - start
+    logic.save_queue.debounce = 3600  # Nothing to write; keep the writer out of the way
+    logic.save_queue.max_wait = 3600
+    scheduler = logic.deadlines
+    start = time.perf_counter()
+    scheduler.clear()
+    for task in logic.tasks:
+        scheduler.task_added(task)
+    for subtask in logic.subtasks:
+        scheduler.subtask_added(subtask)
+    scheduler.rebuild()
+    schedule_time = time.perf_counter() - start
+    print(f"loaded {task_count:,} tasks and {task_count:,} subtasks in {load_time:.2f} s, "
+          f"of which {schedule_time * 1000:.0f} ms for scheduling {len(scheduler):,} pending deadlines")
+
+    task_ids = list(logic.store.tasks_by_id)[:20_000]
+    start = time.perf_counter()
+    for task_id in task_ids:
+        task = logic.store.get_task(task_id)
+        scheduler.task_removed(task)
+        scheduler.task_added(task)
+    per_update = (time.perf_counter() - start) / len(task_ids)
+    start = time.perf_counter()
+    for _ in range(10_000):
+        scheduler.next_deadline()
+    per_peek = (time.perf_counter() - start) / 10_000
+    start = time.perf_counter()
+    fired = logic.fire_deadlines(clock.now + timedelta(days=1))
+    fire_time = time.perf_counter() - start
+    start = time.perf_counter()
+    due = [task for task in logic.tasks if expected_deadline(task, scheduler.lead, clock.now) is not None] + \
+          [subtask for subtask in logic.subtasks if expected_deadline(subtask, scheduler.lead, clock.now) is not None]
+    scan_time = time.perf_counter() - start
+    print(f"reschedule one record {per_update * 1e6:.1f} us; next_deadline() {per_peek * 1e6:.2f} us; "
+          f"firing the next simulated day ({len(fired):,} deadlines) {fire_time * 1000:.1f} ms")
+    print(f"for comparison, scanning all records for due dates ({len(due):,} pending) takes "
+          f"{scan_time * 1000:.0f} ms on every polling tick")
+    clock.now += timedelta(days=1)
+
+    fired_events = []
+    logic.events.subscribe(lambda event: fired_events.append(event) if event.kind in (
+        events.DEADLINE_REMINDER, events.DEADLINE_OVERDUE) else None)
+    start = time.perf_counter()
+    for _ in range(operations):
+        choice = rng.random()
+        if choice < 0.35:
+            task_id = rng.randrange(1, logic.store.next_task_id)
+            if logic.task_exists(task_id):
+                logic.update_task(task_id, {"due_date": random_due(rng, clock.now), "status": rng.choice(STATUSES)})
+        elif choice < 0.6:
+            subtask_id = rng.randrange(1, logic.store.next_subtask_id)
+            if subtask_id in logic.store.subtasks_by_id:
+                logic.update_subtask(subtask_id, {"due_date": random_due(rng, clock.now),
+                                                  "status": rng.choice(STATUSES)})
+        elif choice < 0.7:
+            task_id = rng.randrange(1, logic.store.next_task_id)
+            if logic.task_exists(task_id):
+                logic.delete_task(task_id)
+        elif choice < 0.8:
+            logic.add_task({"name": "New", "category": "Work", "priority": "Low", "start_date": clock.now.date(),
+                            "due_date": random_due(rng, clock.now), "status": "Open", "progress": 0, "notes": ""})
+        elif choice < 0.85:
+            subtask_id = rng.randrange(1, logic.store.next_subtask_id)
+            if subtask_id in logic.store.subtasks_by_id:
+                logic.delete_subtask(subtask_id)
+        else:
+            clock.now += timedelta(minutes=rng.randrange(1, 30))
+            logic.fire_deadlines(clock.now)
+    elapsed = time.perf_counter() - start
+    print(f"{operations:,} random steps over {(clock.now - START).days} simulated days in {elapsed:.2f} s "
+          f"({len(fired_events):,} reminder/overdue events fired, {len(scheduler):,} deadlines pending, "
+          f"{scheduler.stale:,} stale heap entries)")
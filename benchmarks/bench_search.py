@@ -0,0 +1,148 @@
+"""
+Time the full-text search index (search_index.py) against a substring scan, and its upkeep on mutations.
+That searches find the same tasks as a scan of every record is checked by tests/test_search_index.py.
+
+Usage: python benchmarks/bench_search.py [tasks] [operations]
+A store with `tasks` tasks (default 250,000) and as many subtasks, i.e. 500,000 records, is built from a
+vocabulary of 20,000 made-up words with a few common ones, so some words match many tasks and most match few.
+Typical searches are timed: the index lookup alone (SearchIndex.search) and the full TaskManagerLogic.search
+that returns the Task objects in ID order, next to the substring scan a search without the index would need.
+Then `operations` random mutations (default 20,000: task and subtask updates, adds and deletes) are applied
+through TaskManagerLogic and timed, index upkeep included.
+"""
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # Make the app modules importable
+
+from storage import StorageBackend
+from task_manager_logic import TaskManagerLogic
+from task_model import Task, Subtask
+
+COMMON = ("review", "report", "meeting", "draft", "update", "plan", "fix", "client", "budget", "design")
+
+
+class MemoryStorage(StorageBackend):
+    incremental = True
+
+    def __init__(self, tasks, subtasks):
+        self.tasks, self.subtasks = tasks, subtasks
+
+    def load_data(self):
+        return self.tasks, self.subtasks
+
+    def apply_changes(self, tasks, subtasks, changes):
+        pass  # Nothing is persisted; only the index is timed
+
+
+def make_vocabulary(rng, size: int) -> list[str]:
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randrange(3, 10))))
+    return sorted(words)
+
+
+def phrase(rng, vocabulary: list[str], words: int) -> str:
+    """
+    A text of a few words: common words often, then rarer ones (roughly Zipf-distributed).
+    """
+    chosen = []
+    for _ in range(words):
+        if rng.random() < 0.3:
+            chosen.append(rng.choice(COMMON).capitalize())
+        else:
+            chosen.append(vocabulary[min(int(rng.paretovariate(1.0)) - 1, len(vocabulary) - 1)
+                                     if rng.random() < 0.5 else rng.randrange(len(vocabulary))])
+    return " ".join(chosen)
+
+
+def timed_ms(function, repeat: int = 20) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+if __name__ == "__main__":
+    task_count = int(sys.argv[1]) if len(sys.argv) > 1 else 250_000
+    operations = int(sys.argv[2]) if len(sys.argv) > 2 else 20_000
+    rng = random.Random(1)
+    vocabulary = make_vocabulary(rng, 20_000)
+    tasks = [Task(task_id, phrase(rng, vocabulary, 3), "Work", "High", "2024-01-01", "2024-02-01", "Open", 0,
+                  phrase(rng, vocabulary, 6) if rng.random() < 0.5 else "") for task_id in range(1, task_count + 1)]
+    subtasks = [Subtask(subtask_id, rng.randrange(1, task_count + 1), phrase(rng, vocabulary, 2), "Open", 0, "", None)
+                for subtask_id in range(1, task_count + 1)]
+
+    start = time.perf_counter()
+    logic = TaskManagerLogic(MemoryStorage(tasks, subtasks))
+    load_time = time.perf_counter() - start
+    logic.save_queue.debounce = 3600  # Nothing to write; keep the writer out of the way
+    logic.save_queue.max_wait = 3600
+    index = logic.search_index
+    start = time.perf_counter()
+    index.clear()
+    for task in logic.tasks:
+        index.task_added(task)
+    for subtask in logic.subtasks:
+        index.subtask_added(subtask)
+    index.ensure_sorted()
+    index_time = time.perf_counter() - start
+    print(f"{task_count:,} tasks and {task_count:,} subtasks loaded in {load_time:.2f} s, of which "
+          f"{index_time:.2f} s for indexing {len(index.postings):,} words")
+
+    rare, common = vocabulary[5000], "review"
+    searches = (("rare word", rare), ("common word", common), ("prefix, 1 letter", rare[:1]),
+                ("prefix, 2 letters", rare[:2]), ("prefix, 3 letters", rare[:3]), ("two words", f"{rare} {common}"),
+                ("two prefixes", f"{rare[:3]} rev"), ("no match", "zzzzzzzzzz"))
+    print(f"{'search':<20}{'tasks':>9}{'index':>11}{'logic.search':>15}{'substring scan':>17}")
+    records = [(task.task_id, f"{task.name} {task.notes}".lower()) for task in logic.tasks] + \
+              [(subtask.task_id, subtask.name.lower()) for subtask in logic.subtasks]
+    for label, text in searches:
+        found = len(index.search(text))
+        index_ms = timed_ms(lambda: index.search(text))
+        logic_ms = timed_ms(lambda: logic.search(text))
+        terms = text.lower().split()
+        scan_ms = timed_ms(lambda: {task_id for task_id, value in records if all(term in value for term in terms)},
+                           repeat=2)
+        print(f"{label:<20}{found:>9,}{index_ms:>8.2f} ms{logic_ms:>12.2f} ms{scan_ms:>14.0f} ms")
+
+    start = time.perf_counter()
+    for _ in range(operations):
+        choice = rng.random()
+        if choice < 0.3:
+            task_id = rng.randrange(1, logic.store.next_task_id)
+            if logic.task_exists(task_id):
+                logic.update_task(task_id, {"name": phrase(rng, vocabulary, 3), "notes": phrase(rng, vocabulary, 4)})
+        elif choice < 0.55:
+            subtask_id = rng.randrange(1, logic.store.next_subtask_id)
+            if subtask_id in logic.store.subtasks_by_id:
+                changes = {"name": phrase(rng, vocabulary, 2)}
+                target = rng.randrange(1, logic.store.next_task_id)
+                if rng.random() < 0.2 and logic.task_exists(target):
+                    changes["task_id"] = target  # Move it to another task
+                logic.update_subtask(subtask_id, changes)
+        elif choice < 0.7:
+            logic.add_task({"name": phrase(rng, vocabulary, 3), "category": "Work", "priority": "Low",
+                            "start_date": "2024-01-01", "due_date": "2024-02-01", "status": "Open", "progress": 0,
+                            "notes": phrase(rng, vocabulary, 3)})
+        elif choice < 0.8:
+            task_id = rng.randrange(1, logic.store.next_task_id)
+            if logic.task_exists(task_id):
+                logic.add_subtask({"task_id": task_id, "name": phrase(rng, vocabulary, 2), "status": "Open",
+                                   "progress": 0, "due_date": "", "completed_date": ""})
+        elif choice < 0.9:
+            task_id = rng.randrange(1, logic.store.next_task_id)
+            if logic.task_exists(task_id):
+                logic.delete_task(task_id)
+        else:
+            subtask_id = rng.randrange(1, logic.store.next_subtask_id)
+            if subtask_id in logic.store.subtasks_by_id:
+                logic.delete_subtask(subtask_id)
+    elapsed = time.perf_counter() - start
+    print(f"{operations:,} random mutations in {elapsed:.2f} s ({elapsed / operations * 1e6:.1f} us each, "
+          f"index upkeep included)")
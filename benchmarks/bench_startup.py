@@ -0,0 +1,50 @@
+"""
+Measure how long the headless CLI takes to start, run a command and exit.
+
+Usage: python benchmarks/bench_startup.py [runs]
+Each command is run `runs` times (default 10) in a fresh interpreter against small data files in a
+temporary directory, and the median and best wall times are printed.
+"""
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # Directory containing the app modules
+
+
+def time_command(arguments: list, directory: str, runs: int) -> list:
+    """
+    Run a command `runs` times and return the wall time of each run in seconds.
+    """
+    environment = dict(os.environ, PYTHONPATH=ROOT)
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(arguments, cwd=directory, env=environment, check=True, stdout=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+if __name__ == "__main__":
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    with tempfile.TemporaryDirectory() as directory:
+        shutil.copy(os.path.join(ROOT, "task_manager_data.xlsx"), directory)  # Small sample workbook
+        python = sys.executable
+        subprocess.run([python, "-m", "cli", "--storage", "sqlite", "list", "tasks"], cwd=directory,
+                       env=dict(os.environ, PYTHONPATH=ROOT), check=True, stdout=subprocess.DEVNULL)  # Create the db
+
+        commands = {
+            "python (empty)": [python, "-c", "pass"],
+            "import tkinter": [python, "-c", "import tkinter"],
+            "cli --help": [python, "-m", "cli", "--help"],
+            "cli list (sqlite)": [python, "-m", "cli", "--storage", "sqlite", "list", "tasks"],
+            "cli query (sqlite)": [python, "-m", "cli", "--storage", "sqlite", "query", "--sort", "due_date"],
+            "cli list (excel)": [python, "-m", "cli", "list", "tasks"],
+        }
+        for label, arguments in commands.items():
+            times = time_command(arguments, directory, runs)
+            print(f"{label:<20} median {statistics.median(times) * 1000:7.1f} ms  best {min(times) * 1000:7.1f} ms")
@@ -0,0 +1,427 @@
+"""
+Benchmark suite: time the main operations of the app on synthetic datasets of several sizes and compare runs.
+
+Usage:
+    python benchmarks/bench_suite.py run [--sizes 1k,10k,100k,1M] [--repeat 3] [--output bench_results.json]
+                                         [--data-dir DIR] [--subtasks 1] [--only load,save] [--timeout 3600]
+    python benchmarks/bench_suite.py compare baseline.json candidate.json [--threshold 0.20]
+
+`run` generates one workbook per size with generate_dataset.py (kept in --data-dir and reused if given,
+otherwise in a temporary directory) and runs every benchmark below on it. Each benchmark runs in its own
+process, so its peak memory (the peak resident size of that process, data loading included) is not
+inflated by the others, and a benchmark that runs out of time or memory is recorded as an error
+instead of stopping the suite. Results are written to a JSON file:
+    {"meta": {...}, "results": {"10k": {"load": {"seconds": median, "best": fastest, "runs": [...], "ops": n,
+                                                 "peak_mib": m}}}}
+
+`compare` prints both runs side by side and flags every benchmark whose best time or peak memory grew
+by more than the threshold (default 20%, ignoring changes under a millisecond). The best of several
+samples is compared because it is least affected by other activity on the machine (disk flushes,
+background processes); use a higher --repeat for steadier numbers. It exits with status 1
+if anything regressed, so it can gate a CI job.
+
+Benchmarks (each `run` is one timed sample; `ops` is the number of operations in a sample):
+    load                ExcelHandler.load_data, parsing the workbook (no cache)
+    load_cached         ExcelHandler.load_data from the sidecar cache
+    save                ExcelHandler.save_data of the whole dataset
+    logic_add           TaskManagerLogic.add_task x 1000, then flush (journaled Excel storage)
+    logic_delete        TaskManagerLogic.delete_task x 1000, then flush
+    id_allocation       TaskStore.allocate_task_id x 10000 (ID blocks reserved through the shared ID file)
+    view_build          TaskView construction, rendering every task row
+    view_refresh        TaskView.refresh_task_table after 1% of the tasks changed
+    view_build_paged    TaskView construction with page_size=50
+    view_refresh_paged  TaskView.refresh_task_table with page_size=50 after 1% of the tasks changed
+    load_subtasks       TaskView.load_subtasks x 1000 tasks
+The view benchmarks use a withdrawn Tk window. Without a display (e.g. on a CI server, unless run under
+Xvfb) they are recorded as skipped.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # Directory containing the app modules
+sys.path.insert(0, ROOT)  # Make the app modules importable
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))  # Make generate_dataset importable
+
+OPERATIONS = 1000  # Operations per sample for the logic and subtask benchmarks
+BENCHMARKS = {}  # Benchmark name -> function(workbook, directory, repeat) returning (durations, ops)
+
+
+class Skipped(Exception):
+    """
+    Raised by a benchmark that cannot run in this environment (e.g. no display for Tk).
+    """
+
+
+def benchmark(function):
+    """
+    Register a benchmark function under its name.
+    """
+    BENCHMARKS[function.__name__] = function
+    return function
+
+
+def parse_size(text: str) -> int:
+    """
+    Convert a size label such as 1k, 10k or 1M into a number of rows.
+    """
+    multipliers = {"k": 1_000, "m": 1_000_000}
+    suffix = text[-1].lower()
+    return int(float(text[:-1]) * multipliers[suffix]) if suffix in multipliers else int(text)
+
+
+def peak_memory_mib():
+    """
+    Returns the peak resident memory of this process in MiB, or None where the resource module is missing.
+    """
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10  # Bytes on macOS, KiB on Linux
+
+
+def timed(function) -> float:
+    """
+    Call a function and return its wall time in seconds.
+    """
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def copy_dataset(workbook: str, directory: str) -> str:
+    """
+    Copy a workbook (and its cache, if any) into a directory, so a benchmark can modify it.
+    """
+    copy = os.path.join(directory, os.path.basename(workbook))
+    shutil.copy2(workbook, copy)  # copy2 keeps the modification time, which is part of the cache key
+    if os.path.exists(workbook + ".cache"):
+        shutil.copy2(workbook + ".cache", copy + ".cache")
+    return copy
+
+
+def open_logic(workbook: str, directory: str):
+    """
+    Open a copy of the workbook the way the app does (journaled Excel storage), without checkpoints.
+    """
+    from excel_handler import ExcelHandler
+    from journal import JournaledStorage
+    from task_manager_logic import TaskManagerLogic
+    return TaskManagerLogic(JournaledStorage(ExcelHandler(copy_dataset(workbook, directory)), checkpoint_bytes=10**12))
+
+
+def open_view(logic, page_size: int = None):
+    """
+    Create a TaskView in a withdrawn Tk window.
+    :return: (root, view, seconds taken to build the view).
+    :raises Skipped: If Tk cannot open a display.
+    """
+    import tkinter as tk
+    from tkinter import ttk
+    from task_view import TaskView
+    try:
+        root = tk.Tk()
+    except tk.TclError as error:
+        raise Skipped(f"Tk is not available: {error}")
+    root.withdraw()
+    notebook = ttk.Notebook(root)
+    notebook.pack()
+    start = time.perf_counter()
+    view = TaskView(notebook, logic, page_size)
+    root.update_idletasks()
+    return root, view, time.perf_counter() - start
+
+
+def change_tasks(logic, rng: random.Random):
+    """
+    Update the notes of 1% of the tasks (at least one), as a user or another process would.
+    """
+    task_ids = logic.get_task_ids()
+    for task_id in rng.sample(task_ids, max(1, len(task_ids) // 100)):
+        logic.update_task(task_id, {"notes": f"changed {rng.random()}"})
+    logic.flush()  # Do not let the background save overlap the timed refresh
+
+
+@benchmark
+def load(workbook, directory, repeat):
+    from excel_handler import ExcelHandler
+    return [timed(ExcelHandler(workbook, cache=False).load_data) for _ in range(repeat)], 1
+
+
+@benchmark
+def load_cached(workbook, directory, repeat):
+    from excel_handler import ExcelHandler
+    handler = ExcelHandler(copy_dataset(workbook, directory))
+    handler.load_data()  # Writes the cache if the dataset did not have one yet
+    return [timed(handler.load_data) for _ in range(repeat)], 1
+
+
+@benchmark
+def save(workbook, directory, repeat):
+    from excel_handler import ExcelHandler
+    handler = ExcelHandler(copy_dataset(workbook, directory), cache=False)
+    tasks, subtasks = ExcelHandler(workbook).load_data()
+    return [timed(lambda: handler.save_data(tasks, subtasks)) for _ in range(repeat)], 1
+
+
+@benchmark
+def logic_add(workbook, directory, repeat):
+    logic = open_logic(workbook, directory)
+    data = {"name": "Benchmark", "category": "Category 0", "priority": "High", "start_date": "2024-01-01",
+            "due_date": "2024-02-01", "status": "Open", "progress": 0, "notes": ""}
+
+    def add():
+        for _ in range(OPERATIONS):
+            logic.add_task(data)
+        logic.flush()
+
+    durations = [timed(add) for _ in range(repeat)]
+    logic.save_queue.close()
+    return durations, OPERATIONS
+
+
+@benchmark
+def logic_delete(workbook, directory, repeat):
+    logic = open_logic(workbook, directory)
+    victims = random.Random(0).sample(logic.get_task_ids(), min(len(logic.get_task_ids()), OPERATIONS * repeat))
+
+    def delete(task_ids):
+        for task_id in task_ids:
+            logic.delete_task(task_id)
+        logic.flush()
+
+    durations = [timed(lambda: delete(victims[run::repeat])) for run in range(repeat)]
+    logic.save_queue.close()
+    return durations, len(victims) // repeat
+
+
+@benchmark
+def id_allocation(workbook, directory, repeat):
+    logic = open_logic(workbook, directory)
+
+    def allocate():
+        for _ in range(OPERATIONS * 10):
+            logic.store.allocate_task_id()
+
+    durations = [timed(allocate) for _ in range(repeat)]
+    logic.save_queue.close()
+    return durations, OPERATIONS * 10
+
+
+def view_build_benchmark(workbook, directory, repeat, page_size):
+    logic = open_logic(workbook, directory)
+    durations = []
+    for _ in range(repeat):
+        root, view, seconds = open_view(logic, page_size)
+        durations.append(seconds)
+        root.destroy()
+    logic.save_queue.close()
+    return durations, 1
+
+
+def view_refresh_benchmark(workbook, directory, repeat, page_size):
+    logic = open_logic(workbook, directory)
+    root, view, _ = open_view(logic, page_size)
+    rng = random.Random(0)
+    durations = []
+    for _ in range(repeat):
+        change_tasks(logic, rng)
+        durations.append(timed(lambda: (view.refresh_task_table(), root.update_idletasks())))
+    root.destroy()
+    logic.save_queue.close()
+    return durations, 1
+
+
+@benchmark
+def view_build(workbook, directory, repeat):
+    return view_build_benchmark(workbook, directory, repeat, None)
+
+
+@benchmark
+def view_refresh(workbook, directory, repeat):
+    return view_refresh_benchmark(workbook, directory, repeat, None)
+
+
+@benchmark
+def view_build_paged(workbook, directory, repeat):
+    return view_build_benchmark(workbook, directory, repeat, 50)
+
+
+@benchmark
+def view_refresh_paged(workbook, directory, repeat):
+    return view_refresh_benchmark(workbook, directory, repeat, 50)
+
+
+@benchmark
+def load_subtasks(workbook, directory, repeat):
+    logic = open_logic(workbook, directory)
+    root, view, _ = open_view(logic, 50)
+    rng = random.Random(0)
+    task_ids = logic.get_task_ids()
+
+    def show():
+        for task_id in rng.choices(task_ids, k=OPERATIONS):
+            view.load_subtasks(task_id)
+        root.update_idletasks()
+
+    durations = [timed(show) for _ in range(repeat)]
+    root.destroy()
+    logic.save_queue.close()
+    return durations, OPERATIONS
+
+
+def run_child(name: str, workbook: str, repeat: int) -> dict:
+    """
+    Run one benchmark in this process and return its result entry.
+    """
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(workbook))) as directory:
+        try:
+            durations, ops = BENCHMARKS[name](workbook, directory, repeat)
+        except Skipped as reason:
+            return {"skipped": str(reason)}
+    return {"seconds": statistics.median(durations), "best": min(durations), "runs": durations, "ops": ops, "peak_mib": peak_memory_mib()}
+
+
+def run_benchmark(name: str, workbook: str, repeat: int, timeout: float) -> dict:
+    """
+    Run one benchmark in a fresh process and return its result entry (or an error entry).
+    """
+    arguments = [sys.executable, os.path.abspath(__file__), "child", name, workbook, str(repeat)]
+    try:
+        child = subprocess.run(arguments, capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return {"error": f"timed out after {timeout:.0f} s"}
+    if child.returncode != 0:
+        lines = child.stderr.strip().splitlines() or [f"exit status {child.returncode}"]
+        return {"error": lines[-1]}  # E.g. the exception message, or the signal that killed it (out of memory)
+    return json.loads(child.stdout.strip().splitlines()[-1])
+
+
+def describe(entry: dict) -> str:
+    """
+    Format a result entry for the console.
+    """
+    if "skipped" in entry:
+        return f"skipped ({entry['skipped']})"
+    if "error" in entry:
+        return f"error: {entry['error']}"
+    memory = f"{entry['peak_mib']:9.1f} MiB" if entry.get("peak_mib") is not None else ""
+    return f"{entry['seconds'] * 1000:12.2f} ms {memory}"
+
+
+def git_revision():
+    """
+    Returns the current git commit of the app, or None outside a git checkout.
+    """
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def command_run(args) -> int:
+    from generate_dataset import write_workbook
+    names = args.only.split(",") if args.only else list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        print(f"unknown benchmarks: {', '.join(unknown)} (choose from {', '.join(BENCHMARKS)})", file=sys.stderr)
+        return 2
+    report = {"meta": {"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "revision": git_revision(),
+                       "python": platform.python_version(), "platform": platform.platform(),
+                       "repeat": args.repeat, "subtasks_per_task": args.subtasks, "seed": args.seed},
+              "results": {}}
+    data_dir = args.data_dir or tempfile.mkdtemp(prefix="bench_suite.")
+    os.makedirs(data_dir, exist_ok=True)
+    try:
+        for label in args.sizes.split(","):
+            rows = parse_size(label)
+            workbook = os.path.join(data_dir, f"tasks-{rows}-{args.subtasks:g}-{args.seed}.xlsx")
+            if not os.path.exists(workbook):
+                print(f"{label}: generating {rows} tasks...", flush=True)
+                write_workbook(workbook, rows, args.subtasks, args.seed)
+            results = report["results"][label] = {}
+            for name in names:
+                results[name] = run_benchmark(name, workbook, args.repeat, args.timeout)
+                print(f"{label:>6} {name:<20}{describe(results[name])}", flush=True)
+                with open(args.output, "w") as file:  # Written after every benchmark, so a long run can be inspected
+                    json.dump(report, file, indent=2)
+    finally:
+        if not args.data_dir:
+            shutil.rmtree(data_dir, ignore_errors=True)
+    print(f"results written to {args.output}")
+    return 0
+
+
+def command_compare(args) -> int:
+    with open(args.baseline) as file:
+        baseline = json.load(file)["results"]
+    with open(args.candidate) as file:
+        candidate = json.load(file)["results"]
+    regressions = 0
+    print(f"{'size':>6} {'benchmark':<20}{'base best ms':>14}{'cand best ms':>14}{'change':>9}"
+          f"{'base MiB':>10}{'cand MiB':>10}")
+    for label, results in candidate.items():
+        for name, new in results.items():
+            old = baseline.get(label, {}).get(name)
+            if old is None or "seconds" not in old or "seconds" not in new:
+                continue
+            old_seconds, new_seconds = old.get("best", old["seconds"]), new.get("best", new["seconds"])
+            change = new_seconds / old_seconds - 1 if old_seconds else 0
+            flags = []
+            if change > args.threshold and new_seconds - old_seconds > 0.001:
+                flags.append("SLOWER")
+            old_memory, new_memory = old.get("peak_mib"), new.get("peak_mib")
+            if old_memory and new_memory and new_memory / old_memory - 1 > args.threshold:
+                flags.append("MORE MEMORY")
+            regressions += bool(flags)
+            memory = (f"{old_memory:10.1f}{new_memory:10.1f}" if old_memory and new_memory else f"{'':>20}")
+            print(f"{label:>6} {name:<20}{old_seconds * 1000:14.2f}{new_seconds * 1000:14.2f}"
+                  f"{change * 100:+8.1f}%{memory}  {' '.join(flags)}")
+    print(f"{regressions} regression(s) above {args.threshold * 100:.0f}%")
+    return 1 if regressions else 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Run or compare the benchmark suite")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="run the benchmarks and write a JSON report")
+    run_parser.add_argument("--sizes", default="1k,10k,100k,1M", help="comma-separated dataset sizes (tasks)")
+    run_parser.add_argument("--repeat", type=int, default=3, help="timed samples per benchmark")
+    run_parser.add_argument("--output", default="bench_results.json")
+    run_parser.add_argument("--data-dir", help="keep the generated workbooks here and reuse them")
+    run_parser.add_argument("--subtasks", type=float, default=1, help="average number of subtasks per task")
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--only", help="comma-separated benchmark names to run")
+    run_parser.add_argument("--timeout", type=float, default=3600, help="seconds allowed per benchmark")
+    run_parser.set_defaults(handler=command_run)
+
+    compare_parser = subparsers.add_parser("compare", help="compare two reports and flag regressions")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("candidate")
+    compare_parser.add_argument("--threshold", type=float, default=0.20, help="allowed relative growth")
+    compare_parser.set_defaults(handler=command_compare)
+
+    child_parser = subparsers.add_parser("child", help="(internal) run one benchmark in this process")
+    child_parser.add_argument("name", choices=list(BENCHMARKS))
+    child_parser.add_argument("workbook")
+    child_parser.add_argument("repeat", type=int)
+    child_parser.set_defaults(handler=lambda args: print(json.dumps(run_child(args.name, args.workbook,
+                                                                              args.repeat))) or 0)
+    return parser
+
+
+if __name__ == "__main__":
+    arguments = build_parser().parse_args()
+    sys.exit(arguments.handler(arguments))
@@ -0,0 +1,84 @@
+"""
+Generate synthetic task workbooks in the exact format ExcelHandler reads and writes.
+
+Usage: python benchmarks/generate_dataset.py rows path [--subtasks N] [--seed S]
+Writes `rows` tasks to the 'Main Tasks' sheet and on average N subtasks per task (default 1) to the
+'Subtasks' sheet of a new workbook at `path`. Rows are built as Task/Subtask objects and written with
+as_row(), so cell types (dates, whole-number progress) match what ExcelHandler.save_data produces.
+Values are varied (20 categories, all priorities and statuses, dates spread over two years, notes of
+different lengths) so indexes and queries see a realistic distribution. The same seed gives the same file.
+"""
+import argparse
+import os
+import random
+import sys
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # Make the app modules importable
+
+from excel_handler import TASK_HEADERS, SUBTASK_HEADERS
+from task_model import Task, Subtask
+
+CATEGORIES = [f"Category {number}" for number in range(20)]
+PRIORITIES = ("High", "Medium", "Low")
+STATUSES = ("Open", "In Progress", "Blocked", "Completed")
+FIRST_DAY = date(2024, 1, 1)  # Start dates are spread over the two years from this day
+NOTES = "Synthetic notes for benchmarking the task manager with large workbooks. "
+
+
+def generate_records(rows: int, subtasks_per_task: float = 1, seed: int = 0):
+    """
+    Yield ("task", Task) and ("subtask", Subtask) pairs for a synthetic dataset.
+    Tasks come first in ID order, then subtasks in ID order, each pointing at a random task.
+    """
+    rng = random.Random(seed)
+    due_dates = {}  # Task ID -> due date, so subtasks are due before their task
+    for task_id in range(1, rows + 1):
+        start = FIRST_DAY + timedelta(days=rng.randrange(730))
+        due = start + timedelta(days=rng.randrange(1, 120))
+        status = rng.choice(STATUSES)
+        progress = 100 if status == "Completed" else rng.randrange(0, 100, 5)
+        due_dates[task_id] = due
+        yield "task", Task(task_id, f"Task {task_id}", rng.choice(CATEGORIES), rng.choice(PRIORITIES), start, due,
+                           status, progress, NOTES[:rng.randrange(len(NOTES))])
+    for subtask_id in range(1, round(rows * subtasks_per_task) + 1):
+        task_id = rng.randrange(1, rows + 1)
+        due = due_dates[task_id] - timedelta(days=rng.randrange(30))
+        status = rng.choice(STATUSES)
+        completed = due - timedelta(days=rng.randrange(10)) if status == "Completed" else None
+        progress = 100 if status == "Completed" else rng.randrange(0, 100, 10)
+        yield "subtask", Subtask(subtask_id, task_id, f"Subtask {subtask_id}", status, progress, due, completed)
+
+
+def write_workbook(path: str, rows: int, subtasks_per_task: float = 1, seed: int = 0):
+    """
+    Write a synthetic workbook with `rows` tasks and about `rows * subtasks_per_task` subtasks.
+    The workbook is written in openpyxl's write-only mode, so even a million rows fit in little memory.
+    """
+    import openpyxl
+    workbook = openpyxl.Workbook(write_only=True)
+    main_task_sheet = workbook.create_sheet("Main Tasks")
+    main_task_sheet.append(TASK_HEADERS)
+    subtask_sheet = None
+    for kind, record in generate_records(rows, subtasks_per_task, seed):
+        if kind == "task":
+            main_task_sheet.append(record.as_row())
+        else:
+            if subtask_sheet is None:
+                subtask_sheet = workbook.create_sheet("Subtasks")  # Write-only sheets are filled one at a time
+                subtask_sheet.append(SUBTASK_HEADERS)
+            subtask_sheet.append(record.as_row())
+    if subtask_sheet is None:
+        workbook.create_sheet("Subtasks").append(SUBTASK_HEADERS)
+    workbook.save(path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic task workbook")
+    parser.add_argument("rows", type=int, help="number of tasks")
+    parser.add_argument("path", help="workbook to create (.xlsx)")
+    parser.add_argument("--subtasks", type=float, default=1, help="average number of subtasks per task")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    write_workbook(args.path, args.rows, args.subtasks, args.seed)
+    print(f"wrote {args.rows} tasks and {round(args.rows * args.subtasks)} subtasks to {args.path}")
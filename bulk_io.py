@@ -0,0 +1,151 @@
+import csv  # Import csv for reading and writing CSV files
+import json  # Import json for reading and writing JSON / JSON Lines files
+import os
+from datetime import date  # Import date so parsed date fields can be written as ISO text
+from itertools import islice  # Import islice to cut record streams into batches
+
+
+def detect_format(path: str) -> str:
+    """
+    Work out the file format from the file extension.
+    :param path: Path of the file.
+    :return: "csv", "jsonl" (one JSON object per line) or "json" (a JSON array of objects).
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        return "csv"
+    if extension in (".jsonl", ".ndjson"):
+        return "jsonl"
+    if extension == ".json":
+        return "json"
+    raise ValueError(f"unsupported file type {extension!r} (use .csv, .json, .jsonl or .ndjson)")
+
+
+def read_records(path: str, file_format: str = None):
+    """
+    Stream records (dictionaries) from a CSV, JSON or JSON Lines file.
+    Records are read one at a time, so memory use does not depend on the file size.
+    :param path: Path of the file to read.
+    :param file_format: "csv", "json" or "jsonl"; detected from the extension if None.
+    :return: A generator of dictionaries.
+    """
+    file_format = file_format or detect_format(path)
+    with open(path, newline="" if file_format == "csv" else None, encoding="utf-8") as file:
+        if file_format == "csv":
+            yield from csv.DictReader(file)
+        elif file_format == "jsonl":
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from _iter_json_array(file)
+
+
+def _iter_json_array(file, chunk_size: int = 1 << 16):
+    """
+    Stream the objects of a top-level JSON array without loading the whole file.
+    The file is read in chunks and each element is decoded as soon as it is complete.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    started = False
+    while True:
+        # Skip whitespace and separators, reading more data when the buffer runs out
+        while True:
+            while position < len(buffer) and buffer[position] in " \t\r\n,":
+                position += 1
+            if position < len(buffer):
+                break
+            chunk = file.read(chunk_size)
+            if not chunk:
+                if not started:
+                    raise ValueError("expected a JSON array")
+                raise ValueError("unterminated JSON array")
+            buffer, position = buffer[position:] + chunk, 0
+
+        if not started:
+            if buffer[position] != "[":
+                raise ValueError("expected a JSON array")
+            started = True
+            position += 1
+            continue
+        if buffer[position] == "]":
+            return
+
+        # Decode the next element, reading more data if it is not complete yet
+        while True:
+            try:
+                record, end = decoder.raw_decode(buffer, position)
+                break
+            except json.JSONDecodeError:
+                chunk = file.read(chunk_size)
+                if not chunk:
+                    raise
+                buffer, position = buffer[position:] + chunk, 0
+        yield record
+        position = end
+
+
+def iter_batches(records, batch_size: int):
+    """
+    Group a stream of records into lists of at most batch_size records.
+    """
+    records = iter(records)
+    while True:
+        batch = list(islice(records, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def json_value(value):
+    """
+    Convert a record value into something JSON can store (dates become ISO strings).
+    """
+    return value.isoformat() if isinstance(value, date) else value
+
+
+def write_records(path: str, fields: tuple, rows, file_format: str = None) -> int:
+    """
+    Stream rows to a CSV, JSON or JSON Lines file, one row at a time.
+    :param path: Path of the file to create or overwrite.
+    :param fields: Field names, in the same order as the values of each row.
+    :param rows: Iterable of row tuples (e.g. Task.as_row()).
+    :param file_format: "csv", "json" or "jsonl"; detected from the extension if None.
+    :return: The number of rows written.
+    """
+    file_format = file_format or detect_format(path)
+    with open(path, "w", newline="" if file_format == "csv" else None, encoding="utf-8") as file:
+        return write_rows(file, fields, rows, file_format)
+
+
+def write_rows(file, fields: tuple, rows, file_format: str) -> int:
+    """
+    Stream rows to an open text file (e.g. sys.stdout) as CSV, JSON or JSON Lines.
+    :param file: The file object to write to.
+    :param fields: Field names, in the same order as the values of each row.
+    :param rows: Iterable of row tuples.
+    :param file_format: "csv", "json" or "jsonl".
+    :return: The number of rows written.
+    """
+    count = 0
+    if file_format == "csv":
+        writer = csv.writer(file)
+        writer.writerow(fields)
+        for row in rows:
+            writer.writerow(["" if value is None else json_value(value) for value in row])
+            count += 1
+    else:
+        if file_format == "json":
+            file.write("[\n")
+        for row in rows:
+            if file_format == "json" and count:
+                file.write(",\n")
+            file.write(json.dumps({field: json_value(value) for field, value in zip(fields, row)}))
+            if file_format == "jsonl":
+                file.write("\n")
+            count += 1
+        if file_format == "json":
+            file.write("\n]\n")
+    return count
@@ -0,0 +1,489 @@
+"""
+Command-line interface for the task manager that works without the Tkinter GUI.
+
+Usage examples:
+    python -m cli list tasks
+    python -m cli list subtasks --task-id 3 --format json
+    python -m cli add task --name "Write report" --category Work --start-date 2024-05-01 --due-date 2024-05-31
+    python -m cli add subtask --task-id 3 --name "Draft" --status Open
+    python -m cli update task 3 --status Completed --progress 100
+    python -m cli update subtask 7 --task-id 4
+    python -m cli delete task 3
+    python -m cli query --status Open --due-to 2024-06-30 --sort due_date --sort=-priority
+    python -m cli query --status Completed --due-from 2023-01-01 --due-to 2023-03-31 --archived
+    python -m cli query --text "quarterly rep" --status Open
+    python -m cli stats
+    python -m cli archive --older-than 30
+    python -m cli remind
+    python -m cli remind --watch
+    python -m cli import tasks tasks.csv
+    python -m cli import subtasks subtasks.jsonl --skip-invalid
+    python -m cli export tasks tasks.json
+    python -m cli export-excel backup.xlsx
+    python -m cli import-excel backup.xlsx
+    python -m cli serve --port 8765
+    python -m cli --metrics timings.json import tasks tasks.csv
+
+Only the modules a command needs are imported (openpyxl is only loaded when the Excel file is read or
+written), so commands start quickly and never load Tkinter.
+"""
+import argparse  # Import argparse for parsing subcommands and options
+import sys
+import time  # Import time to report rows per second
+
+# Attributes that can be given as options when adding or updating a record (Task.FIELDS and Subtask.FIELDS
+# without the ID; not imported from task_model so the parser is built without importing the app modules)
+TASK_FIELDS = ("name", "category", "priority", "start_date", "due_date", "status", "progress", "notes")
+SUBTASK_FIELDS = ("task_id", "name", "status", "progress", "due_date", "completed_date")
+
+
+def open_logic(args):
+    """
+    Create a TaskManagerLogic for the storage selected on the command line.
+    """
+    from task_manager_logic import TaskManagerLogic
+    if args.storage == "sqlite":
+        from sqlite_handler import SQLiteHandler
+        return TaskManagerLogic(SQLiteHandler(args.db, args.file))
+    from excel_handler import ExcelHandler
+    from journal import JournaledStorage
+    return TaskManagerLogic(JournaledStorage(ExcelHandler(args.file)))
+
+
+def close_logic(logic) -> bool:
+    """
+    Close the logic, waiting for the final save, and report on standard error if the changes could not be written.
+    :return: True if everything was saved.
+    """
+    if logic.close():
+        return True
+    print_save_error(logic)
+    return False
+
+
+def print_save_error(logic):
+    """
+    Print why the last save of the logic failed to standard error.
+    """
+    print(f"error: could not save changes: {logic.save_error}", file=sys.stderr)
+
+
+def print_rows(fields: tuple, rows, file_format: str) -> int:
+    """
+    Print rows to standard output as tab-separated text, CSV, JSON or JSON Lines.
+    :return: The number of rows printed.
+    """
+    if file_format != "text":
+        import bulk_io
+        return bulk_io.write_rows(sys.stdout, fields, rows, file_format)
+    print("\t".join(fields))
+    count = 0
+    for row in rows:
+        print("\t".join("" if value is None else str(value) for value in row))
+        count += 1
+    return count
+
+
+def command_list(args, logic) -> int:
+    """
+    Print all tasks, all subtasks, or the subtasks of one task.
+    """
+    from task_model import Task, Subtask
+    if args.kind == "tasks":
+        print_rows(Task.FIELDS, (task.as_row() for task in logic.tasks), args.format)
+    else:
+        subtasks = logic.subtasks if args.task_id is None else logic.get_subtasks(args.task_id)
+        print_rows(Subtask.FIELDS, (subtask.as_row() for subtask in subtasks), args.format)
+    return 0 if close_logic(logic) else 1
+
+
+def command_add(args, logic) -> int:
+    """
+    Add one task or subtask from command-line options and print its new ID.
+    """
+    fields = TASK_FIELDS if args.kind == "task" else SUBTASK_FIELDS
+    row = {field: getattr(args, field) for field in fields}
+    try:
+        if args.kind == "task":
+            record_id = logic.add_task(logic.prepare_task_data(row)).task_id
+        else:
+            record_id = logic.add_subtask(logic.prepare_subtask_data(row)).subtask_id
+    except ValueError as error:
+        close_logic(logic)
+        print(f"error: {error}", file=sys.stderr)
+        return 1
+    if not close_logic(logic):  # Wait for the save to finish before exiting
+        return 1
+    print(record_id)
+    return 0
+
+
+def command_update(args, logic) -> int:
+    """
+    Change the given attributes of one task or subtask; options that are not given keep their value.
+    """
+    fields = TASK_FIELDS if args.kind == "task" else SUBTASK_FIELDS
+    changes = {field: getattr(args, field) for field in fields if getattr(args, field) is not None}
+    try:
+        if args.kind == "task":
+            logic.update_task(args.id, changes)
+        else:
+            logic.update_subtask(args.id, changes)
+    except KeyError:
+        close_logic(logic)
+        print(f"error: {args.kind} {args.id} does not exist", file=sys.stderr)
+        return 1
+    except ValueError as error:
+        close_logic(logic)
+        print(f"error: {error}", file=sys.stderr)
+        return 1
+    return 0 if close_logic(logic) else 1
+
+
+def command_delete(args, logic) -> int:
+    """
+    Delete a task (with its subtasks) or a subtask by ID.
+    """
+    if args.kind == "task":
+        exists = logic.task_exists(args.id)
+        if exists:
+            logic.delete_task(args.id)
+    else:
+        exists = logic.store.get_subtask(args.id) is not None
+        if exists:
+            logic.delete_subtask(args.id)
+    saved = close_logic(logic)
+    if not exists:
+        print(f"error: {args.kind} {args.id} does not exist", file=sys.stderr)
+        return 1
+    return 0 if saved else 1
+
+
+def command_query(args, logic) -> int:
+    """
+    Print the tasks that match the given filters, sorted by the given fields.
+    """
+    from task_model import Task, parse_date
+    filters = {"text": args.text, "status": args.status, "category": args.category, "priority": args.priority,
+               "due_from": parse_date(args.due_from), "due_to": parse_date(args.due_to),
+               "start_from": parse_date(args.start_from), "start_to": parse_date(args.start_to),
+               "sort": args.sort, "limit": args.limit}
+    try:
+        tasks = logic.query(include_archive=args.archived, **filters)  # Answered from the secondary indexes
+    except ValueError as error:
+        close_logic(logic)
+        print(f"error: {error}", file=sys.stderr)
+        return 1
+    print_rows(Task.FIELDS, (task.as_row() for task in tasks), args.format)
+    return 0 if close_logic(logic) else 1
+
+
+def command_stats(args, logic) -> int:
+    """
+    Print task counts per status and per category, average progress per category, the overdue count,
+    open tasks per due window and subtask counts.
+    """
+    import json
+    dashboard = logic.dashboard()
+    stats = {
+        "tasks": len(logic.tasks),
+        "subtasks": len(logic.subtasks),
+        "overdue": logic.overdue_count(),
+        "by_status": logic.count_by("status"),
+        "by_category": logic.category_progress(),
+        "due_windows": dashboard["due_windows"],
+        "subtasks_by_status": dashboard["subtasks_by_status"],
+        "overdue_subtasks": dashboard["overdue_subtasks"],
+        "archived": logic.archive_stats(),
+    }
+    print(json.dumps(stats, indent=2, default=str))
+    return 0 if close_logic(logic) else 1
+
+
+def command_archive(args, logic) -> int:
+    """
+    Move completed tasks (or, with --all-statuses, all tasks) due before a date into the archive shards.
+    """
+    from datetime import date, timedelta
+    from task_model import parse_date
+    days = logic.ARCHIVE_AFTER_DAYS if args.older_than is None else args.older_than
+    before = parse_date(args.before) if args.before else date.today() - timedelta(days=days)
+    try:
+        shards = logic.archive_tasks(before, completed_only=not args.all_statuses)
+    except (RuntimeError, ValueError) as error:
+        close_logic(logic)
+        print(f"error: {error}", file=sys.stderr)
+        return 1
+    if not close_logic(logic):  # Write the deletions, so the active data file shrinks
+        return 1
+    print(f"archived {sum(shards.values())} tasks due before {before} into {len(shards)} shards "
+          f"({len(logic.tasks)} tasks left in the active data)")
+    return 0
+
+
+def deadline_line(logic, fire_at, stage: str, key: tuple) -> str:
+    """
+    Format one deadline of logic.deadlines as a tab-separated line: time, stage, record and name.
+    """
+    record, record_id = key
+    item = logic.get_task(record_id) if record == "task" else logic.store.get_subtask(record_id)
+    return f"{fire_at:%Y-%m-%d %H:%M}\t{stage}\t{record} {record_id}\t{item.name if item is not None else ''}"
+
+
+def command_remind(args, logic) -> int:
+    """
+    Print the next due-date reminders, or with --watch, print reminders and overdue records as they fall due.
+    The watcher sleeps until the earliest deadline in the scheduler's heap (waking at least every
+    --max-wait seconds to merge changes saved by other processes), so it never scans the task list.
+    """
+    from datetime import datetime
+    if not args.watch:
+        for fire_at, stage, key in logic.deadlines.upcoming(args.limit):
+            print(deadline_line(logic, fire_at, stage, key))
+        return 0 if close_logic(logic) else 1
+    import events
+    from scheduler import REMINDER, OVERDUE
+
+    def print_event(event):
+        if event.kind in (events.DEADLINE_REMINDER, events.DEADLINE_OVERDUE):
+            stage = REMINDER if event.kind == events.DEADLINE_REMINDER else OVERDUE
+            key = ("task", event.task_id) if event.subtask_id is None else ("subtask", event.subtask_id)
+            print(deadline_line(logic, datetime.now(), stage, key), flush=True)
+
+    logic.events.subscribe(print_event)
+    saved = False
+    try:
+        while True:
+            logic.fire_deadlines()
+            next_deadline = logic.deadlines.next_deadline()
+            wait = args.max_wait
+            if next_deadline is not None:
+                wait = max(0.0, min(wait, (next_deadline - datetime.now()).total_seconds()))
+            time.sleep(wait)
+            logic.merge_remote_changes()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        saved = close_logic(logic)
+    return 0 if saved else 1
+
+
+def command_import(args, logic) -> int:
+    """
+    Import tasks or subtasks from a CSV/JSON/JSON Lines file in batches, with one save for the whole import.
+    Each batch is validated before it is added; if a batch is invalid the import stops and earlier batches are kept.
+    """
+    import bulk_io
+    add_bulk = logic.add_tasks_bulk if args.kind == "tasks" else logic.add_subtasks_bulk
+    added = skipped = 0
+    saved = False
+    start = time.perf_counter()
+    try:
+        batches = bulk_io.iter_batches(bulk_io.read_records(args.path), args.batch_size)
+        for batch_number, batch in enumerate(batches):
+            try:
+                new_records, errors = add_bulk(batch, skip_invalid=args.skip_invalid,
+                                               first_row=batch_number * args.batch_size + 1)
+            except ValueError as error:
+                print(f"error: {error} ({added} records from earlier batches were imported)", file=sys.stderr)
+                return 1
+            added += len(new_records)
+            skipped += len(errors)
+            for number, message in errors:
+                print(f"skipped record {number}: {message}", file=sys.stderr)
+    finally:
+        saved = close_logic(logic)  # Persist everything that was added, in a single write
+    if not saved:
+        return 1
+    elapsed = time.perf_counter() - start
+    rate = added / elapsed if elapsed else float("inf")
+    print(f"imported {added} {args.kind} ({skipped} skipped) in {elapsed:.2f} s, {rate:,.0f} rows/s")
+    return 0
+
+
+def command_export(args, logic) -> int:
+    """
+    Export all tasks or subtasks to a CSV/JSON/JSON Lines file.
+    """
+    import bulk_io
+    from task_model import Task, Subtask
+    record_class, records = (Task, logic.tasks) if args.kind == "tasks" else (Subtask, logic.subtasks)
+    start = time.perf_counter()
+    count = bulk_io.write_records(args.path, record_class.FIELDS, (record.as_row() for record in records))
+    if not close_logic(logic):
+        return 1
+    elapsed = time.perf_counter() - start
+    rate = count / elapsed if elapsed else float("inf")
+    print(f"exported {count} {args.kind} in {elapsed:.2f} s, {rate:,.0f} rows/s")
+    return 0
+
+
+def command_import_excel(args, logic) -> int:
+    """
+    Replace all tasks and subtasks with those of an Excel file in the app's format.
+    """
+    try:
+        logic.import_excel(args.path)
+    except (OSError, ValueError) as error:
+        close_logic(logic)
+        print(f"error: {error}", file=sys.stderr)
+        return 1
+    if not close_logic(logic):
+        return 1
+    print(f"imported {len(logic.tasks)} tasks and {len(logic.subtasks)} subtasks from {args.path}")
+    return 0
+
+
+def command_export_excel(args, logic) -> int:
+    """
+    Write all tasks and subtasks to an Excel file in the app's format.
+    """
+    try:
+        logic.export_excel(args.path)
+    except OSError as error:
+        close_logic(logic)
+        print(f"error: {error}", file=sys.stderr)
+        return 1
+    if not close_logic(logic):
+        return 1
+    print(f"exported {len(logic.tasks)} tasks and {len(logic.subtasks)} subtasks to {args.path}")
+    return 0
+
+
+def command_serve(args, logic) -> int:
+    """
+    Serve the tasks over a local HTTP/JSON API until interrupted.
+    """
+    import api_server
+    if not api_server.serve(logic, args.host, args.port):  # Closes the logic when interrupted
+        print_save_error(logic)
+        return 1
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Build the argument parser with one subcommand per operation.
+    """
+    parser = argparse.ArgumentParser(prog="python -m cli", description="Task manager command-line interface")
+    parser.add_argument("--storage", choices=("excel", "sqlite"), default="excel", help="storage backend to use")
+    parser.add_argument("--file", default="task_manager_data.xlsx", help="Excel data file")
+    parser.add_argument("--db", default="task_manager_data.db", help="SQLite database (with --storage sqlite)")
+    parser.add_argument("--metrics", metavar="FILE",
+                        help="record timings and write them to FILE on exit (Prometheus text for .prom, else JSON)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    formats = ("text", "csv", "json", "jsonl")
+
+    list_parser = subparsers.add_parser("list", help="print tasks or subtasks")
+    list_parser.add_argument("kind", choices=("tasks", "subtasks"))
+    list_parser.add_argument("--task-id", type=int, help="only the subtasks of this task")
+    list_parser.add_argument("--format", choices=formats, default="text")
+    list_parser.set_defaults(handler=command_list)
+
+    add_parser = subparsers.add_parser("add", help="add a task or subtask")
+    add_subparsers = add_parser.add_subparsers(dest="kind", required=True)
+    add_task_parser = add_subparsers.add_parser("task", help="add a task")
+    for field in TASK_FIELDS:
+        add_task_parser.add_argument("--" + field.replace("_", "-"), dest=field, default="")
+    add_subtask_parser = add_subparsers.add_parser("subtask", help="add a subtask")
+    for field in SUBTASK_FIELDS:
+        add_subtask_parser.add_argument("--" + field.replace("_", "-"), dest=field, default="")
+    add_parser.set_defaults(handler=command_add)
+
+    update_parser = subparsers.add_parser("update", help="change attributes of a task or subtask")
+    update_subparsers = update_parser.add_subparsers(dest="kind", required=True)
+    update_task_parser = update_subparsers.add_parser("task", help="update a task")
+    update_task_parser.add_argument("id", type=int)
+    for field in TASK_FIELDS:
+        update_task_parser.add_argument("--" + field.replace("_", "-"), dest=field)
+    update_subtask_parser = update_subparsers.add_parser("subtask", help="update (or, with --task-id, move) a subtask")
+    update_subtask_parser.add_argument("id", type=int)
+    for field in SUBTASK_FIELDS:
+        update_subtask_parser.add_argument("--" + field.replace("_", "-"), dest=field)
+    update_parser.set_defaults(handler=command_update)
+
+    delete_parser = subparsers.add_parser("delete", help="delete a task (with its subtasks) or a subtask")
+    delete_parser.add_argument("kind", choices=("task", "subtask"))
+    delete_parser.add_argument("id", type=int)
+    delete_parser.set_defaults(handler=command_delete)
+
+    query_parser = subparsers.add_parser("query", help="print tasks matching filters")
+    query_parser.add_argument("--text", help="words (or word prefixes) in the task name, notes or subtask names")
+    query_parser.add_argument("--status")
+    query_parser.add_argument("--category")
+    query_parser.add_argument("--priority")
+    query_parser.add_argument("--due-from", help="earliest due date (YYYY-MM-DD)")
+    query_parser.add_argument("--due-to", help="latest due date (YYYY-MM-DD)")
+    query_parser.add_argument("--start-from", help="earliest start date (YYYY-MM-DD)")
+    query_parser.add_argument("--start-to", help="latest start date (YYYY-MM-DD)")
+    query_parser.add_argument("--sort", action="append", help="field to sort by; use --sort=-FIELD for descending (repeatable)")
+    query_parser.add_argument("--limit", type=int)
+    query_parser.add_argument("--format", choices=formats, default="text")
+    query_parser.add_argument("--archived", action="store_true", help="also search archived tasks")
+    query_parser.set_defaults(handler=command_query)
+
+    stats_parser = subparsers.add_parser("stats", help="print task counts, progress per category and overdue count")
+    stats_parser.set_defaults(handler=command_stats)
+
+    archive_parser = subparsers.add_parser("archive", help="move old completed tasks and their subtasks to the archive")
+    archive_parser.add_argument("--older-than", type=int, metavar="DAYS",
+                                help="archive tasks due more than DAYS days ago (default: 90)")
+    archive_parser.add_argument("--before", help="archive tasks due before this date instead (YYYY-MM-DD)")
+    archive_parser.add_argument("--all-statuses", action="store_true", help="also archive tasks that are not completed")
+    archive_parser.set_defaults(handler=command_archive)
+
+    remind_parser = subparsers.add_parser("remind", help="print upcoming due-date reminders, or watch for them")
+    remind_parser.add_argument("--limit", type=int, default=10, help="number of upcoming deadlines to print")
+    remind_parser.add_argument("--watch", action="store_true",
+                               help="keep running and print reminders and overdue records as they fall due")
+    remind_parser.add_argument("--max-wait", type=float, default=60.0, metavar="SECONDS",
+                               help="longest sleep between checks for changes by other processes (with --watch)")
+    remind_parser.set_defaults(handler=command_remind)
+
+    import_parser = subparsers.add_parser("import", help="import tasks or subtasks from CSV/JSON/JSON Lines")
+    import_parser.add_argument("kind", choices=("tasks", "subtasks"))
+    import_parser.add_argument("path", help="input file (.csv, .json, .jsonl or .ndjson)")
+    import_parser.add_argument("--batch-size", type=int, default=5000, help="records validated and added at a time")
+    import_parser.add_argument("--skip-invalid", action="store_true", help="skip invalid records instead of stopping")
+    import_parser.set_defaults(handler=command_import)
+
+    export_parser = subparsers.add_parser("export", help="export tasks or subtasks to CSV/JSON/JSON Lines")
+    export_parser.add_argument("kind", choices=("tasks", "subtasks"))
+    export_parser.add_argument("path", help="output file (.csv, .json, .jsonl or .ndjson)")
+    export_parser.set_defaults(handler=command_export)
+
+    import_excel_parser = subparsers.add_parser("import-excel",
+                                                help="replace all tasks and subtasks with those of an Excel file")
+    import_excel_parser.add_argument("path", help="Excel file in the app's format (Tasks and Subtasks sheets)")
+    import_excel_parser.set_defaults(handler=command_import_excel)
+
+    export_excel_parser = subparsers.add_parser("export-excel", help="write all tasks and subtasks to an Excel file")
+    export_excel_parser.add_argument("path", help="Excel file to create or overwrite")
+    export_excel_parser.set_defaults(handler=command_export_excel)
+
+    serve_parser = subparsers.add_parser("serve", help="serve tasks over a local HTTP/JSON API (see api_server.py)")
+    serve_parser.add_argument("--host", default="127.0.0.1", help="interface to listen on (default: local only)")
+    serve_parser.add_argument("--port", type=int, default=8765)
+    serve_parser.set_defaults(handler=command_serve)
+    return parser
+
+
+def main(argv=None) -> int:
+    """
+    Parse the command line and run the selected subcommand.
+    :return: The process exit code.
+    """
+    args = build_parser().parse_args(argv)
+    if args.metrics:
+        import metrics
+        metrics.enable()
+        try:
+            return args.handler(args, open_logic(args))
+        finally:
+            metrics.REGISTRY.dump(args.metrics)
+    logic = open_logic(args)
+    return args.handler(args, logic)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+import tkinter as tk  # Import tkinter for creating the GUI
+from tkinter import ttk, filedialog, messagebox  # Import ttk for the Treeview, filedialog to choose export files
+import metrics  # Import the instrumentation registry shown in this tab
+from task_view import TaskView  # Import TaskView for its Treeview diffing helper
+
+class DiagnosticsView:
+    REFRESH_INTERVAL = 1000  # Milliseconds between updates of the table while the tab is visible
+
+    def __init__(self, notebook, registry: metrics.Registry = None):
+        """
+        Initialize the DiagnosticsView class.
+        This class shows the instrumentation recorded in the metrics registry (load/save/refresh timings,
+        row counts, save queue depth, Tk stall time) in a Diagnostics tab, and exports it for bug reports.
+        :param notebook: The parent ttk.Notebook where the tab will be added.
+        :param registry: The metrics.Registry to show (defaults to metrics.REGISTRY).
+        """
+        self.notebook = notebook
+        self.registry = registry or metrics.REGISTRY
+        self.rendered = {}  # Metric name -> row tuple shown in the table
+
+        self.tab = ttk.Frame(notebook)
+        notebook.add(self.tab, text="Diagnostics")
+
+        button_frame = tk.Frame(self.tab)
+        button_frame.pack(pady=(10, 0))
+        tk.Button(button_frame, text="Save as JSON", command=lambda: self.export(".json")).pack(side="left")
+        tk.Button(button_frame, text="Save as Prometheus Text",
+                  command=lambda: self.export(".prom")).pack(side="left", padx=4)
+        tk.Button(button_frame, text="Reset", command=self.reset).pack(side="left")
+        self.status_label = tk.Label(self.tab, text="")
+        self.status_label.pack()
+
+        # Timings first (count, mean, max, last, total), then counters and gauges (value only)
+        columns = ("Metric", "Count / Value", "Mean (ms)", "Max (ms)", "Last (ms)", "Total (s)")
+        self.table = ttk.Treeview(self.tab, columns=columns, show="headings", height=20)
+        for col in columns:
+            self.table.heading(col, text=col)
+            self.table.column(col, width=220 if col == "Metric" else 100, anchor="w" if col == "Metric" else "e")
+        self.table.pack(pady=10, fill="both", expand=True)
+
+        self.refresh()
+
+    def refresh(self):
+        """
+        Updates the table from the registry (only while the tab is selected), then schedules the next update.
+        """
+        if self.notebook.select() == str(self.tab):
+            data = self.registry.as_dict()
+            rows = {}
+            for name, timing in data["timings"].items():
+                if not timing["count"]:
+                    continue  # Instrumented, but not called yet
+                rows[name] = (name, timing["count"], f"{timing['mean_seconds'] * 1000:.2f}",
+                              f"{timing['max_seconds'] * 1000:.2f}", f"{timing['last_seconds'] * 1000:.2f}",
+                              f"{timing['total_seconds']:.3f}")
+            for name, value in list(data["counters"].items()) + list(data["gauges"].items()):
+                rows[name] = (name, value, "", "", "", "")
+            self.rendered = TaskView.sync_rows(self.table, self.rendered, rows)
+            state = "recording" if data["enabled"] else "off (start with --metrics or TASK_MANAGER_METRICS=1)"
+            self.status_label.config(text=f"Instrumentation {state}, {data['uptime_seconds']:.0f} s of data")
+        self.tab.after(self.REFRESH_INTERVAL, self.refresh)
+
+    def export(self, extension: str):
+        """
+        Asks for a file name and writes the metrics to it as JSON or Prometheus text.
+        """
+        path = filedialog.asksaveasfilename(defaultextension=extension,
+                                            filetypes=[("Metrics", "*" + extension), ("All files", "*.*")])
+        if not path:
+            return
+        try:
+            self.registry.dump(path)
+        except OSError as error:
+            messagebox.showwarning("Export Error", f"Could not write {path}: {error}")
+
+    def reset(self):
+        """
+        Clears all recorded values.
+        """
+        self.registry.reset()
+        self.table.delete(*self.table.get_children())
+        self.rendered = {}
@@ -0,0 +1,122 @@
+import queue  # Import queue to hand events from any thread to the Tk thread
+import threading  # Import threading to detect which thread an event was published from
+
+# Kinds of change events published by TaskManagerLogic
+TASK_ADDED = "task_added"
+TASK_UPDATED = "task_updated"
+TASK_DELETED = "task_deleted"  # The task's subtasks are deleted with it; no separate subtask events are sent
+SUBTASK_ADDED = "subtask_added"
+SUBTASK_UPDATED = "subtask_updated"
+SUBTASK_DELETED = "subtask_deleted"
+BULK_RELOAD = "bulk_reload"  # Everything may have changed (e.g. after loading or importing a file)
+SAVE_COMPLETED = "save_completed"  # Published from the background writer after a successful save
+SAVE_FAILED = "save_failed"  # Published from the background writer; `error` holds the exception
+MERGE_CONFLICT = "merge_conflict"  # A task/subtask was changed both here and by another process since the last merge
+DEADLINE_REMINDER = "deadline_reminder"  # An open task/subtask is due soon (see scheduler.DeadlineScheduler)
+DEADLINE_OVERDUE = "deadline_overdue"  # The due date of an open task/subtask has just passed
+
+
+class Event:
+    __slots__ = ("kind", "task_id", "subtask_id", "error")
+
+    def __init__(self, kind: str, task_id: int = None, subtask_id: int = None, error: Exception = None):
+        """
+        Initializes a change event.
+        :param kind: One of the event kind constants defined in this module.
+        :param task_id: The affected task, or the parent task for subtask events.
+        :param subtask_id: The affected subtask, for subtask events.
+        :param error: The exception, for SAVE_FAILED events.
+        """
+        self.kind = kind
+        self.task_id = task_id
+        self.subtask_id = subtask_id
+        self.error = error
+
+    def __repr__(self):
+        return f"Event({self.kind!r}, task_id={self.task_id!r}, subtask_id={self.subtask_id!r})"
+
+
+class EventBus:
+    def __init__(self):
+        """
+        Initialize the EventBus class.
+        Subscribers are called synchronously, on the thread that publishes the event.
+        """
+        self.subscribers = []  # Callables that receive each Event
+
+    def subscribe(self, callback):
+        """
+        Register a callable that is called with every published Event.
+        :return: A function that removes the subscription again.
+        """
+        self.subscribers.append(callback)
+        return lambda: self.subscribers.remove(callback)
+
+    def publish(self, kind: str, task_id: int = None, subtask_id: int = None, error: Exception = None):
+        """
+        Create an Event and pass it to every subscriber.
+        """
+        if not self.subscribers:
+            return  # Nothing is listening (e.g. headless use), so skip creating the event
+        event = Event(kind, task_id, subtask_id, error)
+        for callback in list(self.subscribers):
+            callback(event)
+
+
+class TkEventDispatcher:
+    def __init__(self, root, bus: EventBus, poll_interval: int = 50):
+        """
+        Initialize the TkEventDispatcher class.
+        This class collects events from an EventBus and delivers them to its own subscribers on the Tk thread,
+        in batches: all events published during one pass of the Tk event loop are delivered together once the
+        loop is idle. Events published from other threads (e.g. the background writer) are queued and picked
+        up by a periodic poll, because Tk must only be used from the thread that created it.
+        :param root: The Tk root window.
+        :param bus: The EventBus to listen to.
+        :param poll_interval: Milliseconds between checks for events published from other threads.
+        """
+        self.root = root
+        self.poll_interval = poll_interval
+        self.subscribers = []  # Callables that receive a list of Events
+        self._queue = queue.SimpleQueue()  # Thread-safe queue of events waiting to be delivered
+        self._tk_thread = threading.get_ident()  # The thread that runs the Tk event loop
+        self._idle_scheduled = False  # True while a delivery is scheduled for the next idle moment
+        bus.subscribe(self._on_event)
+        self.root.after(self.poll_interval, self._poll)
+
+    def subscribe(self, callback):
+        """
+        Register a callable that is called on the Tk thread with each batch (list) of Events.
+        """
+        self.subscribers.append(callback)
+
+    def _on_event(self, event: Event):
+        """
+        Queue an event; when it comes from the Tk thread, schedule delivery for when the loop is idle.
+        """
+        self._queue.put(event)
+        if threading.get_ident() == self._tk_thread and not self._idle_scheduled:
+            self._idle_scheduled = True
+            self.root.after_idle(self.deliver)
+
+    def _poll(self):
+        """
+        Deliver events queued from other threads, then check again after poll_interval.
+        """
+        self.deliver()
+        self.root.after(self.poll_interval, self._poll)
+
+    def deliver(self):
+        """
+        Deliver all queued events to the subscribers as one batch. Must be called on the Tk thread.
+        """
+        self._idle_scheduled = False
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if batch:
+            for callback in self.subscribers:
+                callback(batch)
@@ -1,24 +1,56 @@
-import openpyxl
+import hashlib  # Import hashlib to fingerprint the workbook contents for the parsed-data cache
 import os
+import pickle  # Import pickle to store the parsed rows in the sidecar cache
+import metrics  # Import the opt-in instrumentation that times loads and saves
+from storage import StorageBackend, replace_atomically, split_chunks  # Import the storage interface and file helpers
 from task_model import Task, Subtask  # Import Task and Subtask from task_model.py
 
-class ExcelHandler:
-    def __init__(self, excel_file: str = "task_manager_data.xlsx"):
+CACHE_VERSION = 1  # Bump when the cache layout changes so old caches are ignored
+
+# Header rows of the 'Main Tasks' and 'Subtasks' sheets (columns in Task.FIELDS and Subtask.FIELDS order)
+TASK_HEADERS = ("Task ID", "Task Name", "Category", "Priority", "Start Date", "Due Date", "Status", "Progress", "Notes")
+SUBTASK_HEADERS = ("Subtask ID", "Task ID", "Subtask Name", "Subtask Status", "Subtask Progress", "Subtask Due Date",
+                   "Subtask Completed Date")
+
+
+class ExcelHandler(StorageBackend):
+    def __init__(self, excel_file: str = "task_manager_data.xlsx", cache: bool = True):
         """
         Initialize the ExcelHandler with the specified Excel file.
         If no file is provided, it defaults to 'task_manager_data.xlsx'.
+        :param cache: If True, the parsed tasks and subtasks are kept in a sidecar file ('<excel_file>.cache')
+                      that is used instead of parsing the workbook while the workbook is unchanged.
         """
         self.excel_file = excel_file
+        self.cache_file = excel_file + ".cache" if cache else None  # Sidecar with the parsed rows (None = no cache)
 
-    def load_data(self) -> tuple[list[Task], list[Subtask]]:
+    @metrics.timed("excel_load")
+    def load_data(self, streaming: bool = True) -> tuple[list[Task], list[Subtask]]:
         """
         Load tasks and subtasks from the Excel file.
         If the file does not exist, it creates a new Excel file with the required structure.
+        :param streaming: If True (the default), the sheets are streamed in read-only mode and rows are read as
+                          plain value tuples. If False, the whole workbook is loaded with its cell objects.
         :return: A tuple containing a list of Task objects and a list of Subtask objects.
         """
+        if streaming:
+            cached = self.read_cache()
+            if cached is not None:
+                metrics.count("excel_cache_hits")
+                metrics.count("excel_load_rows", len(cached[0]) + len(cached[1]))
+                return cached  # The workbook has not changed since it was last parsed or saved
+            tasks, subtasks = [], []
+            for task_chunk, subtask_chunk in self.iter_chunks():
+                tasks.extend(task_chunk)
+                subtasks.extend(subtask_chunk)
+            self.write_cache(tasks, subtasks)
+            metrics.count("excel_load_rows", len(tasks) + len(subtasks))
+            return tasks, subtasks
+
         if not os.path.exists(self.excel_file):
             self.create_excel_file()  # Create Excel file if it doesn't exist
 
+        import openpyxl  # Imported on first use so programs that never touch Excel do not pay for it
         workbook = openpyxl.load_workbook(self.excel_file)
 
         # Load tasks from the 'Main Tasks' sheet
@@ -35,34 +67,155 @@ class ExcelHandler:
 
         return tasks, subtasks
 
+    def iter_chunks(self, chunk_size: int = 1000):
+        """
+        Stream tasks and subtasks from the Excel file in chunks.
+        The workbook is opened in read-only mode, so rows are parsed as they are read and no cell objects are kept.
+        All task chunks are produced before the subtask chunks, which lets callers show tasks before
+        the rest of the file has been parsed.
+        If the file does not exist, it creates a new Excel file with the required structure.
+        :param chunk_size: Maximum number of records in each chunk.
+        :return: A generator of (tasks, subtasks) tuples where one of the two lists is empty.
+        """
+        if not os.path.exists(self.excel_file):
+            self.create_excel_file()  # Create Excel file if it doesn't exist
+
+        import openpyxl
+        workbook = openpyxl.load_workbook(self.excel_file, read_only=True)
+        try:
+            for task_chunk in self._iter_sheet(workbook["Main Tasks"], Task, len(Task.FIELDS), chunk_size):
+                yield task_chunk, []
+            for subtask_chunk in self._iter_sheet(workbook["Subtasks"], Subtask, len(Subtask.FIELDS), chunk_size):
+                yield [], subtask_chunk
+        finally:
+            workbook.close()  # Read-only workbooks keep the file open until closed
+
+    def load_chunks(self, chunk_size: int = 1000):
+        """
+        Load tasks and subtasks in chunks: from the sidecar cache if the workbook is unchanged, otherwise
+        parsed from the workbook as it is streamed (see iter_chunks). The cache is written once all rows were read.
+        :param chunk_size: Maximum number of records in each chunk.
+        :return: A generator of (tasks, subtasks, changes) tuples; changes is always empty.
+        """
+        cached = self.read_cache()
+        if cached is not None:
+            metrics.count("excel_cache_hits")
+            metrics.count("excel_load_rows", len(cached[0]) + len(cached[1]))
+            yield from split_chunks(*cached, chunk_size)
+            return
+        tasks, subtasks = [], []
+        for task_chunk, subtask_chunk in self.iter_chunks(chunk_size):
+            tasks.extend(task_chunk)
+            subtasks.extend(subtask_chunk)
+            yield task_chunk, subtask_chunk, []
+        self.write_cache(tasks, subtasks)
+        metrics.count("excel_load_rows", len(tasks) + len(subtasks))
+
+    @staticmethod
+    def _iter_sheet(sheet, record_class, width: int, chunk_size: int):
+        """
+        Build records of the given class from the value tuples of a sheet, skipping the header and empty rows.
+        :param width: Number of columns expected by record_class.
+        :return: A generator of lists with at most chunk_size records.
+        """
+        chunk = []
+        for row in sheet.iter_rows(min_row=2, max_col=width, values_only=True):
+            if not row or row[0] is None:
+                continue  # Read-only sheets can report trailing empty rows
+            if len(row) < width:
+                row += (None,) * (width - len(row))  # Empty trailing cells are not stored in the file
+            chunk.append(record_class(*row))
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def cache_key(self) -> tuple:
+        """
+        Returns the key that identifies the current contents of the workbook: (size, mtime in ns, BLAKE2 hash).
+        """
+        stat = os.stat(self.excel_file)
+        digest = hashlib.blake2b(digest_size=16)
+        with open(self.excel_file, "rb") as file:
+            for block in iter(lambda: file.read(1 << 20), b""):
+                digest.update(block)
+        return stat.st_size, stat.st_mtime_ns, digest.hexdigest()
+
+    def read_cache(self):
+        """
+        Load the parsed tasks and subtasks from the sidecar cache if it matches the workbook.
+        :return: A (tasks, subtasks) tuple, or None if there is no valid cache (the workbook must then be parsed).
+        """
+        if self.cache_file is None or not os.path.exists(self.cache_file) or not os.path.exists(self.excel_file):
+            return None
+        try:
+            with open(self.cache_file, "rb") as file:
+                header = pickle.load(file)
+                if header != (CACHE_VERSION, Task.FIELDS, Subtask.FIELDS, self.cache_key()):
+                    return None  # Stale: the workbook (or the record layout) changed
+                task_rows, subtask_rows = pickle.load(file)
+        except (OSError, EOFError, pickle.UnpicklingError, ValueError, TypeError, AttributeError):
+            return None  # Damaged cache; fall back to parsing the workbook
+        return [Task(*row) for row in task_rows], [Subtask(*row) for row in subtask_rows]
+
+    def write_cache(self, tasks: list[Task], subtasks: list[Subtask]):
+        """
+        Store the parsed tasks and subtasks in the sidecar cache, keyed on the current workbook.
+        Rows are pickled as plain tuples with protocol 5; a failure to write the cache is not an error.
+        """
+        if self.cache_file is None:
+            return
+        header = (CACHE_VERSION, Task.FIELDS, Subtask.FIELDS, self.cache_key())
+        rows = ([task.as_row() for task in tasks], [subtask.as_row() for subtask in subtasks])
+
+        def write(path):
+            with open(path, "wb") as file:
+                pickle.dump(header, file, protocol=5)  # Small header first, so stale caches are rejected quickly
+                pickle.dump(rows, file, protocol=5)
+
+        try:
+            replace_atomically(self.cache_file, write)
+        except OSError:
+            pass  # The cache only speeds up the next start
+
+    def archive_directory(self) -> str:
+        """
+        Returns the directory of the archive shards ('<excel_file>.archive').
+        """
+        return self.excel_file + ".archive"
+
     def create_excel_file(self):
         """
         Create a new Excel file with the necessary sheets and headers.
         This method sets up two sheets: 'Main Tasks' for tasks and 'Subtasks' for subtasks.
         """
+        import openpyxl
         workbook = openpyxl.Workbook()
 
         # Create the 'Main Tasks' sheet and add headers
         main_task_sheet = workbook.active
         main_task_sheet.title = "Main Tasks"
-        main_task_headers = ["Task ID", "Task Name", "Category", "Priority", "Start Date", "Due Date", "Status", "Progress", "Notes"]
-        main_task_sheet.append(main_task_headers)
+        main_task_sheet.append(TASK_HEADERS)
 
         # Create the 'Subtasks' sheet and add headers
         subtask_sheet = workbook.create_sheet(title="Subtasks")
-        subtask_headers = ["Subtask ID", "Task ID", "Subtask Name", "Subtask Status", "Subtask Progress", "Subtask Due Date", "Subtask Completed Date"]
-        subtask_sheet.append(subtask_headers)
+        subtask_sheet.append(SUBTASK_HEADERS)
 
-        # Save the new Excel file
-        workbook.save(self.excel_file)
+        # Save the new Excel file (through a temporary file, so a crash never leaves a half-written workbook)
+        replace_atomically(self.excel_file, workbook.save)
 
+    @metrics.timed("excel_save")
     def save_data(self, tasks: list[Task], subtasks: list[Subtask]):
         """
         Save tasks and subtasks to the Excel file.
         The existing 'Main Tasks' and 'Subtasks' sheets are cleared and repopulated with new data.
+        The file is replaced atomically: readers see either the old or the new workbook.
         :param tasks: List of Task objects to be saved.
         :param subtasks: List of Subtask objects to be saved.
         """
+        import openpyxl  # Imported on first use so programs that never touch Excel do not pay for it
+        metrics.count("excel_save_rows", len(tasks) + len(subtasks))
         workbook = openpyxl.load_workbook(self.excel_file)
 
         # Remove the old 'Main Tasks' sheet if it exists and create a new one
@@ -72,12 +225,11 @@ class ExcelHandler:
         main_task_sheet = workbook.create_sheet(title="Main Tasks")
 
         # Add headers to the new 'Main Tasks' sheet
-        main_task_headers = ["Task ID", "Task Name", "Category", "Priority", "Start Date", "Due Date", "Status", "Progress", "Notes"]
-        main_task_sheet.append(main_task_headers)
+        main_task_sheet.append(TASK_HEADERS)
 
         # Add task data to the 'Main Tasks' sheet
         for task in tasks:
-            main_task_sheet.append(task.as_list())
+            main_task_sheet.append(task.as_row())
 
         # Remove the old 'Subtasks' sheet if it exists and create a new one
         if "Subtasks" in workbook.sheetnames:
@@ -86,12 +238,13 @@ class ExcelHandler:
         subtask_sheet = workbook.create_sheet(title="Subtasks")
 
         # Add headers to the new 'Subtasks' sheet
-        subtask_headers = ["Subtask ID", "Task ID", "Subtask Name", "Subtask Status", "Subtask Progress", "Subtask Due Date", "Subtask Completed Date"]
-        subtask_sheet.append(subtask_headers)
+        subtask_sheet.append(SUBTASK_HEADERS)
 
         # Add subtask data to the 'Subtasks' sheet
         for subtask in subtasks:
-            subtask_sheet.append(subtask.as_list())
+            subtask_sheet.append(subtask.as_row())
 
-        # Save the workbook with the updated tasks and subtasks
-        workbook.save(self.excel_file)
+        # Save the workbook with the updated tasks and subtasks to a temporary file and rename it over the old one,
+        # so a crash during the save leaves the previous version intact
+        replace_atomically(self.excel_file, workbook.save)
+        self.write_cache(tasks, subtasks)  # The next start can skip parsing the workbook we just wrote
@@ -0,0 +1,90 @@
+import os
+import threading  # Import threading so threads of one process also exclude each other
+
+if os.name == "nt":
+    import msvcrt  # Import msvcrt for byte-range locks on Windows
+else:
+    import fcntl  # Import fcntl for flock() on Linux and macOS
+
+
+class FileLock:
+    def __init__(self, lock_file: str):
+        """
+        Initialize the FileLock class.
+        An advisory lock shared by every process that opens the same data file. It is held on a separate
+        '.lock' file, so the data file itself can be replaced while the lock is held.
+        The lock is re-entrant within a thread and also excludes other threads of the same process.
+        Use it as a context manager: `with lock: ...` for exclusive access, `with lock.shared(): ...` for reading.
+        :param lock_file: Path of the lock file (created if missing).
+        """
+        self.lock_file = lock_file
+        self._thread_lock = threading.RLock()  # flock() does not exclude threads sharing the same descriptor
+        self._file = None  # Open lock file while the lock is held
+        self._depth = 0  # Re-entrancy count of the current holder
+
+    def acquire(self, shared: bool = False):
+        """
+        Block until the lock is held.
+        :param shared: If True, other readers may hold the lock at the same time (not supported on Windows,
+                       where the lock is always exclusive).
+        """
+        self._thread_lock.acquire()
+        self._depth += 1
+        if self._depth > 1:
+            return  # Already held by this thread
+        try:
+            self._file = open(self.lock_file, "a+b")
+            if os.name == "nt":
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+            else:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        except BaseException:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            self._depth -= 1
+            self._thread_lock.release()
+            raise
+
+    def release(self):
+        """
+        Release the lock acquired by this thread.
+        """
+        self._depth -= 1
+        if self._depth == 0:
+            if os.name == "nt":
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+        self._thread_lock.release()
+
+    def shared(self):
+        """
+        Returns a context manager that holds the lock in shared (read) mode.
+        """
+        return _SharedLock(self)
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+
+class _SharedLock:
+    """Context manager returned by FileLock.shared()."""
+
+    def __init__(self, lock: FileLock):
+        self.lock = lock
+
+    def __enter__(self):
+        self.lock.acquire(shared=True)
+        return self.lock
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.lock.release()
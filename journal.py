@@ -0,0 +1,487 @@
+import json  # Import json to store journal entries as one JSON object per line
+import os
+import uuid  # Import uuid to tell this process's journal entries apart from other processes'
+from bulk_io import json_value  # Import json_value to write dates as ISO text
+from file_lock import FileLock  # Import the advisory lock shared by all processes using the same data file
+from storage import (StorageBackend, UPSERT_TASK, UPSERT_SUBTASK, DELETE_TASK, DELETE_SUBTASK,
+                     replace_atomically)
+from task_model import Task, Subtask  # Import the Task and Subtask models
+
+
+def record_key(kind: str, value) -> tuple:
+    """
+    Returns the ("task", ID) or ("subtask", ID) key of the record a change applies to.
+    """
+    if kind == UPSERT_TASK:
+        return "task", value.task_id
+    if kind == UPSERT_SUBTASK:
+        return "subtask", value.subtask_id
+    return ("task" if kind == DELETE_TASK else "subtask"), value
+
+
+def replay(tasks: list[Task], subtasks: list[Subtask], changes: list[tuple]) -> tuple[list[Task], list[Subtask]]:
+    """
+    Apply (kind, value) changes in order to lists of tasks and subtasks.
+    Upserts carry the full record and deletes are by ID, so replaying changes that are already applied is harmless.
+    Each change costs the same however many records there are, so replaying many task deletes (e.g. after
+    archiving) stays linear.
+    A subtask upsert is skipped if its parent task does not exist at that point (it was deleted concurrently).
+    :return: The new (tasks, subtasks) lists.
+    """
+    if not changes:
+        return tasks, subtasks
+    tasks_by_id = {task.task_id: task for task in tasks}
+    subtasks_by_id = {subtask.subtask_id: subtask for subtask in subtasks}
+    children = {}  # Task ID -> IDs of its subtasks, so deleting a task does not scan every subtask
+    for subtask in subtasks:
+        children.setdefault(subtask.task_id, set()).add(subtask.subtask_id)
+    for kind, value in changes:
+        if kind == UPSERT_TASK:
+            tasks_by_id[value.task_id] = value
+        elif kind == UPSERT_SUBTASK:
+            if value.task_id in tasks_by_id:
+                old = subtasks_by_id.get(value.subtask_id)
+                if old is not None and old.task_id != value.task_id:
+                    children[old.task_id].discard(value.subtask_id)  # Moved to another task
+                subtasks_by_id[value.subtask_id] = value
+                children.setdefault(value.task_id, set()).add(value.subtask_id)
+        elif kind == DELETE_TASK:
+            tasks_by_id.pop(value, None)
+            for subtask_id in children.pop(value, ()):
+                del subtasks_by_id[subtask_id]
+        else:
+            old = subtasks_by_id.pop(value, None)
+            if old is not None:
+                children[old.task_id].discard(value)
+    return list(tasks_by_id.values()), list(subtasks_by_id.values())
+
+
+class Journal:
+    def __init__(self, journal_file: str):
+        """
+        Initialize the Journal class.
+        A write-ahead journal of changes (UPSERT_TASK, DELETE_SUBTASK, ...) stored as JSON Lines.
+        The first line is a header with the journal's generation, which goes up every time the journal is
+        emptied after a checkpoint; the previous generation is kept as '<journal_file>.prev' so that processes
+        that have not read it to the end yet can still catch up. Each entry records the process that wrote it.
+        Every append is fsynced, so a change is durable as soon as append returns. An entry cut short by a
+        crash is ignored when reading and removed by the next append.
+        The caller is responsible for locking (see JournaledStorage).
+        :param journal_file: Path of the journal file.
+        """
+        self.journal_file = journal_file
+        self.previous_file = journal_file + ".prev"
+
+    def header(self, path: str = None) -> tuple:
+        """
+        Returns (generation, offset of the first entry) of a journal file, or None if it does not exist.
+        Journals written before generations were introduced have no header and are generation 0.
+        """
+        try:
+            with open(path or self.journal_file, "rb") as file:
+                line = file.readline()
+        except FileNotFoundError:
+            return None
+        try:
+            return json.loads(line)["generation"], len(line)
+        except (ValueError, KeyError, TypeError):
+            return 0, 0
+
+    def generation(self) -> int:
+        """
+        Returns the current generation, creating the journal if it does not exist yet.
+        """
+        header = self.header()
+        if header is None:
+            previous = self.header(self.previous_file)
+            self._create(previous[0] + 1 if previous else 1)
+            header = self.header()
+        return header[0]
+
+    def append(self, changes: list[tuple], origin: str) -> list[tuple]:
+        """
+        Append changes to the journal and wait until they are on disk.
+        :param changes: List of (kind, value) tuples as recorded by TaskManagerLogic.
+        :param origin: Identifier of the writing process.
+        :return: The (generation, offset) stamp of each appended entry.
+        """
+        if not changes:
+            return []
+        generation = self.generation()
+        with open(self.journal_file, "r+b") as file:
+            end = self._repair_tail(file)
+            stamps, lines = [], []
+            for kind, value in changes:
+                if kind in (UPSERT_TASK, UPSERT_SUBTASK):
+                    entry = {"origin": origin, "kind": kind, "row": [json_value(item) for item in value.as_row()]}
+                else:
+                    entry = {"origin": origin, "kind": kind, "id": value}
+                line = json.dumps(entry).encode("utf-8") + b"\n"
+                stamps.append((generation, end))
+                lines.append(line)
+                end += len(line)
+            file.write(b"".join(lines))
+            file.flush()
+            os.fsync(file.fileno())
+        return stamps
+
+    @staticmethod
+    def _repair_tail(file) -> int:
+        """
+        Cut off an entry left incomplete by a crash, so new entries start on a fresh line.
+        :return: The offset at which new entries are written.
+        """
+        end = file.seek(0, os.SEEK_END)
+        if end == 0:
+            return 0
+        file.seek(end - 1)
+        if file.read(1) == b"\n":
+            return end
+        position = end
+        while position > 0:  # Search backwards for the end of the last complete entry
+            step = min(position, 1 << 16)
+            position -= step
+            file.seek(position)
+            newline = file.read(step).rfind(b"\n")
+            if newline >= 0:
+                end = position + newline + 1
+                break
+        else:
+            end = 0
+        file.truncate(end)
+        return end
+
+    def read(self, path: str = None, offset: int = None) -> tuple[list[tuple], int]:
+        """
+        Read the entries of a journal file.
+        Reading stops at the first incomplete or damaged entry, which can only be the last one written before a crash.
+        :param path: Journal file to read (defaults to the current journal).
+        :param offset: Byte offset to start at (defaults to the first entry).
+        :return: A list of ((generation, offset), origin, kind, value) tuples, and the offset where reading stopped.
+        """
+        path = path or self.journal_file
+        header = self.header(path)
+        if header is None:
+            return [], 0
+        generation, start = header
+        entries = []
+        with open(path, "rb") as file:
+            position = file.seek(start if offset is None else max(offset, start))
+            for line in file:
+                if not line.endswith(b"\n"):
+                    break  # Torn write: the entry was never acknowledged
+                try:
+                    entry = json.loads(line)
+                    kind = entry["kind"]
+                    if kind == UPSERT_TASK:
+                        value = Task(*entry["row"])
+                    elif kind == UPSERT_SUBTASK:
+                        value = Subtask(*entry["row"])
+                    elif kind in (DELETE_TASK, DELETE_SUBTASK):
+                        value = entry["id"]
+                    else:
+                        break
+                except (ValueError, KeyError, TypeError):
+                    break
+                entries.append(((generation, position), entry.get("origin"), kind, value))
+                position += len(line)
+        return entries, position
+
+    def size(self) -> int:
+        """
+        Returns the size of the current journal in bytes (0 if it does not exist).
+        """
+        try:
+            return os.path.getsize(self.journal_file)
+        except FileNotFoundError:
+            return 0
+
+    def has_entries(self) -> bool:
+        """
+        Returns True if the current journal holds any entries.
+        """
+        header = self.header()
+        return header is not None and self.size() > header[1]
+
+    def rotate(self, skip: int = 1):
+        """
+        Start a new, empty generation after the journal's changes were written to a full snapshot.
+        :param skip: Number of generations to advance. Use 2 when the snapshot was replaced wholesale (e.g. an import),
+                     so that other processes cannot catch up from '.prev' and reload instead.
+        """
+        generation = self.generation()
+        if skip == 1:
+            os.replace(self.journal_file, self.previous_file)
+        else:
+            os.remove(self.journal_file)
+            if os.path.exists(self.previous_file):
+                os.remove(self.previous_file)
+        self._create(generation + skip)
+
+    def _create(self, generation: int):
+        """
+        Atomically create an empty journal of the given generation.
+        """
+        def write(path):
+            with open(path, "wb") as file:
+                file.write(json.dumps({"generation": generation}).encode("utf-8") + b"\n")
+
+        replace_atomically(self.journal_file, write)
+
+
+class JournaledStorage(StorageBackend):
+    """
+    Storage backend that makes a full-snapshot backend (e.g. ExcelHandler) cheap and crash-safe to save to,
+    and safe to share between several processes.
+
+    Each save only appends the changed records to a write-ahead journal. Once the journal grows past
+    `checkpoint_bytes` it is folded into a new full snapshot, and so it is when a process that wrote to it
+    closes while it is larger than `close_checkpoint_bytes`; read-only processes never rewrite the snapshot.
+    On load the journal is replayed on top of the snapshot, so changes since the last checkpoint survive a crash.
+
+    All file access happens under an advisory lock ('<data file>.lock'). Checkpoints rebuild the snapshot from
+    the files (snapshot + journal), not from this process's memory, so they never drop other processes' changes.
+    Every journal entry's (generation, offset) is its version stamp: read_remote_changes folds in entries written
+    by other processes since the last load or merge, keeping this process's own later writes, and reports
+    records that both sides changed. New IDs come from blocks reserved in '<data file>.ids', so concurrent
+    processes never hand out the same ID.
+    """
+
+    incremental = True
+
+    def __init__(self, backend: StorageBackend, journal_file: str = None, checkpoint_bytes: int = 1 << 20,
+                 close_checkpoint_bytes: int = 64 << 10):
+        """
+        :param backend: The backend holding the full snapshot.
+        :param journal_file: Path of the journal; defaults to the backend's Excel file name plus '.journal'.
+        :param checkpoint_bytes: Journal size after which a full snapshot is written.
+        :param close_checkpoint_bytes: Journal size after which a full snapshot is written when the application
+                                       closes, if this process wrote to the journal since its last checkpoint.
+        """
+        self.backend = backend
+        base = getattr(backend, "excel_file", "task_manager_data")
+        self.journal = Journal(journal_file or base + ".journal")
+        self.lock = FileLock(base + ".lock")
+        self.ids_file = base + ".ids"  # Next free task and subtask IDs, shared by all processes
+        self.checkpoint_bytes = checkpoint_bytes
+        self.close_checkpoint_bytes = close_checkpoint_bytes
+        self.journaled = False  # True once this process appended to the journal since its last checkpoint
+        self.origin = uuid.uuid4().hex[:12]  # Marks the journal entries written by this process
+
+        self.generation = None  # Journal generation this process has read up to
+        self.offset = 0  # Offset in that generation up to which entries have been merged
+        self.versions = {}  # Record key -> (generation, offset) of the newest journal entry known for it
+        self.written = set()  # Record keys this process wrote since the last load or merge
+        # Journal position scanned by apply_changes, and the IDs other processes deleted since the last merge
+        self.scanned = (None, 0)
+        self.deleted_tasks, self.deleted_subtasks = set(), set()
+        self.block_sizes = {"task": 1, "subtask": 1}  # Size of the next ID block to reserve, per kind
+
+    def load_data(self) -> tuple[list[Task], list[Subtask]]:
+        """
+        Load the snapshot from the wrapped backend and replay the journal on top of it.
+        :return: A tuple containing a list of Task objects and a list of Subtask objects.
+        """
+        with self.lock:
+            tasks, subtasks = self.backend.load_data()
+            self.generation = self.journal.generation()  # Creates the journal, so later merges know where to start
+            entries, self.offset = self.journal.read()
+        self.versions = {}
+        for stamp, _, kind, value in entries:
+            self.versions[record_key(kind, value)] = stamp
+        self._merged()
+        return replay(tasks, subtasks, [(kind, value) for _, _, kind, value in entries])
+
+    def load_chunks(self, chunk_size: int = 1000):
+        """
+        Stream the snapshot from the wrapped backend in chunks, then the journal as one chunk of changes
+        to apply on top of it. The lock is held until the journal has been read, so finish (or close) the
+        generator promptly; other processes and this process's writer wait for it.
+        :param chunk_size: Maximum number of records in each chunk.
+        :return: A generator of (tasks, subtasks, changes) tuples.
+        """
+        with self.lock:
+            yield from self.backend.load_chunks(chunk_size)
+            self.generation = self.journal.generation()
+            entries, self.offset = self.journal.read()
+        self.versions = {}
+        for stamp, _, kind, value in entries:
+            self.versions[record_key(kind, value)] = stamp
+        self._merged()
+        if entries:
+            yield [], [], [(kind, value) for _, _, kind, value in entries]
+
+    def save_data(self, tasks: list[Task], subtasks: list[Subtask]):
+        """
+        Replace all stored data with the given tasks and subtasks (e.g. after an import).
+        Other processes notice the skipped journal generation and reload everything.
+        """
+        with self.lock:
+            self.backend.save_data(tasks, subtasks)
+            self.journal.rotate(skip=2)
+            self.generation, self.offset = self.journal.header()
+        self.versions = {}
+        self._merged()
+
+    def needs_checkpoint(self) -> bool:
+        """
+        Returns True if this process wrote to the journal and it has grown past close_checkpoint_bytes.
+        A small journal is cheaper to replay on the next load than rewriting the snapshot on every exit.
+        """
+        return self.journaled and self.journal.size() > self.close_checkpoint_bytes
+
+    def apply_changes(self, tasks, subtasks, changes: list[tuple]):
+        """
+        Journal the changes and write a checkpoint if the journal has grown past checkpoint_bytes.
+        Edits of tasks or subtasks that another process deleted since the last merge are dropped, so a
+        concurrent edit never brings a deleted record back; the next merge removes them here too.
+        :param tasks: Not used: checkpoints are built from the files, so other processes' changes are kept.
+        :param subtasks: Not used.
+        :param changes: List of (kind, value) tuples in the order they happened.
+        """
+        with self.lock:
+            # Only the entries appended since the previous save are read, so the cost does not grow between merges
+            unread = self._read_since(*self.scanned)
+            if unread is not None:
+                for _, origin, kind, value in unread[0]:
+                    if origin != self.origin and kind == DELETE_TASK:
+                        self.deleted_tasks.add(value)
+                    elif origin != self.origin and kind == DELETE_SUBTASK:
+                        self.deleted_subtasks.add(value)
+            if self.deleted_tasks or self.deleted_subtasks:
+                kept = []
+                for kind, value in changes:
+                    if (kind == UPSERT_TASK and value.task_id in self.deleted_tasks) or (
+                            kind == UPSERT_SUBTASK and (value.subtask_id in self.deleted_subtasks
+                                                        or value.task_id in self.deleted_tasks)):
+                        self.written.add(record_key(kind, value))  # Reported as a conflict by the next merge
+                    else:
+                        kept.append((kind, value))
+                changes = kept
+
+            stamps = self.journal.append(changes, self.origin)
+            self.journaled = self.journaled or bool(stamps)
+            for stamp, (kind, value) in zip(stamps, changes):
+                key = record_key(kind, value)
+                self.versions[key] = stamp
+                self.written.add(key)
+            size = self.journal.size()
+            self.scanned = (self.journal.header()[0], size)
+            if size > self.checkpoint_bytes:
+                self.checkpoint()
+
+    def checkpoint(self):
+        """
+        Fold the journal into a new full snapshot and start a new journal generation.
+        """
+        with self.lock:
+            tasks, subtasks = self.backend.load_data()  # Fast when the backend caches what it last wrote
+            entries, _ = self.journal.read()
+            tasks, subtasks = replay(tasks, subtasks, [(kind, value) for _, _, kind, value in entries])
+            self.backend.save_data(tasks, subtasks)
+            self.journal.rotate()
+        self.journaled = False
+
+    def _read_since(self, generation, offset: int):
+        """
+        Read the journal entries (of every process) after a position. Must be called with the lock held.
+        :param generation: Journal generation of the position.
+        :param offset: Byte offset in that generation.
+        :return: (entries, current generation, end offset), or None if the entries are no longer available
+                 because the journal was checkpointed twice (or replaced) since.
+        """
+        header = self.journal.header()
+        if header is None:
+            return [], generation, offset
+        if header[0] == generation:
+            entries, end = self.journal.read(offset=offset)
+            return entries, header[0], end
+        previous = self.journal.header(self.journal.previous_file)
+        if generation is None or previous is None or previous[0] != generation:
+            return None
+        entries, _ = self.journal.read(self.journal.previous_file, offset)
+        new_entries, end = self.journal.read()
+        return entries + new_entries, header[0], end
+
+    def _merged(self):
+        """
+        Reset the per-merge bookkeeping once this process is up to date with the journal.
+        """
+        self.written = set()
+        self.scanned = (self.generation, self.offset)
+        self.deleted_tasks, self.deleted_subtasks = set(), set()
+
+    def read_remote_changes(self):
+        """
+        Collect the changes other processes journaled since this process last loaded or merged.
+        An entry is skipped if this process wrote the same record later (its version stamp is newer).
+        :return: A (changes, conflicts) tuple: the (kind, value) changes to apply in order, and the keys of records
+                 that both this process and another one changed since the last merge. Returns None if this
+                 process is too far behind (two or more checkpoints) and must reload everything.
+        """
+        with self.lock.shared():
+            unread = self._read_since(self.generation, self.offset)
+            if unread is None:
+                return None
+            entries, generation, end = unread
+            if generation != self.generation:  # Caught up across a checkpoint; older stamps can be forgotten
+                self.versions = {key: stamp for key, stamp in self.versions.items() if stamp[0] >= self.generation}
+                self.generation = generation
+
+            changes, conflicts = [], []
+            for stamp, origin, kind, value in entries:
+                if origin == self.origin:
+                    continue  # Already applied when this process made the change
+                key = record_key(kind, value)
+                if self.versions.get(key, (-1, -1)) > stamp:
+                    if key in self.written:
+                        conflicts.append(key)  # Our later write wins
+                    continue
+                if key in self.written:
+                    conflicts.append(key)  # Their later write wins
+                self.versions[key] = stamp
+                changes.append((kind, value))
+            self.offset = end
+            self._merged()
+        return changes, conflicts
+
+    def reserve_ids(self, kind: str, minimum: int) -> range:
+        """
+        Reserve a block of IDs that no other process will hand out.
+        Blocks start with one ID and double (up to 1024) each time, so a process that adds a few records leaves
+        only small gaps (TaskStore reserves the next block in the background before it is needed) while bulk
+        imports do not need the lock for every record.
+        :param kind: "task" or "subtask".
+        :param minimum: Lowest acceptable ID (above every ID this process has seen).
+        :return: A range of reserved IDs.
+        """
+        with self.lock:
+            try:
+                with open(self.ids_file, encoding="utf-8") as file:
+                    next_ids = json.load(file)
+            except (FileNotFoundError, ValueError):
+                next_ids = {}
+            start = max(next_ids.get(kind, 1), minimum)
+            size = self.block_sizes[kind]
+            next_ids[kind] = start + size
+
+            def write(path):
+                with open(path, "w", encoding="utf-8") as file:
+                    json.dump(next_ids, file)
+
+            replace_atomically(self.ids_file, write)
+        self.block_sizes[kind] = min(size * 2, 1024)
+        return range(start, start + size)
+
+    def archive_directory(self):
+        """
+        Returns the archive directory of the wrapped backend.
+        """
+        return self.backend.archive_directory()
+
+    def close(self):
+        """
+        Close the wrapped backend (if it has anything to close).
+        """
+        if hasattr(self.backend, "close"):
+            self.backend.close()
@@ -1,18 +1,40 @@
 from task_manager_app import TaskManagerApp  # Import the TaskManagerApp class for handling the main application
 import tkinter as tk  # Import tkinter for creating the GUI
+import argparse  # Import argparse for command-line options
 
 if __name__ == "__main__":
     """
     This is the entry point of the application. When this script is run, 
     it initializes the Tkinter window and starts the task management app.
     """
+
+    # Parse command-line options (e.g. which storage backend to use)
+    parser = argparse.ArgumentParser(description="Task Management System")
+    parser.add_argument("--storage", choices=("excel", "sqlite"), default="excel",
+                        help="excel appends each save to a journal next to task_manager_data.xlsx and rewrites "
+                             "the workbook only at periodic checkpoints; sqlite only writes changed rows to "
+                             "task_manager_data.db (the Excel file is imported on first use)")
+    parser.add_argument("--page-size", type=int, default=None,
+                        help="only render this many task rows at a time (for very large task lists)")
+    parser.add_argument("--metrics", action="store_true",
+                        help="record load/save/refresh timings and show them in a Diagnostics tab")
+    args = parser.parse_args()
+
+    if args.metrics:
+        import metrics
+        metrics.enable()  # Before the app is created, so loading the data is measured too
+
+    storage = None  # None lets TaskManagerLogic use the default Excel file
+    if args.storage == "sqlite":
+        from sqlite_handler import SQLiteHandler
+        storage = SQLiteHandler()
     
     # Create the root Tkinter window
     root = tk.Tk()
 
     # Create an instance of TaskManagerApp, passing the root window as a parameter
     # This will initialize the app and setup the GUI.
-    app = TaskManagerApp(root)
+    app = TaskManagerApp(root, storage, args.page_size)
 
     # Start the Tkinter main event loop, which listens for user interactions and keeps the window open
     root.mainloop()
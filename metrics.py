@@ -0,0 +1,339 @@
+"""
+Opt-in, in-process instrumentation: timing spans, counters and gauges for the hot paths of the app.
+
+Instrumentation is off by default. While it is off, methods decorated with @timed are the plain
+methods (the timing wrapper is only installed on the class by enable()), and the other helpers cost one
+flag check. Turn it on with enable() (the app and the CLI do this for --metrics or TASK_MANAGER_METRICS=1).
+Recorded values are kept in REGISTRY, which can be dumped as JSON (as_dict) or in the Prometheus
+text exposition format (prometheus_text), and is shown in the app's Diagnostics tab.
+
+    @metrics.timed("logic_add_task")            # Time every call of a method
+    def add_task(self, ...): ...
+
+    with metrics.span("excel_load") as span:    # Time a block and count the rows it processed
+        ...
+        span.rows = len(tasks)
+
+    metrics.count("merge_conflicts", 2)          # Add to a counter
+    metrics.gauge("save_queue_depth", 17)        # Set a gauge to its current value
+"""
+from bisect import bisect_left  # Import bisect_left to find the histogram bucket of a duration
+import functools  # Import functools to keep the name and docstring of timed functions
+import json
+import os
+import threading  # Import threading to guard the registry against the writer and API threads
+import time
+from time import perf_counter  # Bound once: it is called twice per timed call
+
+PREFIX = "taskmanager_"  # Prefix of every metric name in the Prometheus output
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)  # Seconds
+
+enabled = os.environ.get("TASK_MANAGER_METRICS", "") not in ("", "0")  # True while metrics are recorded
+INSTRUMENTED = []  # (class, attribute, plain function, timing wrapper) for every @timed method
+
+
+class Histogram:
+    __slots__ = ("count", "total", "max", "last", "buckets", "pending")
+
+    FOLD_SIZE = 1024  # Observations collected before they are sorted into the buckets
+
+    def __init__(self):
+        """
+        Initializes an empty histogram of durations in seconds, with the bucket boundaries in BUCKETS.
+        New observations are only appended to a list and sorted into the buckets in batches (fold), which
+        keeps the cost per observation close to that of a list append.
+        """
+        self.count = 0  # Number of folded observations
+        self.total = 0.0  # Sum of the folded observations
+        self.max = 0.0  # Largest observation
+        self.last = 0.0  # Most recent observation
+        self.buckets = [0] * (len(BUCKETS) + 1)  # Observations per bucket (not cumulative); the last is +Inf
+        self.pending = []  # Observations not folded into the buckets yet
+
+    def observe(self, seconds: float):
+        """
+        Record one duration; it is sorted into the buckets with the next fold.
+        """
+        pending = self.pending
+        pending.append(seconds)
+        if len(pending) >= self.FOLD_SIZE:
+            self.fold()
+
+    def fold(self):
+        """
+        Sort the pending observations into the buckets. Called in batches and before the histogram is read.
+        """
+        values, self.pending = self.pending, []
+        if not values:
+            return
+        buckets = self.buckets
+        for seconds in values:
+            buckets[bisect_left(BUCKETS, seconds)] += 1
+        self.count += len(values)
+        self.total += sum(values)
+        self.max = max(self.max, max(values))
+        self.last = values[-1]
+
+    def clear(self):
+        """
+        Forget every observation, keeping the same object (timed functions hold on to it).
+        """
+        self.count, self.total, self.max, self.last = 0, 0.0, 0.0, 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.pending = []
+
+
+class Registry:
+    def __init__(self):
+        """
+        Initialize the Registry class.
+        This class holds every recorded metric: histograms of durations, counters (e.g. rows processed)
+        and gauges (e.g. queue depth).
+        Metrics are created under a lock; updates are not locked, because a lock would cost more than the
+        update itself. Under the GIL an update racing with another thread can at worst be lost, which is
+        acceptable for diagnostics.
+        """
+        self.histograms = {}  # Name -> Histogram of durations in seconds
+        self.counters = {}  # Name -> running total
+        self.gauges = {}  # Name -> last value set
+        self.started = time.time()  # When recording started (reset() restarts it)
+        self._lock = threading.Lock()
+
+    def histogram(self, name: str) -> Histogram:
+        """
+        Returns the histogram of durations recorded under `name`, creating it if needed.
+        The same object is kept for the lifetime of the registry, so callers may hold on to it.
+        """
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(name, Histogram())
+        return histogram
+
+    def observe(self, name: str, seconds: float, rows: int = None):
+        """
+        Record a duration, and optionally the number of rows processed in it (added to the counter `<name>_rows`).
+        """
+        self.histogram(name).observe(seconds)
+        if rows is not None:
+            self.count(name + "_rows", rows)
+
+    def count(self, name: str, value: int = 1):
+        """
+        Add a value to a counter.
+        """
+        counters = self.counters
+        counters[name] = counters.get(name, 0) + value
+
+    def gauge(self, name: str, value: float):
+        """
+        Set a gauge to its current value. The largest value ever set is kept as `<name>_max`.
+        """
+        gauges = self.gauges
+        gauges[name] = value
+        key = name + "_max"
+        if key not in gauges or value > gauges[key]:
+            gauges[key] = value
+
+    def reset(self):
+        """
+        Forget every recorded value. Histograms are emptied in place, since timed functions hold on to them.
+        """
+        with self._lock:
+            for histogram in self.histograms.values():
+                histogram.clear()
+            self.counters.clear()
+            self.gauges.clear()
+            self.started = time.time()
+
+    def as_dict(self) -> dict:
+        """
+        Returns all metrics as a JSON-serializable dictionary.
+        """
+        for histogram in list(self.histograms.values()):
+            histogram.fold()
+        histograms = {
+            name: {"count": histogram.count, "total_seconds": histogram.total,
+                   "mean_seconds": histogram.total / histogram.count if histogram.count else 0.0,
+                   "max_seconds": histogram.max, "last_seconds": histogram.last,
+                   "buckets": dict(zip([str(bound) for bound in BUCKETS] + ["+Inf"], histogram.buckets))}
+            for name, histogram in sorted(self.histograms.items())  # sorted() copies the items in one step
+        }
+        return {"enabled": enabled, "started": self.started, "uptime_seconds": time.time() - self.started,
+                "timings": histograms, "counters": dict(sorted(self.counters.items())),
+                "gauges": dict(sorted(self.gauges.items()))}
+
+    def as_json(self) -> str:
+        return json.dumps(self.as_dict(), indent=2)
+
+    def prometheus_text(self) -> str:
+        """
+        Returns all metrics in the Prometheus text exposition format (version 0.0.4).
+        Durations become `<name>_seconds` histograms, counters `<name>_total` counters.
+        """
+        lines = []
+        for name, histogram in sorted(self.histograms.items()):
+            histogram.fold()
+            metric = f"{PREFIX}{name}_seconds"
+            lines += [f"# TYPE {metric} histogram"]
+            cumulative = 0
+            for bound, count in zip(BUCKETS, list(histogram.buckets)):
+                cumulative += count
+                lines.append(f'{metric}_bucket{{le="{bound}"}} {cumulative}')
+            lines += [f'{metric}_bucket{{le="+Inf"}} {cumulative + histogram.buckets[-1]}',
+                      f"{metric}_sum {histogram.total!r}", f"{metric}_count {cumulative + histogram.buckets[-1]}"]
+        for name, value in sorted(self.counters.items()):
+            lines += [f"# TYPE {PREFIX}{name}_total counter", f"{PREFIX}{name}_total {value}"]
+        for name, value in sorted(self.gauges.items()):
+            lines += [f"# TYPE {PREFIX}{name} gauge", f"{PREFIX}{name} {value}"]
+        lines += [f"# TYPE {PREFIX}uptime_seconds gauge", f"{PREFIX}uptime_seconds {time.time() - self.started:.3f}"]
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path: str):
+        """
+        Write all metrics to a file: Prometheus text if the name ends in .prom or .txt, JSON otherwise.
+        """
+        text = self.prometheus_text() if path.endswith((".prom", ".txt")) else self.as_json()
+        with open(path, "w") as file:
+            file.write(text)
+
+
+REGISTRY = Registry()  # The registry every instrumented call records into
+
+
+def enable():
+    """
+    Start recording metrics: install the timing wrapper of every @timed method.
+    Bound methods taken before the call (e.g. callbacks already registered with Tk) keep the plain
+    version, so call this at startup, before the app is created.
+    """
+    global enabled
+    enabled = True
+    for owner, attribute, function, wrapper in INSTRUMENTED:
+        setattr(owner, attribute, wrapper)
+
+
+def disable():
+    """
+    Stop recording metrics (values recorded so far are kept) and put the plain methods back.
+    """
+    global enabled
+    enabled = False
+    for owner, attribute, function, wrapper in INSTRUMENTED:
+        setattr(owner, attribute, function)
+
+
+class Span:
+    __slots__ = ("name", "rows", "start")
+
+    def __init__(self, name: str):
+        """
+        Times a block of code. Set `rows` inside the block to also count the rows it processed.
+        """
+        self.name = name
+        self.rows = None
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        REGISTRY.observe(self.name, perf_counter() - self.start, self.rows)
+
+
+class NullSpan:
+    __slots__ = ("rows",)  # Accepts the row count and drops it
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+NULL_SPAN = NullSpan()  # Shared by every span() while instrumentation is off
+
+
+def span(name: str):
+    """
+    Returns a context manager that times its block under `name` (a no-op while instrumentation is off).
+    """
+    return Span(name) if enabled else NULL_SPAN
+
+
+class TimedMethod:
+    def __init__(self, name: str, function):
+        """
+        Placeholder that @timed puts in a class body. When the class is created, it replaces itself with the
+        plain function (or the timing wrapper, if metrics are already on) and is registered in INSTRUMENTED,
+        so enable() and disable() can swap the two. Instrumented methods therefore cost nothing while off.
+        """
+        self.function = function
+        observe_duration = REGISTRY.histogram(name).observe  # Looked up once, not on every call
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                observe_duration(perf_counter() - start)
+        self.wrapper = wrapper
+
+    def __set_name__(self, owner, attribute: str):
+        INSTRUMENTED.append((owner, attribute, self.function, self.wrapper))
+        setattr(owner, attribute, self.wrapper if enabled else self.function)
+
+
+def timed(name: str):
+    """
+    Decorator for methods that records the duration of every call under `name` while instrumentation is on.
+    """
+    return lambda function: TimedMethod(name, function)
+
+
+def observe(name: str, seconds: float):
+    """
+    Record a duration measured by the caller while instrumentation is on.
+    """
+    if enabled:
+        REGISTRY.observe(name, seconds)
+
+
+def count(name: str, value: int = 1):
+    """
+    Add a value to a counter while instrumentation is on.
+    """
+    if enabled:
+        REGISTRY.count(name, value)
+
+
+def gauge(name: str, value: float):
+    """
+    Set a gauge while instrumentation is on.
+    """
+    if enabled:
+        REGISTRY.gauge(name, value)
+
+
+class TkStallMonitor:
+    def __init__(self, root, interval: int = 100):
+        """
+        Initialize the TkStallMonitor class.
+        This class measures how long the Tk event loop is blocked: a callback is scheduled every `interval`
+        milliseconds, and the delay with which it actually runs is recorded as `tk_stall`. A long delay means
+        the UI could not react to the user (e.g. while a large table was being filled).
+        :param root: The Tk root window.
+        :param interval: Milliseconds between heartbeats.
+        """
+        self.root = root
+        self.interval = interval
+        self._expected = perf_counter() + interval / 1000
+        self.root.after(interval, self._beat)
+
+    def _beat(self):
+        now = perf_counter()
+        if enabled:
+            REGISTRY.observe("tk_stall", max(0.0, now - self._expected))
+        self._expected = now + self.interval / 1000
+        self.root.after(self.interval, self._beat)
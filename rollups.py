@@ -0,0 +1,141 @@
+from datetime import date  # Import date to recognise real due dates and to find overdue subtasks
+from task_model import Task, Subtask, is_completed  # Import the models and the completed-status check
+from task_store import StoreIndex  # Import the base class for indexes attached to the TaskStore
+
+# Positions in the per-task totals
+COUNT, COMPLETED, PROGRESS, OVERDUE = range(4)
+
+
+def subtask_progress(subtask: Subtask):
+    """
+    Returns the progress a subtask contributes to its task: its progress if that is a number,
+    otherwise 100 if it is completed and 0 if not.
+    """
+    if isinstance(subtask.progress, (int, float)):
+        return subtask.progress
+    return 100 if is_completed(subtask.status) else 0
+
+
+class TaskRollups(StoreIndex):
+    def __init__(self, today: date = None):
+        """
+        Initialize the TaskRollups class.
+        This index is attached to the TaskStore and keeps aggregates derived from the subtasks up to date on
+        every mutation, at a constant cost per added, removed or replaced record:
+        - per task: number of subtasks, completed subtasks, sum of subtask progress and overdue subtasks,
+          from which the rolled-up task progress (the average subtask progress) is read,
+        - number of subtasks per status, and of tasks per (category, status).
+        A subtask is overdue if it is not completed and its due date is before `today`. When the day changes,
+        set_today recounts the overdue subtasks once (the only step that looks at every open subtask).
+        :param today: The reference date for overdue subtasks (defaults to today's date).
+        """
+        self.today = today or date.today()
+        self.clear()
+
+    def clear(self):
+        """
+        Forget all records.
+        """
+        self.totals = {}  # Task ID -> [subtask count, completed count, progress sum, overdue count]
+        self.open_due_dates = {}  # Subtask ID -> (task ID, due date) of open subtasks with a real due date
+        self.overdue_subtasks = 0  # Number of overdue subtasks in total
+        self.subtask_status_counts = {}  # Subtask status -> number of subtasks
+        self.category_status_counts = {}  # (category, status) -> number of tasks
+
+    def task_added(self, task: Task):
+        """
+        Count the task under its category and status.
+        """
+        key = (task.category, task.status)
+        self.category_status_counts[key] = self.category_status_counts.get(key, 0) + 1
+
+    def task_removed(self, task: Task):
+        """
+        Stop counting the task under its category and status.
+        """
+        key = (task.category, task.status)
+        count = self.category_status_counts.get(key, 0) - 1
+        if count > 0:
+            self.category_status_counts[key] = count
+        else:
+            self.category_status_counts.pop(key, None)
+
+    def subtask_added(self, subtask: Subtask):
+        """
+        Add the subtask to its parent task's totals and to the subtask status and overdue counts.
+        """
+        totals = self.totals.get(subtask.task_id)
+        if totals is None:
+            totals = self.totals[subtask.task_id] = [0, 0, 0, 0]
+        totals[COUNT] += 1
+        totals[PROGRESS] += subtask_progress(subtask)
+        if is_completed(subtask.status):
+            totals[COMPLETED] += 1
+        elif isinstance(subtask.due_date, date):
+            self.open_due_dates[subtask.subtask_id] = (subtask.task_id, subtask.due_date)
+            if subtask.due_date < self.today:
+                totals[OVERDUE] += 1
+                self.overdue_subtasks += 1
+        self.subtask_status_counts[subtask.status] = self.subtask_status_counts.get(subtask.status, 0) + 1
+
+    def subtask_removed(self, subtask: Subtask):
+        """
+        Take the subtask out of its parent task's totals and the subtask status and overdue counts.
+        """
+        totals = self.totals.get(subtask.task_id)
+        if totals is None:
+            return
+        totals[COUNT] -= 1
+        totals[PROGRESS] -= subtask_progress(subtask)
+        if is_completed(subtask.status):
+            totals[COMPLETED] -= 1
+        elif self.open_due_dates.pop(subtask.subtask_id, None) is not None and subtask.due_date < self.today:
+            totals[OVERDUE] -= 1
+            self.overdue_subtasks -= 1
+        if totals[COUNT] == 0:
+            del self.totals[subtask.task_id]  # Also drops rounding left in the progress sum
+        count = self.subtask_status_counts.get(subtask.status, 0) - 1
+        if count > 0:
+            self.subtask_status_counts[subtask.status] = count
+        else:
+            self.subtask_status_counts.pop(subtask.status, None)
+
+    def set_today(self, today: date):
+        """
+        Change the reference date for overdue subtasks, recounting them if the date changed.
+        """
+        if today == self.today:
+            return
+        self.today = today
+        self.overdue_subtasks = 0
+        for totals in self.totals.values():
+            totals[OVERDUE] = 0
+        for task_id, due_date in self.open_due_dates.values():
+            if due_date < today:
+                self.totals[task_id][OVERDUE] += 1
+                self.overdue_subtasks += 1
+
+    def progress(self, task_id: int):
+        """
+        Returns the rolled-up progress of a task (the average progress of its subtasks), or None if it has none.
+        """
+        totals = self.totals.get(task_id)
+        return totals[PROGRESS] / totals[COUNT] if totals else None
+
+    def rollup(self, task_id: int) -> dict:
+        """
+        Returns the derived values of one task: subtask counts, rolled-up progress and overdue subtasks.
+        """
+        totals = self.totals.get(task_id) or [0, 0, 0, 0]
+        return {"subtasks": totals[COUNT], "completed_subtasks": totals[COMPLETED],
+                "progress": self.progress(task_id), "overdue_subtasks": totals[OVERDUE]}
+
+    def row(self, task_id: int) -> tuple:
+        """
+        Returns the derived columns shown after the task's own columns in the task table:
+        completed/total subtasks, rolled-up progress and overdue subtasks (empty if the task has no subtasks).
+        """
+        totals = self.totals.get(task_id)
+        if not totals:
+            return "", "", ""
+        return f"{totals[COMPLETED]}/{totals[COUNT]}", f"{totals[PROGRESS] / totals[COUNT]:.0f}%", totals[OVERDUE]
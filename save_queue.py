@@ -0,0 +1,160 @@
+import threading  # Import threading for the long-lived background writer
+import time  # Import time for the debounce window
+import metrics  # Import the opt-in instrumentation that records how long changes wait to be written
+
+
+class SaveQueue:
+    RETRY_DELAY = 0.5  # Seconds to wait before retrying a failed write; doubled after each further failure
+    MAX_RETRY_DELAY = 30.0  # Longest wait between retries
+
+    def __init__(self, save_func, snapshot_func, debounce: float = 0.3, max_wait: float = 5.0):
+        """
+        Initialize the SaveQueue class.
+        This class owns a single background writer thread that persists data whenever it is marked dirty.
+        Bursts of save requests that arrive within the debounce window are merged into one write,
+        and the snapshot is taken right before writing so the latest state is always persisted.
+        :param save_func: Callable that receives the snapshot arguments and writes them to disk.
+        :param snapshot_func: Callable returning a tuple of arguments for save_func (e.g. copies of the task lists).
+        :param debounce: Number of seconds to wait for further requests before writing.
+        :param max_wait: Longest time in seconds a change waits for its write while requests keep arriving.
+        """
+        self.save_func = save_func  # Function that performs the actual write
+        self.snapshot_func = snapshot_func  # Function that captures the data to write
+        self.debounce = debounce  # Quiet period used to merge bursts of requests
+        self.max_wait = max_wait  # A steady stream of requests cannot postpone the write beyond this
+
+        self.requests = 0  # Total number of save requests received
+        self.writes = 0  # Total number of writes actually performed
+        self.failures = 0  # Total number of writes that raised
+        self.last_error = None  # Exception of the last write if it failed, None once a write succeeds
+
+        self._condition = threading.Condition()  # Guards the dirty flag and wakes the writer
+        self._dirty = False  # True when there are changes that have not been written yet
+        self._writing = False  # True while the writer is inside save_func
+        self._last_request = 0.0  # Time of the most recent save request
+        self._dirty_since = 0.0  # Time of the first request that is not written yet
+        self._retry_at = 0.0  # Time before which a failed write is not retried
+        self._retry_delay = 0.0  # Current backoff after failed writes (0 while writes succeed)
+        self._closed = False  # Set when close() is called
+
+        # Start the single writer thread; it is a daemon so it never keeps the process alive on its own
+        self._thread = threading.Thread(target=self._run, name="SaveQueueWriter", daemon=True)
+        self._thread.start()
+
+    @property
+    def coalesced(self) -> int:
+        """
+        Returns the number of save requests that were merged into another write instead of causing their own.
+        """
+        with self._condition:
+            pending = 1 if self._dirty else 0
+            return max(self.requests - self.writes - pending, 0)
+
+    @property
+    def idle(self) -> bool:
+        """
+        Returns True if there is nothing waiting to be written and no write in progress.
+        """
+        with self._condition:
+            return not self._dirty and not self._writing
+
+    def request_save(self):
+        """
+        Mark the data as dirty and wake the writer.
+        This method returns immediately; the write happens in the background after the debounce window.
+        """
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("SaveQueue is closed")
+            self.requests += 1
+            if not self._dirty:
+                self._dirty_since = time.monotonic()
+            self._dirty = True
+            self._last_request = time.monotonic()
+            self._condition.notify_all()
+
+    def flush(self, timeout: float = None) -> bool:
+        """
+        Write any pending changes immediately and wait until they are on disk.
+        :param timeout: Maximum number of seconds to wait, or None to wait indefinitely.
+        If an earlier write failed, it is retried right away instead of after the backoff.
+        :return: True if everything was written, False if a write failed or the timeout expired first.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            self._last_request = 0.0  # Skip the remaining debounce window
+            self._retry_at = 0.0  # And the backoff of a failed write
+            self._condition.notify_all()
+            failures = self.failures
+            while self._dirty or self._writing:
+                if self.failures > failures:
+                    return False  # The write failed; the changes stay dirty and are retried later
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+            return self.last_error is None
+
+    def close(self, timeout: float = None) -> bool:
+        """
+        Flush pending changes and stop the writer thread.
+        :param timeout: Maximum number of seconds to wait for the final write.
+        If the final write fails, the writer still stops and the unwritten changes are reported by returning False.
+        :return: True if everything was written before the writer stopped.
+        """
+        flushed = self.flush(timeout)
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join(timeout)
+        return flushed and self.last_error is None
+
+    def _run(self):
+        """
+        Main loop of the writer thread.
+        Waits until the data is dirty, lets the debounce window pass (but no longer than max_wait since the first
+        unwritten request), then writes the latest snapshot. A failed write leaves the data dirty and is retried
+        with an exponential backoff; after close() it is not retried.
+        """
+        while True:
+            with self._condition:
+                # Sleep until there is something to write or the queue is closed
+                while not self._dirty and not self._closed:
+                    self._condition.wait()
+                if not self._dirty:
+                    return  # Closed and nothing left to write
+
+                # Wait until no new request has arrived for the whole debounce window, or max_wait has passed,
+                # and until the backoff of a failed write is over
+                while not self._closed:
+                    due = min(self._last_request + self.debounce, self._dirty_since + self.max_wait)
+                    remaining = max(due, self._retry_at) - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+
+                self._dirty = False  # Requests arriving from now on need another write
+                self._writing = True
+                dirty_since = self._dirty_since
+
+            error = None
+            try:
+                self.save_func(*self.snapshot_func())  # Take the snapshot as late as possible and write it
+                metrics.observe("save_delay", time.monotonic() - dirty_since)  # From first request to written
+            except Exception as exception:  # Keep the writer alive and retry the write
+                error = exception
+            with self._condition:
+                self._writing = False
+                self.last_error = error
+                if error is None:
+                    self.writes += 1
+                    self._retry_delay = 0.0
+                else:
+                    self.failures += 1
+                    self._dirty = True  # The changes were not written
+                    self._dirty_since = dirty_since
+                    self._retry_delay = min(max(self._retry_delay * 2, self.RETRY_DELAY), self.MAX_RETRY_DELAY)
+                    self._retry_at = time.monotonic() + self._retry_delay
+                self._condition.notify_all()
+                if error is not None and self._closed:
+                    return  # Closing: report the failure instead of retrying forever
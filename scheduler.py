@@ -0,0 +1,238 @@
+import itertools  # Import itertools for the version numbers that mark heap entries as current or stale
+from datetime import date, datetime, time, timedelta  # Import date types to turn due dates into firing times
+from heapq import heapify, heappop, heappush, nsmallest  # Import the heap operations for the deadline queue
+from task_model import Task, Subtask, is_completed  # Import the models and the completed-status check
+from task_store import StoreIndex  # Import the base class for indexes attached to the TaskStore
+
+REMINDER = "reminder"  # The deadline is `lead` away
+OVERDUE = "overdue"  # The due date has passed
+
+
+class DeadlineScheduler(StoreIndex):
+    COMPACT_MIN = 1024  # Stale heap entries tolerated before the heap is rebuilt without them
+
+    def __init__(self, lead: timedelta = timedelta(days=1), clock=datetime.now):
+        """
+        Initialize the DeadlineScheduler class.
+        This index is attached to the TaskStore and keeps the next deadline of every task and subtask that is
+        not completed and has a real due date in one heap, ordered by the time it fires. Each record goes through
+        two stages: a reminder `lead` before the start of its due date, then overdue at the end of its due date.
+        A stage whose time has already passed when the record is added (e.g. on load) is skipped, so only
+        deadlines that are reached while the app runs fire, and starting the app does not fire one event
+        for every task that was already overdue.
+        Updates cost O(log n): an added or replaced record pushes a new entry, and a removed or replaced record
+        is only forgotten in `versions`; its old entry stays in the heap and is skipped when it reaches the top
+        (lazy deletion). The heap is rebuilt once stale entries outnumber the live ones.
+        :param lead: How long before the due date the reminder fires.
+        :param clock: Callable returning the current datetime (replaceable for tests and benchmarks).
+        """
+        self.lead = lead
+        self.clock = clock
+        self.listener = None  # Called with the firing time when a record gets the earliest deadline
+        self._version = itertools.count()  # Source of unique entry versions (also breaks ties in the heap)
+        self._times = {}  # Due date -> (reminder time, overdue time); there are far fewer dates than records
+        self.clear()
+
+    def clear(self):
+        """
+        Forget all deadlines.
+        """
+        self.heap = []  # (firing time, version, (record, ID), overdue time) entries
+        self.versions = {}  # ("task"/"subtask", ID) -> version of the record's current heap entry
+        self.stale = 0  # Entries in the heap that are no longer current
+        # After clear() (i.e. while the store is being loaded) entries are appended and the heap is built once
+        self.unsorted = True
+
+    def task_added(self, task: Task):
+        """
+        Schedule the task if it is open and has a real due date.
+        """
+        if isinstance(task.due_date, date) and not is_completed(task.status):
+            self._schedule(("task", task.task_id), task.due_date)
+
+    def task_removed(self, task: Task):
+        """
+        Drop the task's deadline.
+        """
+        self._forget(("task", task.task_id))
+
+    def subtask_added(self, subtask: Subtask):
+        """
+        Schedule the subtask if it is open and has a real due date.
+        """
+        if isinstance(subtask.due_date, date) and not is_completed(subtask.status):
+            self._schedule(("subtask", subtask.subtask_id), subtask.due_date)
+
+    def subtask_removed(self, subtask: Subtask):
+        """
+        Drop the subtask's deadline.
+        """
+        self._forget(("subtask", subtask.subtask_id))
+
+    def _schedule(self, key: tuple, due_date: date):
+        """
+        Push the next stage of a record's deadline that is still in the future.
+        """
+        times = self._times.get(due_date)
+        if times is None:
+            start_of_day = datetime.combine(due_date, time())
+            times = self._times[due_date] = (start_of_day - self.lead, start_of_day + timedelta(days=1))
+        fire_at, overdue_at = times
+        now = self.clock()
+        if fire_at <= now:
+            fire_at = overdue_at  # Too late for the reminder
+            if fire_at <= now:
+                return  # Already overdue
+        self._push(key, fire_at, overdue_at)
+
+    def _push(self, key: tuple, fire_at: datetime, overdue_at: datetime):
+        """
+        Make a new heap entry the current one of a record, and tell the listener if it is now the earliest.
+        """
+        version = next(self._version)
+        self.versions[key] = version
+        entry = (fire_at, version, key, overdue_at)
+        if self.unsorted:
+            self.heap.append(entry)
+            return
+        heappush(self.heap, entry)
+        if self.listener is not None and self.heap[0] is entry:
+            self.listener(fire_at)
+
+    def _forget(self, key: tuple):
+        """
+        Drop a record's deadline; its heap entry becomes stale and is skipped later.
+        """
+        if self.versions.pop(key, None) is None:
+            return
+        self.stale += 1
+        if self.stale > self.COMPACT_MIN and self.stale > len(self.versions):
+            self.heap = [entry for entry in self.heap if self.versions.get(entry[2]) == entry[1]]
+            heapify(self.heap)
+            self.stale = 0
+
+    def ensure_heap(self):
+        """
+        Build the heap once after a bulk load; afterwards it is kept in heap order on every mutation.
+        """
+        if self.unsorted:
+            heapify(self.heap)
+            self.unsorted = False
+
+    def rebuild(self):
+        """
+        Build the heap after a bulk load and tell the listener about the earliest deadline,
+        which may be earlier than the one it was waiting for before the reload.
+        """
+        self.ensure_heap()
+        fire_at = self.next_deadline()
+        if fire_at is not None and self.listener is not None:
+            self.listener(fire_at)
+
+    def next_deadline(self):
+        """
+        Returns the time the next deadline fires, or None if nothing is scheduled.
+        """
+        self.ensure_heap()
+        heap = self.heap
+        while heap and self.versions.get(heap[0][2]) != heap[0][1]:
+            heappop(heap)  # Stale entry of a removed or changed record
+            self.stale -= 1
+        return heap[0][0] if heap else None
+
+    def pop_due(self, now: datetime = None) -> list[tuple]:
+        """
+        Remove every deadline that has been reached. A reached reminder schedules the record's overdue stage.
+        :param now: The current time (defaults to the clock).
+        :return: A list of (REMINDER or OVERDUE, ("task"/"subtask", ID)) in firing order.
+        """
+        now = now or self.clock()
+        self.ensure_heap()
+        heap = self.heap
+        fired = []
+        while heap and heap[0][0] <= now:
+            fire_at, version, key, overdue_at = heappop(heap)
+            if self.versions.get(key) != version:
+                self.stale -= 1
+                continue
+            if fire_at < overdue_at:
+                fired.append((REMINDER, key))
+                if overdue_at > now:
+                    self._push(key, overdue_at, overdue_at)
+                    continue
+                fired.append((OVERDUE, key))  # Both stages passed (e.g. the computer was asleep)
+            else:
+                fired.append((OVERDUE, key))
+            del self.versions[key]
+        return fired
+
+    def upcoming(self, limit: int = 10) -> list[tuple]:
+        """
+        Returns the next deadlines without removing them.
+        :return: A list of (firing time, REMINDER or OVERDUE, ("task"/"subtask", ID)), earliest first.
+        """
+        self.ensure_heap()
+        live = (entry for entry in self.heap if self.versions.get(entry[2]) == entry[1])
+        return [(fire_at, REMINDER if fire_at < overdue_at else OVERDUE, key)
+                for fire_at, _, key, overdue_at in nsmallest(limit, live)]
+
+    def __len__(self) -> int:
+        return len(self.versions)
+
+
+class TkDeadlineTimer:
+    MAX_WAIT = 60_000  # Longest wait in milliseconds, so a changed clock (e.g. after sleep) is noticed
+
+    def __init__(self, root, logic):
+        """
+        Initialize the TkDeadlineTimer class.
+        Fires the logic's deadlines on the Tk thread with a single root.after timer, armed for the earliest
+        deadline and re-armed only when a mutation creates an earlier one. There is no timer per task, and the
+        task list is never scanned.
+        :param root: The Tk root window.
+        :param logic: The TaskManagerLogic whose deadlines are fired (see TaskManagerLogic.fire_deadlines).
+        """
+        self.root = root
+        self.logic = logic
+        self.after_id = None  # Pending root.after callback
+        self.armed_for = None  # Time at which the pending callback runs
+        self.logic.deadlines.listener = self.on_new_deadline
+        self.arm()
+
+    def arm(self):
+        """
+        (Re)schedule the timer for the next deadline, or for MAX_WAIT from now.
+        """
+        if self.after_id is not None:
+            self.root.after_cancel(self.after_id)
+        now = datetime.now()
+        next_deadline = self.logic.deadlines.next_deadline()
+        delay = self.MAX_WAIT
+        if next_deadline is not None:
+            delay = max(0, min(delay, int((next_deadline - now).total_seconds() * 1000) + 1))
+        self.armed_for = now + timedelta(milliseconds=delay)
+        self.after_id = self.root.after(delay, self.fire)
+
+    def on_new_deadline(self, fire_at: datetime):
+        """
+        Called by the scheduler when a record gets the earliest deadline; re-arms if it is before the timer.
+        """
+        if self.armed_for is None or fire_at < self.armed_for:
+            self.arm()
+
+    def fire(self):
+        """
+        Fire the reached deadlines on the Tk thread and arm the timer for the next one.
+        """
+        self.after_id = None
+        self.logic.fire_deadlines()
+        self.arm()
+
+    def stop(self):
+        """
+        Cancel the pending timer and stop listening for new deadlines (e.g. when the window closes).
+        """
+        if self.after_id is not None:
+            self.root.after_cancel(self.after_id)
+            self.after_id = None
+        self.logic.deadlines.listener = None
@@ -0,0 +1,149 @@
+import re  # Import re to split texts into word tokens
+from bisect import bisect_left, insort  # Import bisect to keep the vocabulary sorted for prefix lookups
+from task_model import Task, Subtask  # Import the models whose texts are indexed
+from task_store import StoreIndex  # Import the base class for indexes attached to the TaskStore
+
+TOKEN_PATTERN = re.compile(r"\w+")  # Words (letters, digits and underscores, in any script)
+
+
+def tokenize(text) -> list[str]:
+    """
+    Split a text into lower-case word tokens; None gives no tokens and other values are converted to text.
+    """
+    if text is None:
+        return []
+    return TOKEN_PATTERN.findall(str(text).lower())
+
+
+class SearchIndex(StoreIndex):
+    def __init__(self):
+        """
+        Initialize the SearchIndex class.
+        This inverted index is attached to the TaskStore and updated on every mutation. It maps each word of a
+        task's name and notes and of its subtasks' names to the task, so a task is found by the words of any
+        of its subtasks too. A sorted vocabulary of all words answers prefix lookups with two bisections, so
+        a search only looks at the words that match and their tasks, never at every record.
+        """
+        self.clear()
+
+    def clear(self):
+        """
+        Forget all indexed records.
+        """
+        # Token -> {task ID: number of the task's records (the task itself, its subtasks) containing the token}
+        self.postings = {}
+        self.vocabulary = []  # Sorted tokens, for prefix lookups
+        # After clear() (i.e. while the store is being loaded) new tokens are not inserted into the vocabulary
+        # one by one; it is sorted once on first use
+        self.unsorted = True
+
+    def task_added(self, task: Task):
+        """
+        Index the words of a task's name and notes.
+        """
+        self._add(task.task_id, set(tokenize(task.name) + tokenize(task.notes)))
+
+    def task_removed(self, task: Task):
+        """
+        Forget the words of a task's name and notes.
+        """
+        self._remove(task.task_id, set(tokenize(task.name) + tokenize(task.notes)))
+
+    def subtask_added(self, subtask: Subtask):
+        """
+        Index the words of a subtask's name under its parent task.
+        """
+        self._add(subtask.task_id, set(tokenize(subtask.name)))
+
+    def subtask_removed(self, subtask: Subtask):
+        """
+        Forget the words of a subtask's name under its parent task.
+        """
+        self._remove(subtask.task_id, set(tokenize(subtask.name)))
+
+    def _add(self, task_id: int, tokens: set):
+        """
+        Count one more record of the task for each token, adding new tokens to the vocabulary.
+        """
+        postings = self.postings
+        for token in tokens:
+            ids = postings.get(token)
+            if ids is not None:
+                ids[task_id] = ids.get(task_id, 0) + 1
+                continue
+            postings[token] = {task_id: 1}
+            if not self.unsorted:
+                insort(self.vocabulary, token)
+
+    def _remove(self, task_id: int, tokens: set):
+        """
+        Count one record of the task less for each token, dropping tokens no task contains any more.
+        """
+        postings = self.postings
+        for token in tokens:
+            ids = postings.get(token)
+            if ids is None or task_id not in ids:
+                continue
+            if ids[task_id] > 1:
+                ids[task_id] -= 1  # Another record of the same task still contains the token
+                continue
+            del ids[task_id]
+            if not ids:
+                del postings[token]
+                if not self.unsorted:
+                    del self.vocabulary[bisect_left(self.vocabulary, token)]
+
+    def ensure_sorted(self):
+        """
+        Build the sorted vocabulary after a bulk load (the cost is paid once, on the first search).
+        """
+        if self.unsorted:
+            self.vocabulary = sorted(self.postings)
+            self.unsorted = False
+
+    def expand(self, term: str, prefix: bool = True) -> list[str]:
+        """
+        Returns the indexed tokens a search term matches: the term itself, and with prefix every token
+        starting with it.
+        """
+        if not prefix:
+            return [term] if term in self.postings else []
+        self.ensure_sorted()
+        vocabulary = self.vocabulary
+        start = bisect_left(vocabulary, term)
+        end = bisect_left(vocabulary, term[:-1] + chr(ord(term[-1]) + 1), start)  # First token after the prefix
+        return vocabulary[start:end]
+
+    def search(self, text: str, prefix: bool = True):
+        """
+        Find the tasks whose name, notes or subtask names contain every word of the text.
+        :param text: The search text; each of its words must match a word of the task (case-insensitive).
+        :param prefix: If True (the default), a word also matches longer words starting with it ("rep" finds
+                       "report"), so results narrow down as the user types.
+        :return: A set of task IDs, or None if the text has no words (no filter).
+        """
+        terms = set(tokenize(text))
+        if not terms:
+            return None
+        postings = self.postings
+        matches = []  # (estimated number of tasks, tokens) per term
+        for term in terms:
+            tokens = self.expand(term, prefix)
+            if not tokens:
+                return set()
+            matches.append((sum(len(postings[token]) for token in tokens), tokens))
+        matches.sort(key=lambda match: match[0])
+
+        # Start from the term with the fewest tasks, then keep the tasks matching the other terms: build a
+        # term's set of tasks if that is cheaper, otherwise look the remaining candidates up in its postings
+        _, tokens = matches[0]
+        candidates = set(postings[tokens[0]]).union(*(postings[token] for token in tokens[1:]))
+        for size, tokens in matches[1:]:
+            if not candidates:
+                break
+            if size <= len(candidates) * len(tokens):
+                candidates.intersection_update(set().union(*(postings[token] for token in tokens)))
+            else:
+                token_ids = [postings[token] for token in tokens]
+                candidates = {task_id for task_id in candidates if any(task_id in ids for ids in token_ids)}
+        return candidates
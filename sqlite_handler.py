@@ -0,0 +1,166 @@
+import os
+import sqlite3  # Import sqlite3 for the incremental storage backend
+import threading  # Import threading to share one connection between the UI and the save thread
+from datetime import date  # Import date so parsed date fields can be stored as ISO text
+from storage import StorageBackend, UPSERT_TASK, UPSERT_SUBTASK, DELETE_TASK, DELETE_SUBTASK
+from task_model import Task, Subtask  # Import Task and Subtask from task_model.py
+
+TASK_COLUMNS = Task.FIELDS  # Table columns match the row order of the model classes
+SUBTASK_COLUMNS = Subtask.FIELDS
+
+sqlite3.register_adapter(date, date.isoformat)  # Store dates as ISO text; Task/Subtask parse them back on load
+
+
+class SQLiteHandler(StorageBackend):
+    """
+    Storage backend that keeps tasks and subtasks in a SQLite database.
+    Each change only touches the affected rows, so saving costs the same no matter how many tasks exist.
+    The Excel file is used as an import/export format: it is imported the first time the database is created.
+    """
+
+    incremental = True
+
+    def __init__(self, db_file: str = "task_manager_data.db", excel_file: str = "task_manager_data.xlsx"):
+        """
+        Initialize the SQLiteHandler with the specified database file.
+        :param db_file: Path of the SQLite database file.
+        :param excel_file: Excel file imported when the database does not exist yet (ignored if missing).
+        """
+        self.db_file = db_file
+        self.excel_file = excel_file
+        self._lock = threading.Lock()  # sqlite3 connections are not safe to use from two threads at once
+        self.block_sizes = {"task": 1, "subtask": 1}  # Size of the next ID block to reserve, per kind
+
+        is_new = not os.path.exists(db_file)
+        self.connection = sqlite3.connect(db_file, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")  # Appends to a log instead of rewriting pages in place
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.create_tables()
+
+        # Import the existing Excel data the first time the database is created
+        if is_new and excel_file and os.path.exists(excel_file):
+            self.import_excel(excel_file)
+
+    def create_tables(self):
+        """
+        Create the tasks and subtasks tables if they do not exist.
+        """
+        with self._lock, self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS tasks (task_id INTEGER PRIMARY KEY, name, category, priority, "
+                "start_date, due_date, status, progress, notes)"
+            )
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS subtasks (subtask_id INTEGER PRIMARY KEY, task_id INTEGER, name, "
+                "status, progress, due_date, completed_date)"
+            )
+            self.connection.execute("CREATE INDEX IF NOT EXISTS subtasks_task_id ON subtasks (task_id)")
+            self.connection.execute("CREATE TABLE IF NOT EXISTS id_counters (kind TEXT PRIMARY KEY, next_id INTEGER)")
+
+    def load_data(self) -> tuple[list[Task], list[Subtask]]:
+        """
+        Load tasks and subtasks from the database, ordered by ID.
+        :return: A tuple containing a list of Task objects and a list of Subtask objects.
+        """
+        with self._lock:
+            self.data_version = self._data_version()  # Changes when another connection commits
+            tasks = [Task(*row) for row in self.connection.execute(
+                f"SELECT {', '.join(TASK_COLUMNS)} FROM tasks ORDER BY task_id")]
+            subtasks = [Subtask(*row) for row in self.connection.execute(
+                f"SELECT {', '.join(SUBTASK_COLUMNS)} FROM subtasks ORDER BY subtask_id")]
+        return tasks, subtasks
+
+    def save_data(self, tasks: list[Task], subtasks: list[Subtask]):
+        """
+        Replace the contents of the database with the given tasks and subtasks in one transaction.
+        :param tasks: List of Task objects to be saved.
+        :param subtasks: List of Subtask objects to be saved.
+        """
+        with self._lock, self.connection:
+            self.connection.execute("DELETE FROM tasks")
+            self.connection.execute("DELETE FROM subtasks")
+            self.connection.executemany(self._upsert_sql("tasks", TASK_COLUMNS), (t.as_row() for t in tasks))
+            self.connection.executemany(self._upsert_sql("subtasks", SUBTASK_COLUMNS), (s.as_row() for s in subtasks))
+
+    def apply_changes(self, tasks, subtasks, changes: list[tuple]):
+        """
+        Write only the changed records, in order, inside a single transaction.
+        :param tasks: Unused; the full task list is not needed by this backend.
+        :param subtasks: Unused; the full subtask list is not needed by this backend.
+        :param changes: List of (kind, value) tuples in the order they happened.
+        """
+        with self._lock, self.connection:
+            for kind, value in changes:
+                if kind == UPSERT_TASK:
+                    self.connection.execute(self._upsert_sql("tasks", TASK_COLUMNS), value.as_row())
+                elif kind == UPSERT_SUBTASK:
+                    self.connection.execute(self._upsert_sql("subtasks", SUBTASK_COLUMNS), value.as_row())
+                elif kind == DELETE_TASK:
+                    self.connection.execute("DELETE FROM tasks WHERE task_id = ?", (value,))
+                    self.connection.execute("DELETE FROM subtasks WHERE task_id = ?", (value,))
+                elif kind == DELETE_SUBTASK:
+                    self.connection.execute("DELETE FROM subtasks WHERE subtask_id = ?", (value,))
+
+    def read_remote_changes(self):
+        """
+        Reports whether another process changed the database since it was loaded.
+        SQLite does not say which rows changed, so any outside change asks for a reload (None).
+        """
+        with self._lock:
+            if self._data_version() == self.data_version:
+                return [], []
+        return None
+
+    def _data_version(self) -> int:
+        """
+        Returns SQLite's data version, which changes whenever another connection commits to the database.
+        """
+        return self.connection.execute("PRAGMA data_version").fetchone()[0]
+
+    def reserve_ids(self, kind: str, minimum: int) -> range:
+        """
+        Reserve a block of IDs that no other process using the same database will hand out.
+        The counter is bumped in a write transaction, which SQLite serializes between processes.
+        Blocks start with one ID and double (up to 1024) each time.
+        :param kind: "task" or "subtask".
+        :param minimum: Lowest acceptable ID (above every ID this process has seen).
+        :return: A range of reserved IDs.
+        """
+        table, column = ("tasks", "task_id") if kind == "task" else ("subtasks", "subtask_id")
+        size = self.block_sizes[kind]
+        with self._lock, self.connection:
+            self.connection.execute("INSERT OR IGNORE INTO id_counters VALUES (?, 1)", (kind,))  # Takes the write lock
+            self.connection.execute(
+                f"UPDATE id_counters SET next_id = max(next_id, ?, (SELECT coalesce(max({column}), 0) + 1 FROM {table}))"
+                " + ? WHERE kind = ?", (minimum, size, kind))
+            end = self.connection.execute("SELECT next_id FROM id_counters WHERE kind = ?", (kind,)).fetchone()[0]
+        self.block_sizes[kind] = min(size * 2, 1024)
+        return range(end - size, end)
+
+    def archive_directory(self) -> str:
+        """
+        Returns the directory of the archive shards ('<db_file>.archive').
+        """
+        return self.db_file + ".archive"
+
+    def import_excel(self, excel_file: str):
+        """
+        Replace the database contents with the data of an Excel file in the ExcelHandler format.
+        :param excel_file: Path of the Excel file to import.
+        """
+        from excel_handler import ExcelHandler  # Imported here so openpyxl is only needed for Excel import/export
+        self.save_data(*ExcelHandler(excel_file, cache=False).load_data())
+
+    def close(self):
+        """
+        Close the database connection.
+        """
+        with self._lock:
+            self.connection.close()
+
+    @staticmethod
+    def _upsert_sql(table: str, columns: tuple) -> str:
+        """
+        Build an INSERT OR REPLACE statement for the given table and columns.
+        """
+        return f"INSERT OR REPLACE INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
@@ -0,0 +1,162 @@
+import os
+import stat  # Import stat to copy the permission bits of a replaced file
+import tempfile  # Import tempfile to create the temporary file that replaces the data file
+from task_model import Task, Subtask  # Import Task and Subtask from task_model.py
+
+# Kinds of changes recorded by TaskManagerLogic and passed to StorageBackend.apply_changes
+UPSERT_TASK = "upsert_task"  # Value is a Task object that was added or modified
+UPSERT_SUBTASK = "upsert_subtask"  # Value is a Subtask object that was added or modified
+DELETE_TASK = "delete_task"  # Value is the ID of a deleted task (its subtasks are deleted too)
+DELETE_SUBTASK = "delete_subtask"  # Value is the ID of a deleted subtask
+
+UMASK = os.umask(0o022)  # The process umask (os.umask can only be read by setting it, so it is read once here)
+os.umask(UMASK)
+
+
+class StorageBackend:
+    """
+    Base class for the storage backends used by TaskManagerLogic.
+    A backend must be able to load everything and save a full snapshot. Backends that can write
+    single records set `incremental` to True and override apply_changes, so that they only
+    receive the changed records instead of the whole dataset.
+    """
+
+    incremental = False  # True if apply_changes does not need the full task and subtask lists
+
+    def load_data(self) -> tuple[list[Task], list[Subtask]]:
+        """
+        Load all tasks and subtasks.
+        :return: A tuple containing a list of Task objects and a list of Subtask objects.
+        """
+        raise NotImplementedError
+
+    def load_chunks(self, chunk_size: int = 1000):
+        """
+        Load all tasks and subtasks in chunks, so a caller (e.g. a background loader) can show the first
+        records before the rest has been read. Backends that read records one at a time override this;
+        the default loads everything with load_data and splits it up.
+        :param chunk_size: Maximum number of records in each chunk.
+        :return: A generator of (tasks, subtasks, changes) tuples: records to add, then (kind, value) changes
+                 to apply on top of everything before them (e.g. journal entries). All tasks come before the subtasks.
+        """
+        yield from split_chunks(*self.load_data(), chunk_size)
+
+    def save_data(self, tasks: list[Task], subtasks: list[Subtask]):
+        """
+        Replace the stored data with the given tasks and subtasks.
+        :param tasks: List of Task objects to be saved.
+        :param subtasks: List of Subtask objects to be saved.
+        """
+        raise NotImplementedError
+
+    def wants_snapshot(self) -> bool:
+        """
+        Returns True if the next apply_changes call needs the full task and subtask lists.
+        Incremental backends normally do not, but may ask for them from time to time (e.g. to write a checkpoint).
+        """
+        return not self.incremental
+
+    def needs_checkpoint(self) -> bool:
+        """
+        Returns True if changes this process made were only persisted in a cheaper form (e.g. a journal) and
+        enough of them piled up that they should be written as a full snapshot before the application exits.
+        """
+        return False
+
+    def checkpoint(self):
+        """
+        Write the changes that needs_checkpoint() reported as a full snapshot.
+        """
+
+    def read_remote_changes(self):
+        """
+        Collect changes saved by other processes since this process loaded the data or last called this method.
+        Backends that are not shared between processes have none.
+        :return: A (changes, conflicts) tuple of (kind, value) changes to apply and ("task"/"subtask", ID) keys of
+                 records changed both here and elsewhere, or None if everything must be reloaded.
+        """
+        return [], []
+
+    def reserve_ids(self, kind: str, minimum: int):
+        """
+        Reserve a block of new IDs that no other process will use.
+        :param kind: "task" or "subtask".
+        :param minimum: Lowest acceptable ID.
+        :return: A range of IDs, or None if the backend is not shared and the store's own counter can be used.
+        """
+        return None
+
+    def archive_directory(self):
+        """
+        Returns the directory that holds the archive shards of this data (see archive.py), or None if the
+        backend has no place for an archive.
+        """
+        return None
+
+    def apply_changes(self, tasks, subtasks, changes: list[tuple]):
+        """
+        Persist a batch of changes.
+        The default implementation rewrites the full snapshot; incremental backends only write `changes`.
+        :param tasks: List of all Task objects, or None for incremental backends.
+        :param subtasks: List of all Subtask objects, or None for incremental backends.
+        :param changes: List of (kind, value) tuples in the order they happened.
+        """
+        self.save_data(tasks, subtasks)
+
+
+def split_chunks(tasks: list[Task], subtasks: list[Subtask], chunk_size: int):
+    """
+    Split loaded tasks and subtasks into (tasks, subtasks, changes) chunks in the format of load_chunks.
+    """
+    for start in range(0, len(tasks), chunk_size):
+        yield tasks[start:start + chunk_size], [], []
+    for start in range(0, len(subtasks), chunk_size):
+        yield [], subtasks[start:start + chunk_size], []
+
+
+def replace_atomically(path: str, write):
+    """
+    Write a file through a temporary file in the same directory and rename it over the original.
+    Readers see either the old or the new contents, never a partly written file, even if the process
+    is killed halfway through the write. The new file keeps the permissions of the file it replaces; a new
+    file gets the usual permissions for the umask (mkstemp alone would make it readable by the owner only).
+    :param path: The file to create or replace.
+    :param write: Callable that receives the temporary path and writes the complete new contents to it.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    descriptor, temp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp", dir=directory)
+    os.close(descriptor)
+    try:
+        write(temp_path)
+        os.chmod(temp_path, file_mode(path))
+        with open(temp_path, "rb+") as file:
+            os.fsync(file.fileno())  # The data must be on disk before the rename makes it visible
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    fsync_directory(directory)
+
+
+def file_mode(path: str) -> int:
+    """
+    Returns the permission bits of a file, or those a newly created file gets if it does not exist.
+    """
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        return 0o666 & ~UMASK
+
+
+def fsync_directory(directory: str):
+    """
+    Flush a directory entry change (e.g. a rename) to disk. Not supported (and not needed) on Windows.
+    """
+    if os.name == "nt":
+        return
+    descriptor = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(descriptor)
+    finally:
+        os.close(descriptor)
@@ -2,30 +2,169 @@ import tkinter as tk  # Import tkinter for creating the GUI
 from tkinter import ttk, messagebox  # Import ttk for advanced widgets and messagebox for alerts
 from task_manager_logic import TaskManagerLogic  # Import business logic for managing tasks and subtasks
 from task_view import TaskView  # Import the task view to display tasks and subtasks
+import events  # Import the event kinds and the dispatcher that delivers logic events on the Tk thread
+import metrics  # Import the opt-in instrumentation (Diagnostics tab and Tk stall monitor when enabled)
+from background_loader import BackgroundLoader  # Import the loader that fills the views while the file is read
+from scheduler import TkDeadlineTimer  # Import the single timer that fires due-date reminders on the Tk thread
 
 class TaskManagerApp:
-    def __init__(self, root):
+    MERGE_INTERVAL = 2000  # Milliseconds between checks for changes saved by other processes
+
+    def __init__(self, root, storage=None, page_size: int = None, background_load: bool = True):
         """
         Initialize the TaskManagerApp class.
         This sets up the main GUI window, logic handler, and the notebook (tab container).
+        :param root: The Tkinter root window.
+        :param storage: Optional StorageBackend passed to TaskManagerLogic (defaults to the Excel file).
+        :param page_size: If set, the task table only renders this many rows at a time (see TaskView).
+        :param background_load: If True (the default), the window is shown right away and the data is read on a
+                                worker thread and added to the views in chunks, with a progress bar.
         """
         self.root = root
         self.root.title("Task Management System")  # Set window title
         self.root.geometry("800x600")  # Set default window size
 
-        # Create the logic handler to manage tasks and subtasks
-        self.logic = TaskManagerLogic()
+        # Create the logic handler to manage tasks and subtasks (empty for now when loading in the background)
+        self.logic = TaskManagerLogic(storage, load=not background_load)
 
         # Create the notebook (tab container) for organizing the tabs
         self.notebook = ttk.Notebook(self.root)
         self.notebook.pack(expand=True, fill="both")  # Make the notebook fill the window
 
         # Create task viewer tab (displays tasks and subtasks)
-        self.task_view = TaskView(self.notebook, self.logic)
+        self.task_view = TaskView(self.notebook, self.logic, page_size)
+
+        # Deliver change events from the logic to the views in one batch per Tk idle cycle
+        self.dispatcher = events.TkEventDispatcher(self.root, self.logic.events)
+        self.dispatcher.subscribe(self.task_view.apply_events)
+        self.dispatcher.subscribe(self.on_events)
 
         # Initialize the Insert Task tab (for adding tasks and subtasks)
         self.init_insert_tab()
 
+        # With instrumentation on, show the recorded timings and measure how long the event loop is blocked
+        if metrics.enabled:
+            from diagnostics_view import DiagnosticsView
+            self.diagnostics_view = DiagnosticsView(self.notebook)
+            self.stall_monitor = metrics.TkStallMonitor(self.root)
+
+        # Make sure pending saves are written before the window closes
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+
+        self.loader = None  # BackgroundLoader while the data is being loaded
+        self.deadline_timer = None  # TkDeadlineTimer once the data is loaded
+        self.save_warning_shown = False  # True after warning about a failed save, until a save succeeds again
+        self.merge_warning_shown = False  # True after warning about a failed merge, until a merge succeeds again
+        if background_load:
+            self.init_progress_bar()
+            self.loader = BackgroundLoader(self.root, self.logic, self.on_load_progress, self.on_loaded)
+        else:
+            self.on_loaded(None)
+
+    def init_progress_bar(self):
+        """
+        Shows a progress bar with the number of records loaded so far at the bottom of the window.
+        The total is not known until the whole file has been read, so the bar only shows activity.
+        """
+        self.progress_frame = tk.Frame(self.root)
+        self.progress_frame.pack(side="bottom", fill="x", before=self.notebook)
+        self.progress_bar = ttk.Progressbar(self.progress_frame, mode="indeterminate", length=200)
+        self.progress_bar.pack(side="left", padx=10, pady=4)
+        self.progress_bar.start(20)
+        self.progress_label = tk.Label(self.progress_frame, text="Loading tasks...")
+        self.progress_label.pack(side="left")
+
+    def on_load_progress(self, tasks: int, subtasks: int):
+        """Shows how many records have been loaded so far."""
+        self.progress_label.config(text=f"Loading... {tasks:,} tasks, {subtasks:,} subtasks")
+
+    def on_loaded(self, error):
+        """
+        Called when all data has been loaded (error is None) or loading failed.
+        A failed load closes the window, so a partly loaded data set is never saved over the file.
+        """
+        self.loader = None
+        if error is not None:
+            messagebox.showerror("Load Error", f"Could not load tasks: {error}")
+            self.root.destroy()
+            return
+        if hasattr(self, "progress_frame"):
+            self.progress_frame.destroy()
+        # Pick up tasks that other users added or changed in the same data file
+        self.root.after(self.MERGE_INTERVAL, self.merge_remote_changes)
+        # Remind the user of due dates with one timer for the earliest deadline
+        self.deadline_timer = TkDeadlineTimer(self.root, self.logic)
+
+    def on_events(self, batch: list):
+        """
+        Warns the user when the background writer could not save the data or another user edited the same task,
+        and shows the due-date reminders and newly overdue tasks and subtasks.
+        """
+        for event in batch:
+            if event.kind == events.SAVE_COMPLETED:
+                self.save_warning_shown = False
+            elif event.kind == events.SAVE_FAILED and not self.save_warning_shown:
+                # Warn once; the background writer keeps retrying until a save succeeds
+                self.save_warning_shown = True
+                messagebox.showwarning("Save Error", f"Could not save tasks: {event.error}")
+        conflicts = [event for event in batch if event.kind == events.MERGE_CONFLICT]
+        if conflicts:
+            names = ", ".join(f"task {event.task_id}" if event.task_id is not None else f"subtask {event.subtask_id}"
+                              for event in conflicts[:5])
+            messagebox.showwarning("Edit Conflict", f"Another user changed the same records ({names}). "
+                                                    "The most recently saved version was kept.")
+        lines = []
+        for kind, label in ((events.DEADLINE_OVERDUE, "Overdue"), (events.DEADLINE_REMINDER, "Due soon")):
+            deadlines = [event for event in batch if event.kind == kind]
+            if deadlines:
+                names = ", ".join(self.deadline_name(event) for event in deadlines[:5])
+                more = f" and {len(deadlines) - 5} more" if len(deadlines) > 5 else ""
+                lines.append(f"{label}: {names}{more}")
+        if lines:
+            messagebox.showinfo("Reminder", "\n".join(lines))
+
+    def deadline_name(self, event: events.Event) -> str:
+        """Returns the name of the task or subtask of a deadline event, for the reminder message."""
+        task = self.logic.get_task(event.task_id)
+        if event.subtask_id is None:
+            return f"'{task.name}'" if task is not None else f"task {event.task_id}"
+        subtask = self.logic.store.get_subtask(event.subtask_id)
+        return f"'{subtask.name}'" if subtask is not None else f"subtask {event.subtask_id}"
+
+    def merge_remote_changes(self):
+        """
+        Merges changes saved by other processes, then schedules the next check.
+        A failure is shown once; the merge keeps being retried and the warning is shown again only after a merge
+        has succeeded in between.
+        """
+        try:
+            self.logic.merge_remote_changes()
+            self.merge_warning_shown = False
+        except Exception as error:  # Keep checking; a busy or unreadable file is retried next time
+            if not self.merge_warning_shown:
+                self.merge_warning_shown = True
+                messagebox.showwarning("Merge Error", f"Could not load the changes of other users: {error}\n"
+                                                      "The app keeps trying in the background.")
+        self.root.after(self.MERGE_INTERVAL, self.merge_remote_changes)
+
+    def on_close(self):
+        """
+        Flushes any pending saves and then closes the main window.
+        If the data could not be saved, the window stays open (and the writer keeps retrying) unless the user
+        chooses to close it anyway and lose the unsaved changes.
+        """
+        if not self.logic.flush() and not messagebox.askyesno(
+                "Save Error", f"Could not save tasks: {self.logic.save_error}\n\n"
+                              "Close anyway? Changes that were not saved will be lost.",
+                icon="warning", default="no"):
+            return
+        if self.loader is not None:
+            self.loader.cancel()  # Nothing was changed yet; stop reading the file
+        if self.deadline_timer is not None:
+            self.deadline_timer.stop()
+        self.logic.close()  # Wait for the background writer to persist the latest data
+        self.root.destroy()
+
     def init_insert_tab(self):
         """
         Initializes the task and subtask insertion form tab.
@@ -134,14 +273,17 @@ class TaskManagerApp:
             "notes": self.entry_notes.get()
         }
 
+        if self.logic.loading:
+            messagebox.showinfo("Loading", "Please wait until all tasks are loaded.")
+            return
+
         # Validate that required fields (name, category, start date, due date) are filled
         if not task_data["name"] or not task_data["category"] or not task_data["start_date"] or not task_data["due_date"]:
             messagebox.showwarning("Input Error", "Please fill out all required fields.")
             return
 
-        # Add the task using TaskManagerLogic and refresh the task view
+        # Add the task using TaskManagerLogic; the task view updates itself from the change event
         self.logic.add_task(task_data)
-        self.task_view.refresh_task_table()  # Update the task table with the new task
         messagebox.showinfo("Success", "Task added successfully.")  # Show success message
 
     def add_subtask(self):
@@ -156,22 +298,23 @@ class TaskManagerApp:
             "completed_date": self.entry_subtask_completed_date.get()
         }
 
+        if self.logic.loading:
+            messagebox.showinfo("Loading", "Please wait until all tasks are loaded.")
+            return
+
         # Validate that required fields (task ID, name, status) are filled
         if not subtask_data["task_id"] or not subtask_data["name"] or not subtask_data["status"]:
             messagebox.showwarning("Input Error", "Please fill out all required fields.")
             return
 
-        # Validate if the Task ID exists by checking the list of tasks
-        if not any(task.task_id == subtask_data["task_id"] for task in self.logic.tasks):
+        # Validate if the Task ID exists
+        if not self.logic.task_exists(subtask_data["task_id"]):
             messagebox.showwarning("Error", "Task ID does not exist.")
             return
 
-        # Add the subtask using TaskManagerLogic
+        # Add the subtask using TaskManagerLogic; the task view updates itself from the change event
         self.logic.add_subtask(subtask_data)
 
-        # Refresh the task view to reflect the new subtask in the task table
-        self.task_view.refresh_task_table()
-
         # Display success message
         messagebox.showinfo("Success", "Subtask added successfully.")
 
@@ -1,84 +1,733 @@
-from excel_handler import ExcelHandler  # Import the class responsible for handling Excel file operations
-from task_model import Task, Subtask  # Import the Task and Subtask models
-import threading  # Import threading for background saving operations
+from datetime import date, datetime, timedelta  # Import date types for the archive cut-off and deadlines
+from task_model import Task, Subtask, is_completed  # Import the Task and Subtask models and the completed-status check
+from save_queue import SaveQueue  # Import the single background writer used for saving
+from task_store import TaskStore  # Import the indexed in-memory store for tasks and subtasks
+from task_query import TaskIndex, TaskQuery, sort_tasks  # Import the secondary indexes and the query engine built on them
+from archive import Archive  # Import the dated shards that archived tasks are moved to
+from rollups import TaskRollups  # Import the aggregates derived from subtasks (rolled-up progress, overdue subtasks)
+from scheduler import DeadlineScheduler, REMINDER  # Import the heap of upcoming due-date reminders and overdue times
+from search_index import SearchIndex  # Import the inverted index for full-text search over names and notes
+from storage import UPSERT_TASK, UPSERT_SUBTASK, DELETE_TASK, DELETE_SUBTASK  # Kinds of recorded changes
+import events  # Import the change events published to the views
+import metrics  # Import the opt-in instrumentation that times mutations and saves
+import os  # Import os to check that an imported file exists
+import threading  # Import threading to guard the list of pending changes
+
+
+def check_changes(changes: dict, fields: tuple, required: tuple, kind: str):
+    """
+    Validate the attributes passed to an update: every key must be an attribute of the record (other than
+    its ID), and required attributes must not be set to an empty value.
+    :raises ValueError: If a key is unknown or a required attribute would become empty.
+    """
+    unknown = [field for field in changes if field not in fields]
+    if unknown:
+        raise ValueError(f"unknown {kind} field(s): {', '.join(unknown)}")
+    emptied = [field for field in required if field in changes and changes[field] in (None, "")]
+    if emptied:
+        raise ValueError(f"missing required {kind} field(s): {', '.join(emptied)}")
+
+
+def import_values(row, fields: tuple) -> dict:
+    """
+    Returns the values of the given fields from an imported record. Missing and null values become empty strings;
+    other falsy values (e.g. a progress of 0) are kept.
+    :raises ValueError: If the record is not a mapping of field names to values (e.g. a JSON array or number).
+    """
+    if not isinstance(row, dict):
+        raise ValueError(f"expected an object with named fields, got {type(row).__name__}")
+    values = {}
+    for field in fields:
+        value = row.get(field)
+        values[field] = "" if value is None else value
+    return values
+
 
 class TaskManagerLogic:
-    def __init__(self):
+    ARCHIVE_AFTER_DAYS = 90  # Completed tasks due more than this many days ago are archived by default
+    TASK_REQUIRED = ("name", "category", "start_date", "due_date")  # Task fields that must not be empty
+    SUBTASK_REQUIRED = ("task_id", "name", "status")  # Subtask fields that must not be empty
+
+    def __init__(self, storage=None, archive: Archive = None, load: bool = True):
         """
         Initialize the TaskManagerLogic class.
-        This class manages the tasks and subtasks in memory and interacts with the ExcelHandler for data persistence.
+        This class manages the tasks and subtasks in memory and interacts with a storage backend for data persistence.
+        :param storage: The StorageBackend to use. Defaults to an ExcelHandler for 'task_manager_data.xlsx'
+                        behind a write-ahead journal.
+        :param archive: The Archive that archive_tasks moves old tasks to. Defaults to the storage backend's
+                        archive directory (e.g. 'task_manager_data.xlsx.archive').
+        :param load: If False, nothing is loaded yet; the data is then loaded in chunks with begin_loading,
+                     iter_load_chunks, load_chunk and finish_loading (see background_loader.py).
         """
-        self.excel_handler = ExcelHandler()  # Create an instance of ExcelHandler to manage Excel file I/O
-        self.tasks = []  # List to hold all tasks
-        self.subtasks = []  # List to hold all subtasks
-        self.load_data()  # Load existing tasks and subtasks from the Excel file
+        if storage is None:
+            from excel_handler import ExcelHandler  # Import the class responsible for handling Excel file operations
+            from journal import JournaledStorage  # Import the journal that makes saves to the Excel file cheap
+            storage = JournaledStorage(ExcelHandler())  # Create an instance of ExcelHandler to manage Excel file I/O
+        self.storage = storage  # Backend used to load and save tasks and subtasks
+        if archive is None and self.storage.archive_directory():
+            archive = Archive(self.storage.archive_directory())
+        self.archive = archive  # Archived tasks in dated shards, only read when queried (None if there is no archive)
+        self.store = TaskStore()  # Tasks and subtasks indexed by ID and by parent task
+        self.task_index = TaskIndex()  # Secondary indexes (status, category, priority, dates) updated on mutation
+        self.store.add_index(self.task_index)
+        self.rollups = TaskRollups()  # Per-task subtask progress and overdue counts, updated on mutation
+        self.store.add_index(self.rollups)
+        self.deadlines = DeadlineScheduler()  # Next reminder/overdue time of open records, updated on mutation
+        self.store.add_index(self.deadlines)
+        self.search_index = SearchIndex()  # Words of task names, notes and subtask names, updated on mutation
+        self.store.add_index(self.search_index)
+        self.store.reserve_ids = self.storage.reserve_ids  # Shared backends hand out IDs no other process uses
+        # Filter, search, sort and aggregate queries over the indexes
+        self.queries = TaskQuery(self.store, self.task_index, self.search_index)
+        self.events = events.EventBus()  # Publishes change events (task added, subtask deleted, ...) to the views
+        self._pending_changes = []  # Changes made since the last save, in order
+        self._changes_lock = threading.Lock()  # Guards _pending_changes between the UI and the writer thread
+        self.save_error = None  # Exception of the last failed save or checkpoint, None once a save succeeds
+        self.loading = False  # True between begin_loading and finish_loading
+        if load:
+            self.load_data()  # Load existing tasks and subtasks from the storage backend
 
+        # Single background writer that merges bursts of mutations into one write
+        self.save_queue = SaveQueue(self.write_snapshot, self.snapshot)
+
+    @metrics.timed("logic_load_data")
     def load_data(self):
         """
-        Load tasks and subtasks from the Excel file using ExcelHandler.
+        Load tasks and subtasks using the storage backend.
         This method initializes the task and subtask lists with data from the file.
         """
-        self.tasks, self.subtasks = self.excel_handler.load_data()  # Load data from the Excel file
+        self.store.load(*self.storage.load_data())  # Load data from the storage backend
+        self._skip_archived_ids()
+        with self._changes_lock:
+            self._pending_changes = []  # Anything not yet saved was replaced by the reloaded data
+        self.deadlines.rebuild()
+        self.events.publish(events.BULK_RELOAD)
+
+    def _skip_archived_ids(self):
+        """
+        Move the ID counters past the IDs of archived records, so they are never handed out again.
+        """
+        if self.archive is not None:
+            manifest = self.archive.manifest()  # Only the small manifest is read; the shards stay on disk
+            self.store.next_task_id = max(self.store.next_task_id, manifest["next_task_id"])
+            self.store.next_subtask_id = max(self.store.next_subtask_id, manifest["next_subtask_id"])
+
+    def begin_loading(self):
+        """
+        Start loading the data in chunks: empty the store and tell the views (BULK_RELOAD).
+        Records are then added with load_chunk as they arrive, and finish_loading completes the load.
+        """
+        self.loading = True
+        self.store.load([], [])
+        with self._changes_lock:
+            self._pending_changes = []
+        self.events.publish(events.BULK_RELOAD)
+
+    def iter_load_chunks(self, chunk_size: int = 1000):
+        """
+        Read the data from the storage backend in chunks (see StorageBackend.load_chunks).
+        This only reads storage and does not touch the store, so it may run on a worker thread; the chunks must
+        be passed to load_chunk on the thread that uses the logic (e.g. the Tk thread).
+        :return: A generator of (tasks, subtasks, changes) tuples.
+        """
+        return self.storage.load_chunks(chunk_size)
+
+    @metrics.timed("logic_load_chunk")
+    def load_chunk(self, tasks: list[Task], subtasks: list[Subtask], changes: list[tuple] = ()):
+        """
+        Add a chunk of loaded records to the store and publish TASK_ADDED/SUBTASK_ADDED events for them,
+        so the views grow with each chunk instead of being rebuilt. Changes (e.g. journal entries) are applied
+        on top of the records loaded so far, as in merge_remote_changes.
+        """
+        for task in tasks:
+            self.store.add_task(task)
+            self.events.publish(events.TASK_ADDED, task.task_id)
+        for subtask in subtasks:
+            self.store.add_subtask(subtask)
+            self.events.publish(events.SUBTASK_ADDED, subtask.task_id, subtask.subtask_id)
+        self._apply_changes(changes)
+
+    def finish_loading(self):
+        """
+        Complete a load started with begin_loading.
+        """
+        self._skip_archived_ids()
+        self.deadlines.rebuild()
+        self.loading = False
+
+    @metrics.timed("logic_merge_remote_changes")
+    def merge_remote_changes(self) -> bool:
+        """
+        Fold in the changes other processes saved to the same data since it was loaded or last merged,
+        without reloading everything. Each merged change is published like a local one, so the views update;
+        records changed both here and elsewhere are published as MERGE_CONFLICT (the later write wins).
+        Nothing is merged while local changes are still waiting to be written.
+        :return: True if the merge ran, False if it should be retried later.
+        """
+        if not self.save_queue.idle:
+            return False
+        result = self.storage.read_remote_changes()
+        if result is None:
+            self.load_data()  # Too far behind the other processes: reload everything
+            return True
+        changes, conflicts = result
+        self._apply_changes(changes)
+        for record, record_id in conflicts:
+            if record == "task":
+                self.events.publish(events.MERGE_CONFLICT, record_id)
+            else:
+                self.events.publish(events.MERGE_CONFLICT, subtask_id=record_id)
+        return True
+
+    def _apply_changes(self, changes: list[tuple]):
+        """
+        Apply (kind, value) changes read from storage to the store and publish them like local changes.
+        A subtask whose parent task does not exist (any more) is skipped.
+        """
+        for kind, value in changes:
+            if kind == UPSERT_TASK:
+                existed = self.store.has_task(value.task_id)
+                self.store.add_task(value)
+                self.events.publish(events.TASK_UPDATED if existed else events.TASK_ADDED, value.task_id)
+            elif kind == UPSERT_SUBTASK:
+                if not self.store.has_task(value.task_id):
+                    continue  # The parent task was deleted here in the meantime
+                old_subtask = self.store.get_subtask(value.subtask_id)
+                self.store.add_subtask(value)
+                if old_subtask is None:
+                    self.events.publish(events.SUBTASK_ADDED, value.task_id, value.subtask_id)
+                elif old_subtask.task_id != value.task_id:
+                    self.events.publish(events.SUBTASK_DELETED, old_subtask.task_id, value.subtask_id)
+                    self.events.publish(events.SUBTASK_ADDED, value.task_id, value.subtask_id)
+                else:
+                    self.events.publish(events.SUBTASK_UPDATED, value.task_id, value.subtask_id)
+            elif kind == DELETE_TASK:
+                task, _ = self.store.remove_task(value)
+                if task is not None:
+                    self.events.publish(events.TASK_DELETED, value)
+            else:
+                subtask = self.store.remove_subtask(value)
+                if subtask is not None:
+                    self.events.publish(events.SUBTASK_DELETED, subtask.task_id, value)
+
+    @property
+    def tasks(self):
+        """
+        Returns an iterable view of all tasks, in the order they were loaded or added.
+        """
+        return self.store.tasks
+
+    @property
+    def subtasks(self):
+        """
+        Returns an iterable view of all subtasks, in the order they were loaded or added.
+        """
+        return self.store.subtasks
+
+    def get_task(self, task_id: int):
+        """
+        Returns the task with the given ID, or None if it does not exist.
+        """
+        return self.store.get_task(task_id)
+
+    def task_exists(self, task_id: int) -> bool:
+        """
+        Returns True if a task with the given ID exists.
+        """
+        return self.store.has_task(task_id)
+
+    def get_task_ids(self) -> list[int]:
+        """
+        Returns the IDs of all tasks, in the same order as the tasks property.
+        """
+        return list(self.store.tasks_by_id)
+
+    def get_subtasks(self, task_id: int):
+        """
+        Returns an iterable view of the subtasks that belong to the given task.
+        """
+        return self.store.subtasks_of(task_id)
+
+    def query(self, include_archive: bool = False, **filters) -> list[Task]:
+        """
+        Find tasks by status, category, priority and due/start date ranges, optionally sorted and limited.
+        See TaskQuery.query for the accepted filters.
+        :param include_archive: If True, archived tasks are searched too (loading the shards the filters need).
+        :return: A list of matching Task objects.
+        """
+        tasks = self.queries.query(**filters)
+        if include_archive and self.archive is not None:
+            # A task can be in both places after a crash while it was being archived; the active copy wins
+            archived = [task for task in self.archive.query(**filters) if not self.store.has_task(task.task_id)]
+            if archived:
+                tasks = sort_tasks(sorted(tasks + archived, key=lambda task: task.task_id), filters.get("sort"))
+                if filters.get("limit") is not None:
+                    tasks = tasks[:filters["limit"]]
+        return tasks
+
+    def search(self, text: str, limit: int = None, include_archive: bool = False) -> list[Task]:
+        """
+        Find the tasks whose name, notes or subtask names contain every word of the text, as whole words or
+        as word prefixes ("rep draft" finds a task "Write report" with a subtask "First draft").
+        The search is answered from the inverted index, without scanning the tasks.
+        :param limit: Maximum number of tasks to return.
+        :param include_archive: If True, archived tasks are searched too.
+        :return: A list of matching Task objects in ID order (every task if the text has no words).
+        """
+        return self.query(include_archive=include_archive, text=text, limit=limit)
+
+    def get_archived_subtasks(self, task: Task) -> list[Subtask]:
+        """
+        Returns the subtasks of an archived task (e.g. one returned by query(include_archive=True)).
+        """
+        return [] if self.archive is None else self.archive.subtasks_of(task)
+
+    def archive_stats(self) -> dict:
+        """
+        Returns the number of archived tasks, subtasks and shards (all zero if there is no archive).
+        """
+        return {"tasks": 0, "subtasks": 0, "shards": 0} if self.archive is None else self.archive.stats()
+
+    def category_progress(self) -> dict:
+        """
+        Returns per-category task counts and average numeric progress.
+        """
+        return self.queries.category_progress()
+
+    def count_by(self, field: str) -> dict:
+        """
+        Returns the number of tasks per value of status, category or priority.
+        """
+        return self.queries.count_by(field)
+
+    def overdue_count(self, today=None) -> int:
+        """
+        Returns the number of tasks that are not completed and are past their due date.
+        :param today: The reference date (defaults to today's date).
+        """
+        return self.queries.overdue_count(today)
+
+    def task_rollup(self, task_id: int) -> dict:
+        """
+        Returns the values derived from a task's subtasks: number of subtasks, completed subtasks,
+        rolled-up progress (average subtask progress, None without subtasks) and overdue subtasks.
+        """
+        self.rollups.set_today(date.today())
+        return self.rollups.rollup(task_id)
+
+    def dashboard(self, today: date = None) -> dict:
+        """
+        Returns the aggregates shown on dashboards, read from the incrementally maintained indexes:
+        tasks per status, per category and per (category, status), open tasks per due window,
+        subtasks per status and the number of overdue subtasks.
+        :param today: The reference date (defaults to today's date).
+        """
+        today = today or date.today()
+        self.rollups.set_today(today)
+        by_category_status = {}
+        for (category, status), count in self.rollups.category_status_counts.items():
+            by_category_status.setdefault(category, {})[status] = count
+        return {
+            "tasks": len(self.store.tasks_by_id),
+            "subtasks": len(self.store.subtasks_by_id),
+            "by_status": self.count_by("status"),
+            "by_category": self.count_by("category"),
+            "by_category_status": by_category_status,
+            "due_windows": self.queries.due_windows(today),
+            "subtasks_by_status": dict(self.rollups.subtask_status_counts),
+            "overdue_subtasks": self.rollups.overdue_subtasks,
+        }
+
+    @metrics.timed("logic_fire_deadlines")
+    def fire_deadlines(self, now: datetime = None) -> list[tuple]:
+        """
+        Publish DEADLINE_REMINDER/DEADLINE_OVERDUE events for every deadline reached by `now`.
+        Only the reached entries of the deadline heap are looked at, never the whole task list; call this when
+        deadlines.next_deadline() has passed (see scheduler.TkDeadlineTimer and the CLI's remind --watch).
+        :param now: The current time (defaults to now).
+        :return: A list of (scheduler.REMINDER or scheduler.OVERDUE, ("task"/"subtask", ID)) that fired.
+        """
+        fired = self.deadlines.pop_due(now)
+        for stage, (record, record_id) in fired:
+            kind = events.DEADLINE_REMINDER if stage == REMINDER else events.DEADLINE_OVERDUE
+            if record == "task":
+                self.events.publish(kind, record_id)
+            else:
+                self.events.publish(kind, self.store.get_subtask(record_id).task_id, record_id)
+        return fired
+
+    def snapshot(self) -> tuple:
+        """
+        Capture the data needed for the next save.
+        The pending changes are handed over to the writer. Copies of the full lists are only made when
+        the backend asks for them (full-snapshot backends, or a journal that is due for a checkpoint),
+        so the writer is not affected by later mutations.
+        :return: A tuple of (tasks, subtasks, changes); tasks and subtasks are None if the backend does not need them.
+        """
+        with self._changes_lock:
+            changes, self._pending_changes = self._pending_changes, []
+        metrics.gauge("save_queue_depth", len(changes))  # Changes that piled up since the last write
+        if not self.storage.wants_snapshot():
+            return None, None, changes
+        return list(self.tasks), list(self.subtasks), changes
+
+    def write_snapshot(self, tasks, subtasks, changes: list[tuple]):
+        """
+        Write a snapshot captured by snapshot() using the storage backend. Runs on the background writer.
+        If the write fails, the changes are put back so the next save retries them.
+        """
+        try:
+            with metrics.span("save_write") as span:
+                span.rows = len(changes)
+                self.storage.apply_changes(tasks, subtasks, changes)
+        except Exception as error:
+            with self._changes_lock:
+                self._pending_changes[:0] = changes
+            self.save_error = error
+            metrics.count("save_errors")
+            self.events.publish(events.SAVE_FAILED, error=error)
+            raise
+        self.save_error = None
+        self.events.publish(events.SAVE_COMPLETED)
+
+    def save_data(self, changes: list[tuple] = ()):
+        """
+        Save tasks and subtasks using the storage backend.
+        The save is queued on the background writer, so it does not block the UI and
+        several quick mutations in a row result in a single write of the latest data.
+        :param changes: The (kind, value) changes that caused this save, used by incremental backends.
+        """
+        with self._changes_lock:
+            self._pending_changes.extend(changes)
+        self.save_queue.request_save()  # Mark the data dirty; the writer thread does the rest
+
+    def flush(self, timeout: float = None) -> bool:
+        """
+        Write any pending changes to storage and wait for the write to finish.
+        :param timeout: Maximum number of seconds to wait, or None to wait indefinitely.
+        :return: True if all changes were written.
+        """
+        return self.save_queue.flush(timeout)
+
+    def close(self, timeout: float = None) -> bool:
+        """
+        Flush pending changes and stop the background writer. Call this before the application exits.
+        If the backend journaled enough changes of this process, a full snapshot is written (see
+        StorageBackend.needs_checkpoint); a process that changed nothing never rewrites the data file.
+        :param timeout: Maximum number of seconds to wait for the final write.
+        :return: True if all changes were written; otherwise save_error holds the reason (None on a timeout).
+        """
+        flushed = self.save_queue.close(timeout)
+        if flushed and self.storage.needs_checkpoint():
+            try:
+                self.storage.checkpoint()
+            except Exception as error:
+                self.save_error = error
+                self.events.publish(events.SAVE_FAILED, error=error)
+                return False  # The changes are still in the journal and will be replayed on the next start
+        return flushed
 
-    def save_data(self):
+    def save_stats(self) -> dict:
         """
-        Save tasks and subtasks to the Excel file using ExcelHandler.
-        This method runs in a separate thread to avoid blocking the UI.
+        Report how the background writer has been used.
+        :return: A dictionary with the number of save requests, actual writes and coalesced requests.
         """
-        save_thread = threading.Thread(target=self.excel_handler.save_data, args=(self.tasks, self.subtasks))
-        save_thread.start()  # Start the saving process in the background
+        return {
+            "requests": self.save_queue.requests,
+            "writes": self.save_queue.writes,
+            "coalesced": self.save_queue.coalesced,
+        }
 
     def get_new_task_id(self):
         """
         Generate a new unique Task ID.
-        This method checks the highest Task ID in the current list of tasks and returns a new unique ID.
+        This method returns the next value of the store's Task ID counter, which is always above every existing ID.
         """
-        return max((task.task_id for task in self.tasks), default=0) + 1  # Generate the next Task ID
+        return self.store.next_task_id  # The next Task ID that add_task will use
 
     def get_new_subtask_id(self):
         """
         Generate a new unique Subtask ID.
-        This method checks the highest Subtask ID in the current list of subtasks and returns a new unique ID.
+        This method returns the next value of the store's Subtask ID counter, which is always above every existing ID.
         """
-        return max((subtask.subtask_id for subtask in self.subtasks), default=0) + 1  # Generate the next Subtask ID
+        return self.store.next_subtask_id  # The next Subtask ID that add_subtask will use
 
+    @metrics.timed("logic_add_task")
     def add_task(self, task_data: dict):
         """
         Add a new task to the task list.
-        This method creates a new Task object, appends it to the task list, and saves the updated list to the Excel file.
+        This method creates a new Task object, adds it to the store, and saves it.
         :param task_data: A dictionary containing the task attributes.
+        :return: The new Task object.
         """
-        task_id = self.get_new_task_id()  # Generate a new Task ID
+        task_id = self.store.allocate_task_id()  # Reserve a new Task ID
         new_task = Task(task_id, **task_data)  # Create a new Task object with the provided data
-        self.tasks.append(new_task)  # Add the new task to the list
-        self.save_data()  # Save the updated task list to the Excel file
+        self.store.add_task(new_task)  # Add the new task to the store
+        self.save_data([(UPSERT_TASK, new_task)])  # Save the new task
+        self.events.publish(events.TASK_ADDED, task_id)
+        return new_task
 
+    @metrics.timed("logic_add_subtask")
     def add_subtask(self, subtask_data: dict):
         """
         Add a new subtask to the subtask list.
-        This method creates a new Subtask object, appends it to the subtask list, and saves the updated list to the Excel file.
+        This method creates a new Subtask object, adds it to the store, and saves it.
         :param subtask_data: A dictionary containing the subtask attributes.
+        :return: The new Subtask object.
         """
-        subtask_id = self.get_new_subtask_id()  # Generate a new Subtask ID
+        subtask_id = self.store.allocate_subtask_id()  # Reserve a new Subtask ID
         new_subtask = Subtask(subtask_id, **subtask_data)  # Create a new Subtask object with the provided data
-        self.subtasks.append(new_subtask)  # Add the new subtask to the list
-        self.save_data()  # Save the updated subtask list to the Excel file
+        self.store.add_subtask(new_subtask)  # Add the new subtask to the store and its parent's index
+        self.save_data([(UPSERT_SUBTASK, new_subtask)])  # Save the new subtask
+        self.events.publish(events.SUBTASK_ADDED, new_subtask.task_id, subtask_id)
+        return new_subtask
+
+    @staticmethod
+    def prepare_task_data(row: dict) -> dict:
+        """
+        Validate a task record from an import and turn it into keyword arguments for Task.
+        Unknown keys (including any task_id from the source system) are ignored and missing optional fields
+        become empty strings. Name, category, start date and due date are required, as in the insert form.
+        :param row: A dictionary of task attributes (e.g. a CSV row or JSON object).
+        :return: A dictionary with exactly the Task attributes except task_id.
+        :raises ValueError: If the row is not a dictionary or a required field is missing or empty.
+        """
+        task_data = import_values(row, Task.FIELDS[1:])
+        missing = [field for field in TaskManagerLogic.TASK_REQUIRED if not task_data[field]]
+        if missing:
+            raise ValueError(f"missing required task field(s): {', '.join(missing)}")
+        return task_data
+
+    def prepare_subtask_data(self, row: dict) -> dict:
+        """
+        Validate a subtask record from an import and turn it into keyword arguments for Subtask.
+        :param row: A dictionary of subtask attributes; task_id must refer to an existing task.
+        :return: A dictionary with exactly the Subtask attributes except subtask_id.
+        :raises ValueError: If the row is not a dictionary, a required field is missing or the parent task does not
+                            exist.
+        """
+        subtask_data = import_values(row, Subtask.FIELDS[1:])
+        missing = [field for field in self.SUBTASK_REQUIRED if not subtask_data[field]]
+        if missing:
+            raise ValueError(f"missing required subtask field(s): {', '.join(missing)}")
+        try:
+            subtask_data["task_id"] = int(subtask_data["task_id"])  # CSV values arrive as strings
+        except (TypeError, ValueError):
+            raise ValueError(f"invalid task_id {subtask_data['task_id']!r}") from None
+        if not self.store.has_task(subtask_data["task_id"]):
+            raise ValueError(f"task {subtask_data['task_id']} does not exist")
+        return subtask_data
+
+    @metrics.timed("logic_add_tasks_bulk")
+    def add_tasks_bulk(self, rows, skip_invalid: bool = False, first_row: int = 1) -> tuple[list[Task], list[tuple]]:
+        """
+        Add many tasks at once with a single save.
+        Every row is validated before anything is added, so by default either the whole batch is added or none of it.
+        :param rows: Iterable of dictionaries with task attributes.
+        :param skip_invalid: If True, invalid rows are skipped and reported instead of rejecting the batch.
+        :param first_row: Number of the first row in error messages (useful when a file is added in several batches).
+        :return: A tuple of (list of new Task objects, list of (row number, error message) for skipped rows).
+        :raises ValueError: If a row is invalid and skip_invalid is False.
+        """
+        prepared, errors = [], []
+        for number, row in enumerate(rows, start=first_row):
+            try:
+                prepared.append(self.prepare_task_data(row))
+            except ValueError as error:
+                if not skip_invalid:
+                    raise ValueError(f"row {number}: {error}") from None
+                errors.append((number, str(error)))
+
+        new_tasks = []
+        for task_data in prepared:
+            new_task = Task(self.store.allocate_task_id(), **task_data)  # Assign IDs only once all rows are valid
+            self.store.add_task(new_task)
+            new_tasks.append(new_task)
+        if new_tasks:
+            self.save_data([(UPSERT_TASK, task) for task in new_tasks])  # One save for the whole batch
+            for task in new_tasks:
+                self.events.publish(events.TASK_ADDED, task.task_id)
+        return new_tasks, errors
+
+    @metrics.timed("logic_add_subtasks_bulk")
+    def add_subtasks_bulk(self, rows, skip_invalid: bool = False, first_row: int = 1) -> tuple[list[Subtask], list[tuple]]:
+        """
+        Add many subtasks at once with a single save.
+        Every row is validated before anything is added, so by default either the whole batch is added or none of it.
+        :param rows: Iterable of dictionaries with subtask attributes; task_id must refer to an existing task.
+        :param skip_invalid: If True, invalid rows are skipped and reported instead of rejecting the batch.
+        :param first_row: Number of the first row in error messages (useful when a file is added in several batches).
+        :return: A tuple of (list of new Subtask objects, list of (row number, error message) for skipped rows).
+        :raises ValueError: If a row is invalid and skip_invalid is False.
+        """
+        prepared, errors = [], []
+        for number, row in enumerate(rows, start=first_row):
+            try:
+                prepared.append(self.prepare_subtask_data(row))
+            except ValueError as error:
+                if not skip_invalid:
+                    raise ValueError(f"row {number}: {error}") from None
+                errors.append((number, str(error)))
+
+        new_subtasks = []
+        for subtask_data in prepared:
+            new_subtask = Subtask(self.store.allocate_subtask_id(), **subtask_data)
+            self.store.add_subtask(new_subtask)
+            new_subtasks.append(new_subtask)
+        if new_subtasks:
+            self.save_data([(UPSERT_SUBTASK, subtask) for subtask in new_subtasks])  # One save for the whole batch
+            for subtask in new_subtasks:
+                self.events.publish(events.SUBTASK_ADDED, subtask.task_id, subtask.subtask_id)
+        return new_subtasks, errors
 
+    @metrics.timed("logic_update_task")
+    def update_task(self, task_id: int, task_data: dict):
+        """
+        Update some attributes of an existing task.
+        The task is replaced by a new Task object, so the old object is never changed while it is being saved.
+        :param task_id: The ID of the task to update.
+        :param task_data: A dictionary with the attributes to change (task_id cannot be changed).
+        :return: The updated Task object.
+        :raises KeyError: If the task does not exist.
+        :raises ValueError: If an attribute is unknown or a required one would become empty.
+        """
+        old_task = self.store.get_task(task_id)
+        if old_task is None:
+            raise KeyError(f"Task {task_id} does not exist")
+        check_changes(task_data, Task.FIELDS[1:], self.TASK_REQUIRED, "task")
+        values = dict(zip(Task.FIELDS, old_task.as_row()))  # Current attributes of the task
+        values.update(task_data)
+        values["task_id"] = task_id
+        new_task = Task(**values)
+        self.store.add_task(new_task)  # Replaces the task with the same ID
+        self.save_data([(UPSERT_TASK, new_task)])
+        self.events.publish(events.TASK_UPDATED, task_id)
+        return new_task
+
+    @metrics.timed("logic_update_subtask")
+    def update_subtask(self, subtask_id: int, subtask_data: dict):
+        """
+        Update some attributes of an existing subtask.
+        :param subtask_id: The ID of the subtask to update.
+        :param subtask_data: A dictionary with the attributes to change (subtask_id cannot be changed); a new
+                             task_id moves the subtask to that task.
+        :return: The updated Subtask object.
+        :raises KeyError: If the subtask does not exist.
+        :raises ValueError: If an attribute is unknown, a required one would become empty or the new parent
+                            task does not exist.
+        """
+        old_subtask = self.store.get_subtask(subtask_id)
+        if old_subtask is None:
+            raise KeyError(f"Subtask {subtask_id} does not exist")
+        check_changes(subtask_data, Subtask.FIELDS[1:], self.SUBTASK_REQUIRED, "subtask")
+        if "task_id" in subtask_data:
+            try:
+                task_id = int(subtask_data["task_id"])  # CLI and JSON values may arrive as strings
+            except (TypeError, ValueError):
+                raise ValueError(f"invalid task_id {subtask_data['task_id']!r}") from None
+            if not self.store.has_task(task_id):
+                raise ValueError(f"task {task_id} does not exist")
+            subtask_data = dict(subtask_data, task_id=task_id)
+        values = dict(zip(Subtask.FIELDS, old_subtask.as_row()))  # Current attributes of the subtask
+        values.update(subtask_data)
+        values["subtask_id"] = subtask_id
+        new_subtask = Subtask(**values)
+        self.store.add_subtask(new_subtask)  # Replaces the subtask (and moves it if its task_id changed)
+        self.save_data([(UPSERT_SUBTASK, new_subtask)])
+        if new_subtask.task_id != old_subtask.task_id:
+            self.events.publish(events.SUBTASK_DELETED, old_subtask.task_id, subtask_id)
+            self.events.publish(events.SUBTASK_ADDED, new_subtask.task_id, subtask_id)
+        else:
+            self.events.publish(events.SUBTASK_UPDATED, new_subtask.task_id, subtask_id)
+        return new_subtask
+
+    @metrics.timed("logic_delete_task")
     def delete_task(self, task_id: int):
         """
         Delete a task and its associated subtasks.
         This method removes a task by its ID and also removes any subtasks associated with that task.
+        Nothing is saved or published if there is no such task (and no subtasks of it).
         :param task_id: The ID of the task to be deleted.
         """
-        self.tasks = [task for task in self.tasks if task.task_id != task_id]  # Filter out the task with the given ID
-        self.subtasks = [subtask for subtask in self.subtasks if subtask.task_id != task_id]  # Remove associated subtasks
-        self.save_data()  # Save the updated task and subtask lists to the Excel file
+        # Remove the task and, through the per-task index, its subtasks
+        task, subtasks = self.store.remove_task(task_id)
+        if task is None and not subtasks:
+            return
+        self.save_data([(DELETE_TASK, task_id)])  # Save the deletion of the task and its subtasks
+        self.events.publish(events.TASK_DELETED, task_id)
 
+    @metrics.timed("logic_delete_subtask")
     def delete_subtask(self, subtask_id: int):
         """
         Delete a subtask by its ID.
         This method removes a subtask from the subtask list based on its ID.
+        Nothing is saved or published if there is no such subtask.
         :param subtask_id: The ID of the subtask to be deleted.
         """
-        self.subtasks = [subtask for subtask in self.subtasks if subtask.subtask_id != subtask_id]  # Filter out the subtask
-        self.save_data()  # Save the updated subtask list to the Excel file
+        subtask = self.store.remove_subtask(subtask_id)  # Remove the subtask by its ID
+        if subtask is None:
+            return
+        self.save_data([(DELETE_SUBTASK, subtask_id)])  # Save the deletion of the subtask
+        self.events.publish(events.SUBTASK_DELETED, subtask.task_id, subtask_id)
+
+    @metrics.timed("logic_archive_tasks")
+    def archive_tasks(self, before: date = None, completed_only: bool = True) -> dict:
+        """
+        Move old tasks and their subtasks out of the active data into the archive's dated shards.
+        The tasks are written to the archive first and then deleted from the active data like any other
+        deletion, so the active file shrinks with the next save and a crash in between loses nothing.
+        :param before: Tasks due before this date are archived (defaults to ARCHIVE_AFTER_DAYS days ago).
+                       Tasks without a real due date are never archived.
+        :param completed_only: If True (the default), only completed tasks are archived.
+        :return: Shard name -> number of tasks moved into it.
+        :raises RuntimeError: If the storage backend has no archive.
+        :raises ValueError: If before is not a date.
+        """
+        if self.archive is None:
+            raise RuntimeError("this storage backend has no archive directory")
+        if before is None:
+            before = date.today() - timedelta(days=self.ARCHIVE_AFTER_DAYS)
+        if not isinstance(before, date):
+            raise ValueError(f"invalid date {before!r} (use YYYY-MM-DD)")
+        entries = self.task_index.date_range("due_date", end=before - timedelta(days=1))  # Due dates are inclusive
+        tasks = [self.store.get_task(task_id) for _, task_id in entries]
+        if completed_only:
+            tasks = [task for task in tasks if is_completed(task.status)]
+        if not tasks:
+            return {}
+        subtasks_by_task = {task.task_id: list(self.store.subtasks_of(task.task_id)) for task in tasks}
+        shards = self.archive.add(tasks, subtasks_by_task)
+        for task in tasks:
+            self.store.remove_task(task.task_id)
+        self.save_data([(DELETE_TASK, task.task_id) for task in tasks])  # One save for the whole batch
+        for task in tasks:
+            self.events.publish(events.TASK_DELETED, task.task_id)
+        return shards
+
+    def export_excel(self, excel_file: str):
+        """
+        Export all tasks and subtasks to an Excel file in the ExcelHandler format.
+        :param excel_file: Path of the Excel file to create or overwrite.
+        """
+        from excel_handler import ExcelHandler
+        handler = ExcelHandler(excel_file, cache=False)
+        handler.create_excel_file()  # Start from an empty workbook with the expected sheets
+        handler.save_data(list(self.tasks), list(self.subtasks))
+
+    def import_excel(self, excel_file: str):
+        """
+        Replace all tasks and subtasks with the contents of an Excel file in the ExcelHandler format,
+        then save them using the storage backend.
+        :param excel_file: Path of the Excel file to import.
+        :raises FileNotFoundError: If the file does not exist (ExcelHandler would create an empty one, and the
+                                   import would then delete everything).
+        """
+        from excel_handler import ExcelHandler
+        if not os.path.isfile(excel_file):
+            raise FileNotFoundError(f"no such file: {excel_file}")
+        self.flush()  # Make sure older pending changes do not overwrite the imported data
+        self.store.load(*ExcelHandler(excel_file, cache=False).load_data())
+        self._skip_archived_ids()  # The imported IDs may be below those of archived tasks
+        self.storage.save_data(list(self.tasks), list(self.subtasks))
+        self.deadlines.rebuild()
+        self.events.publish(events.BULK_RELOAD)
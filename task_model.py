@@ -1,63 +1,147 @@
+from datetime import date, datetime  # Import date types used for the parsed date fields
+
+
+def parse_date(value):
+    """
+    Convert a date value read from a file or a form into a date object.
+    Excel cells hold datetime objects and forms/SQLite hold ISO strings (e.g. 2024-05-31).
+    Values that are not recognisable dates (free text, empty strings, None) are returned unchanged.
+    :param value: The raw value to convert.
+    :return: A date object, or the original value.
+    """
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, str):
+        text = value.strip()
+        try:
+            return date.fromisoformat(text)
+        except ValueError:
+            pass
+        try:
+            return datetime.fromisoformat(text).date()  # Date with a time part, e.g. 2024-05-31 09:00
+        except ValueError:
+            return value
+    return value
+
+
+def parse_progress(value):
+    """
+    Convert a progress value (e.g. 50, 12.5, "50%", "50") into a number of percent.
+    Whole numbers are returned as int so they display without a decimal point.
+    Values that are not numbers are returned unchanged.
+    :param value: The raw value to convert.
+    :return: An int or float percentage, or the original value.
+    """
+    if isinstance(value, str):
+        try:
+            value = float(value.strip().rstrip("%"))
+        except ValueError:
+            return value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+# Status values (compared case-insensitively) that mean a task or subtask is finished
+COMPLETED_STATUSES = {"completed", "complete", "done", "finished", "closed"}
+
+
+def is_completed(status) -> bool:
+    """
+    Returns True if a status value means the task or subtask is finished (e.g. "Completed", "Done").
+    """
+    return isinstance(status, str) and status.strip().lower() in COMPLETED_STATUSES
+
+
 # Define the Task class, which represents a task with various attributes such as ID, name, category, and status.
 class Task:
-    def __init__(self, task_id: int, name: str, category: str, priority: str, start_date: str, due_date: str,
-                 status: str, progress: str, notes: str):
+    # Field order used for rows in Excel, SQLite and the Treeview
+    FIELDS = ("task_id", "name", "category", "priority", "start_date", "due_date", "status", "progress", "notes")
+    __slots__ = FIELDS  # No per-instance __dict__, which keeps large task lists small
+
+    def __init__(self, task_id: int, name: str, category: str, priority: str, start_date, due_date,
+                 status: str, progress, notes: str):
         """
         Initializes a new Task object with the specified attributes.
+        Dates and progress are parsed once here, so the rest of the app works with typed values.
         :param task_id: The unique identifier for the task.
         :param name: The name of the task.
         :param category: The category of the task (e.g., Work, Personal).
         :param priority: The priority level of the task (e.g., High, Medium, Low).
-        :param start_date: The start date of the task.
-        :param due_date: The due date of the task.
+        :param start_date: The start date of the task (date, datetime or ISO string).
+        :param due_date: The due date of the task (date, datetime or ISO string).
         :param status: The current status of the task (e.g., In Progress, Completed).
-        :param progress: The percentage progress of the task (e.g., 50%).
+        :param progress: The percentage progress of the task (e.g., 50 or "50%").
         :param notes: Any additional notes related to the task.
         """
         self.task_id = task_id  # Unique ID for the task
         self.name = name  # Task name
         self.category = category  # Task category (e.g., Work, Personal)
         self.priority = priority  # Task priority (e.g., High, Medium, Low)
-        self.start_date = start_date  # When the task starts
-        self.due_date = due_date  # Task deadline
+        self.start_date = parse_date(start_date)  # When the task starts
+        self.due_date = parse_date(due_date)  # Task deadline
         self.status = status  # Task status (e.g., In Progress, Completed)
-        self.progress = progress  # Progress percentage (e.g., 50%)
+        self.progress = parse_progress(progress)  # Progress percentage (e.g., 50)
         self.notes = notes  # Additional task notes
 
+    def as_row(self) -> tuple:
+        """
+        Returns the task's attributes as a tuple in FIELDS order.
+        This is the accessor used by the writers and the view: each call builds a new tuple straight from the
+        slot values, without an intermediate dict or list.
+        :return: A tuple representation of the task's attributes.
+        """
+        return (self.task_id, self.name, self.category, self.priority, self.start_date, self.due_date,
+                self.status, self.progress, self.notes)
+
     def as_list(self) -> list:
         """
         Returns the task's attributes as a list. This method is useful for saving the task data to Excel.
         :return: A list representation of the task's attributes.
         """
-        return [self.task_id, self.name, self.category, self.priority, self.start_date, self.due_date,
-                self.status, self.progress, self.notes]
+        return list(self.as_row())
 
 
 # Define the Subtask class, which represents a subtask with various attributes such as ID, name, and status.
 class Subtask:
-    def __init__(self, subtask_id: int, task_id: int, name: str, status: str, progress: str,
-                 due_date: str, completed_date: str):
+    # Field order used for rows in Excel, SQLite and the Treeview
+    FIELDS = ("subtask_id", "task_id", "name", "status", "progress", "due_date", "completed_date")
+    __slots__ = FIELDS  # No per-instance __dict__, which keeps large subtask lists small
+
+    def __init__(self, subtask_id: int, task_id: int, name: str, status: str, progress,
+                 due_date, completed_date):
         """
         Initializes a new Subtask object with the specified attributes.
+        Dates and progress are parsed once here, so the rest of the app works with typed values.
         :param subtask_id: The unique identifier for the subtask.
         :param task_id: The ID of the parent task to which this subtask belongs.
         :param name: The name of the subtask.
         :param status: The current status of the subtask (e.g., In Progress, Completed).
-        :param progress: The percentage progress of the subtask (e.g., 30%).
-        :param due_date: The due date of the subtask.
-        :param completed_date: The date the subtask was completed.
+        :param progress: The percentage progress of the subtask (e.g., 30 or "30%").
+        :param due_date: The due date of the subtask (date, datetime or ISO string).
+        :param completed_date: The date the subtask was completed (date, datetime or ISO string).
         """
         self.subtask_id = subtask_id  # Unique ID for the subtask
         self.task_id = task_id  # ID of the parent task
         self.name = name  # Subtask name
         self.status = status  # Subtask status (e.g., In Progress, Completed)
-        self.progress = progress  # Subtask progress percentage (e.g., 30%)
-        self.due_date = due_date  # Subtask deadline
-        self.completed_date = completed_date  # Date the subtask was completed (optional)
+        self.progress = parse_progress(progress)  # Subtask progress percentage (e.g., 30)
+        self.due_date = parse_date(due_date)  # Subtask deadline
+        self.completed_date = parse_date(completed_date)  # Date the subtask was completed (optional)
+
+    def as_row(self) -> tuple:
+        """
+        Returns the subtask's attributes as a tuple in FIELDS order.
+        This is the accessor used by the writers and the view: each call builds a new tuple straight from the
+        slot values, without an intermediate dict or list.
+        :return: A tuple representation of the subtask's attributes.
+        """
+        return (self.subtask_id, self.task_id, self.name, self.status, self.progress, self.due_date,
+                self.completed_date)
 
     def as_list(self) -> list:
         """
         Returns the subtask's attributes as a list. This method is useful for saving the subtask data to Excel.
         :return: A list representation of the subtask's attributes.
         """
-        return [self.subtask_id, self.task_id, self.name, self.status, self.progress, self.due_date, self.completed_date]
+        return list(self.as_row())
@@ -0,0 +1,287 @@
+from bisect import bisect_left, bisect_right, insort  # Import bisect to keep the date indexes sorted
+from datetime import date, timedelta  # Import date to recognise parsed date fields, timedelta for due windows
+from task_model import Task, is_completed  # Import the Task model and the completed-status check
+from task_store import StoreIndex  # Import the base class for indexes attached to the TaskStore
+
+EQUALITY_FIELDS = ("status", "category", "priority")  # Fields with a value -> task IDs index
+DATE_FIELDS = ("start_date", "due_date")  # Fields with a sorted (date, task ID) index
+
+
+def sort_key(value):
+    """
+    Sort key that orders typed values (numbers, dates) first, then free text, then empty values,
+    so that fields mixing parsed and unparsed values can still be sorted.
+    """
+    if value is None or value == "":
+        return 2, ""
+    if isinstance(value, str):
+        return 1, value
+    return 0, value
+
+
+def sort_tasks(tasks: list[Task], sort) -> list[Task]:
+    """
+    Sort a list of tasks in place by the given fields and return it.
+    :param sort: List of field names; prefix a name with "-" for descending order. None keeps the order.
+    :raises ValueError: If a field name is unknown.
+    """
+    for key in reversed(sort or []):  # Sort by the last key first so the first key wins (stable sort)
+        field = key.lstrip("-")
+        if field not in Task.FIELDS:
+            raise ValueError(f"unknown sort field {field!r}")
+        tasks.sort(key=lambda task: sort_key(getattr(task, field)), reverse=key.startswith("-"))
+    return tasks
+
+
+class TaskIndex(StoreIndex):
+    def __init__(self):
+        """
+        Initialize the TaskIndex class.
+        This secondary index is attached to the TaskStore and updated on every mutation. It keeps:
+        - for status, category and priority: value -> set of task IDs,
+        - for start and due dates: a sorted list of (date, task ID) for tasks whose date is a real date,
+        - a sorted list of (due date, task ID) for tasks that are not completed, used to count overdue tasks,
+        - per category: number of tasks and the sum/count of numeric progress values.
+        The date lists are plain sorted lists: a lookup is a binary search, but inserting or removing one entry
+        after the initial load (insort / del) shifts the entries after it, which is O(n) per mutation. The shift
+        is a single memmove of pointers, so it stays cheap next to the rest of an edit up to millions of tasks.
+        """
+        self.clear()
+
+    def clear(self):
+        """
+        Forget all indexed tasks.
+        """
+        self.values = {field: {} for field in EQUALITY_FIELDS}  # Field -> value -> set of task IDs
+        self.dates = {field: [] for field in DATE_FIELDS}  # Field -> sorted list of (date, task ID)
+        self.open_due_dates = []  # Sorted (due date, task ID) of tasks that are not completed
+        self.category_totals = {}  # Category -> [task count, progress sum, number of numeric progress values]
+        # After clear() (i.e. while the store is being loaded) dates are appended and sorted once on first use,
+        # instead of being inserted in order one by one
+        self.unsorted = True
+
+    def task_added(self, task: Task):
+        """
+        Add a task to every index.
+        """
+        for field in EQUALITY_FIELDS:
+            self.values[field].setdefault(getattr(task, field), set()).add(task.task_id)
+        add = list.append if self.unsorted else insort
+        for field in DATE_FIELDS:
+            value = getattr(task, field)
+            if isinstance(value, date):
+                add(self.dates[field], (value, task.task_id))
+        if isinstance(task.due_date, date) and not is_completed(task.status):
+            add(self.open_due_dates, (task.due_date, task.task_id))
+
+        totals = self.category_totals.setdefault(task.category, [0, 0, 0])
+        totals[0] += 1
+        if isinstance(task.progress, (int, float)):
+            totals[1] += task.progress
+            totals[2] += 1
+
+    def task_removed(self, task: Task):
+        """
+        Remove a task from every index.
+        """
+        for field in EQUALITY_FIELDS:
+            ids = self.values[field].get(getattr(task, field))
+            if ids is not None:
+                ids.discard(task.task_id)
+                if not ids:
+                    del self.values[field][getattr(task, field)]
+        self.ensure_sorted()
+        for field in DATE_FIELDS:
+            value = getattr(task, field)
+            if isinstance(value, date):
+                self._remove_sorted(self.dates[field], (value, task.task_id))
+        if isinstance(task.due_date, date) and not is_completed(task.status):
+            self._remove_sorted(self.open_due_dates, (task.due_date, task.task_id))
+
+        totals = self.category_totals.get(task.category)
+        if totals is not None:
+            totals[0] -= 1
+            if isinstance(task.progress, (int, float)):
+                totals[1] -= task.progress
+                totals[2] -= 1
+            if totals[0] == 0:
+                del self.category_totals[task.category]
+
+    def ensure_sorted(self):
+        """
+        Sort the date lists once after a bulk load; afterwards they are kept sorted on every mutation.
+        """
+        if self.unsorted:
+            for entries in self.dates.values():
+                entries.sort()
+            self.open_due_dates.sort()
+            self.unsorted = False
+
+    @staticmethod
+    def _remove_sorted(entries: list, entry: tuple):
+        """
+        Remove an entry from a sorted list using binary search.
+        """
+        position = bisect_left(entries, entry)
+        if position < len(entries) and entries[position] == entry:
+            del entries[position]
+
+    def matching_ids(self, field: str, values) -> set:
+        """
+        Returns the IDs of tasks whose field equals one of the given values.
+        :param field: One of EQUALITY_FIELDS.
+        :param values: A single value, or a list/tuple/set of accepted values.
+        """
+        index = self.values[field]
+        if not isinstance(values, (list, tuple, set, frozenset)):
+            return index.get(values, set())
+        result = set()
+        for value in values:
+            result |= index.get(value, set())
+        return result
+
+    def date_range(self, field: str, start=None, end=None) -> list:
+        """
+        Returns the (date, task ID) entries with start <= date <= end, in date order.
+        :param field: One of DATE_FIELDS.
+        :param start: Earliest date (inclusive), or None for no lower bound.
+        :param end: Latest date (inclusive), or None for no upper bound.
+        """
+        self.ensure_sorted()
+        entries = self.dates[field]
+        low = 0 if start is None else bisect_left(entries, (start,))
+        high = len(entries) if end is None else bisect_right(entries, (end, float("inf")))
+        return entries[low:high]
+
+    def overdue_count(self, today: date) -> int:
+        """
+        Returns the number of tasks that are not completed and whose due date is before today.
+        """
+        self.ensure_sorted()
+        return bisect_left(self.open_due_dates, (today,))
+
+
+class TaskQuery:
+    def __init__(self, store, index: TaskIndex, search=None):
+        """
+        Initialize the TaskQuery class.
+        This class answers filter, sort and aggregate queries over the tasks in a TaskStore,
+        using the secondary TaskIndex so that common queries do not scan every task.
+        :param store: The TaskStore holding the tasks.
+        :param index: The TaskIndex attached to that store.
+        :param search: The SearchIndex attached to that store, used for the text filter (optional).
+        """
+        self.store = store
+        self.index = index
+        self.search = search
+
+    def query(self, text=None, status=None, category=None, priority=None, due_from=None, due_to=None,
+              start_from=None, start_to=None, sort=None, limit: int = None) -> list[Task]:
+        """
+        Find tasks matching all given filters.
+        Equality filters accept a single value or a list of accepted values. Date bounds are inclusive;
+        tasks whose date is not a real date never match a date filter.
+        :param text: Words that must all appear (as words or word prefixes) in the task's name, notes or
+                     subtask names; see SearchIndex.search. Ignored if it has no words.
+        :param sort: List of field names to sort by; prefix a name with "-" for descending order.
+                     Without sort, tasks are returned in ID order (the order they were added in).
+        :param limit: Maximum number of tasks to return.
+        :return: A list of matching Task objects.
+        """
+        for bound in (due_from, due_to, start_from, start_to):
+            if bound is not None and not isinstance(bound, date):
+                raise ValueError(f"invalid date {bound!r} (use YYYY-MM-DD)")
+
+        tasks_by_id = self.store.tasks_by_id
+        candidates = None  # Set of matching task IDs, or None while no filter has been applied
+
+        if text is not None:
+            if self.search is None:
+                raise ValueError("text search is not available (no SearchIndex)")
+            candidates = self.search.search(text)
+
+        # Intersect the equality filters, smallest set first
+        equality_sets = [self.index.matching_ids(field, value)
+                         for field, value in (("status", status), ("category", category), ("priority", priority))
+                         if value is not None]
+        for ids in sorted(equality_sets, key=len):
+            candidates = set(ids) if candidates is None else candidates & ids
+
+        # Apply date ranges: use the sorted index, or check the candidates directly if there are only a few
+        ordered_ids = None  # Task IDs in date order when a single date range is the only filter
+        ordered_by = None  # The date field ordered_ids is sorted by
+        for field, start, end in (("due_date", due_from, due_to), ("start_date", start_from, start_to)):
+            if start is None and end is None:
+                continue
+            entries = self.index.date_range(field, start, end)
+            if candidates is None:
+                ordered_ids, ordered_by = [task_id for _, task_id in entries], field
+                candidates = set(ordered_ids)
+            elif len(candidates) < len(entries):
+                ordered_ids = None
+                candidates = {task_id for task_id in candidates
+                              if self._in_range(getattr(tasks_by_id.get(task_id), field, None), start, end)}
+            else:
+                ordered_ids = None
+                candidates &= {task_id for _, task_id in entries}
+
+        if candidates is None:
+            tasks = list(self.store.tasks)  # No filters: every task
+        elif ordered_ids is not None and list(sort or []) == [ordered_by]:
+            tasks = [tasks_by_id[task_id] for task_id in ordered_ids]  # Already in date order
+            sort = None
+        else:
+            # .get: the search index also knows the parent IDs of subtasks whose task does not exist
+            tasks = [task for task in map(tasks_by_id.get, sorted(candidates)) if task is not None]
+
+        tasks = sort_tasks(tasks, sort)
+        return tasks if limit is None else tasks[:limit]
+
+    @staticmethod
+    def _in_range(value, start, end) -> bool:
+        """
+        Returns True if value is a date within the inclusive range.
+        """
+        if not isinstance(value, date):
+            return False
+        return (start is None or value >= start) and (end is None or value <= end)
+
+    def category_progress(self) -> dict:
+        """
+        Returns per-category totals: {category: {"tasks": count, "average_progress": average or None}}.
+        The average only includes tasks whose progress is a number.
+        """
+        return {
+            category: {"tasks": count, "average_progress": progress_sum / numeric if numeric else None}
+            for category, (count, progress_sum, numeric) in self.index.category_totals.items()
+        }
+
+    def count_by(self, field: str) -> dict:
+        """
+        Returns the number of tasks per value of status, category or priority.
+        """
+        return {value: len(ids) for value, ids in self.index.values[field].items()}
+
+    def overdue_count(self, today: date = None) -> int:
+        """
+        Returns the number of tasks that are not completed and are past their due date.
+        :param today: The reference date (defaults to today's date).
+        """
+        return self.index.overdue_count(today or date.today())
+
+    def due_windows(self, today: date = None) -> dict:
+        """
+        Returns the number of tasks that are not completed per due window: overdue, due today, due in the next
+        7 days, due later, and without a real due date. Each count is a binary search in the sorted index.
+        :param today: The reference date (defaults to today's date).
+        """
+        today = today or date.today()
+        self.index.ensure_sorted()
+        entries = self.index.open_due_dates
+        due_today = bisect_left(entries, (today + timedelta(days=1),))
+        next_week = bisect_left(entries, (today + timedelta(days=8),))
+        open_tasks = sum(len(ids) for status, ids in self.index.values["status"].items() if not is_completed(status))
+        overdue = bisect_left(entries, (today,))
+        return {"overdue": overdue, "today": due_today - overdue, "next_7_days": next_week - due_today,
+                "later": len(entries) - next_week, "no_due_date": open_tasks - len(entries)}
+
@@ -0,0 +1,259 @@
+import threading  # Import threading to reserve the next block of IDs without blocking the caller
+from task_model import Task, Subtask  # Import the Task and Subtask models
+
+
+class StoreIndex:
+    """
+    Base class for secondary indexes attached to a TaskStore with add_index.
+    The store calls these methods on every mutation; subclasses override the ones they need.
+    A replaced record is reported as removed (old object) and then added (new object).
+    """
+
+    def clear(self):
+        """Forget everything; called before the store is (re)filled."""
+
+    def task_added(self, task: Task):
+        """Called after a task was added or replaced."""
+
+    def task_removed(self, task: Task):
+        """Called after a task was removed or before its replacement is added."""
+
+    def subtask_added(self, subtask: Subtask):
+        """Called after a subtask was added or replaced."""
+
+    def subtask_removed(self, subtask: Subtask):
+        """Called after a subtask was removed or before its replacement is added."""
+
+
+class TaskStore:
+    def __init__(self):
+        """
+        Initialize the TaskStore class.
+        This class keeps tasks and subtasks in dictionaries keyed by ID, plus an index of subtasks per parent task,
+        so that lookups, inserts, deletes and "subtasks of task N" do not need to scan every record.
+        Insertion order is preserved, so iterating over tasks and subtasks gives the same order as the old lists.
+        Secondary indexes can be attached with add_index; they are told about every record added or removed.
+        """
+        self.tasks_by_id = {}  # Task ID -> Task
+        self.subtasks_by_id = {}  # Subtask ID -> Subtask
+        self.subtasks_by_task = {}  # Task ID -> {Subtask ID -> Subtask}
+        self.next_task_id = 1  # Next Task ID to hand out (never goes down, so deleted IDs are not reused)
+        self.next_subtask_id = 1  # Next Subtask ID to hand out
+        self.indexes = []  # Secondary indexes kept up to date on every mutation (see add_index)
+        # Optional callable (kind, minimum) -> range of IDs reserved for this process, used when several
+        # processes add records to the same data; returns None to fall back to the counters above
+        self.reserve_ids = None
+        self.id_blocks = {"task": range(0), "subtask": range(0)}  # Reserved IDs not handed out yet
+        # Kind -> (thread, result dict) of the reservation of the next block, started when the current block runs out
+        self.next_blocks = {}
+
+    @property
+    def tasks(self):
+        """
+        Returns a live, iterable view of all tasks in insertion order.
+        """
+        return self.tasks_by_id.values()
+
+    @property
+    def subtasks(self):
+        """
+        Returns a live, iterable view of all subtasks in insertion order.
+        """
+        return self.subtasks_by_id.values()
+
+    def add_index(self, index):
+        """
+        Attach a secondary index and fill it with the records already in the store.
+        :param index: A StoreIndex (or any object with the same methods).
+        """
+        self.indexes.append(index)
+        index.clear()
+        for task in self.tasks_by_id.values():
+            index.task_added(task)
+        for subtask in self.subtasks_by_id.values():
+            index.subtask_added(subtask)
+
+    def load(self, tasks: list[Task], subtasks: list[Subtask]):
+        """
+        Replace the contents of the store with the given tasks and subtasks.
+        :param tasks: List of Task objects.
+        :param subtasks: List of Subtask objects.
+        """
+        self.tasks_by_id = {}
+        self.subtasks_by_id = {}
+        self.subtasks_by_task = {}
+        self.next_task_id = 1
+        self.next_subtask_id = 1
+        for index in self.indexes:
+            index.clear()
+        for task in tasks:
+            self.add_task(task)
+        for subtask in subtasks:
+            self.add_subtask(subtask)
+
+    def allocate_task_id(self) -> int:
+        """
+        Reserve and return a new unique Task ID.
+        """
+        task_id = self._take_reserved_id("task", self.next_task_id)
+        if task_id is None:
+            task_id = self.next_task_id
+        self.next_task_id = max(self.next_task_id, task_id + 1)
+        return task_id
+
+    def allocate_subtask_id(self) -> int:
+        """
+        Reserve and return a new unique Subtask ID.
+        """
+        subtask_id = self._take_reserved_id("subtask", self.next_subtask_id)
+        if subtask_id is None:
+            subtask_id = self.next_subtask_id
+        self.next_subtask_id = max(self.next_subtask_id, subtask_id + 1)
+        return subtask_id
+
+    def _take_reserved_id(self, kind: str, minimum: int):
+        """
+        Returns the next ID from this process's reserved block, or None if IDs are not reserved (reserve_ids is
+        not set or returns None).
+        reserve_ids takes a lock shared with other processes and writes a file, so it must not hold up the
+        caller (the UI thread in the app): when the last ID of a block is handed out, the next block is reserved
+        on a background thread, and the next call normally finds it ready. Only the first block, and a block
+        needed before its reservation finished, are waited for. The cost is that the block reserved last is
+        never used when the process exits.
+        """
+        if self.reserve_ids is None:
+            return None
+        block = self.id_blocks[kind]
+        if not block:
+            block = self._next_block(kind, minimum)
+            if block is None:
+                return None
+        self.id_blocks[kind] = block[1:]
+        if len(block) == 1:
+            self._reserve_in_background(kind, block[0] + 1)
+        return block[0]
+
+    def _next_block(self, kind: str, minimum: int):
+        """
+        Returns the block reserved in the background (waiting for it if necessary) without the IDs below
+        `minimum`, or a block reserved now if there is none or it failed.
+        """
+        pending = self.next_blocks.pop(kind, None)
+        if pending is not None:
+            thread, result = pending
+            thread.join()
+            block = result.get("block")
+            if block is not None and block.stop > minimum:
+                return block[max(minimum - block.start, 0):]
+        return self.reserve_ids(kind, minimum)  # An error of the background reservation is raised here again
+
+    def _reserve_in_background(self, kind: str, minimum: int):
+        """
+        Start reserving the next block of IDs on a background thread.
+        """
+        result = {}
+
+        def reserve():
+            try:
+                result["block"] = self.reserve_ids(kind, minimum)
+            except Exception as error:  # Retried by _next_block on the caller's thread
+                result["error"] = error
+
+        thread = threading.Thread(target=reserve, name="IdReserver", daemon=True)
+        thread.start()
+        self.next_blocks[kind] = (thread, result)
+
+    def add_task(self, task: Task):
+        """
+        Add a task (or replace the task with the same ID).
+        :param task: The Task object to add.
+        """
+        old_task = self.tasks_by_id.get(task.task_id)
+        self.tasks_by_id[task.task_id] = task
+        for index in self.indexes:
+            if old_task is not None:
+                index.task_removed(old_task)
+            index.task_added(task)
+        if task.task_id >= self.next_task_id:
+            self.next_task_id = task.task_id + 1  # Keep the counter ahead of IDs coming from storage
+
+    def add_subtask(self, subtask: Subtask):
+        """
+        Add a subtask (or replace the subtask with the same ID) and index it under its parent task.
+        :param subtask: The Subtask object to add.
+        """
+        old_subtask = self.subtasks_by_id.get(subtask.subtask_id)
+        if old_subtask is not None and old_subtask.task_id != subtask.task_id:
+            self._unindex_subtask(old_subtask)  # The subtask moved to another parent task
+        self.subtasks_by_id[subtask.subtask_id] = subtask
+        self.subtasks_by_task.setdefault(subtask.task_id, {})[subtask.subtask_id] = subtask
+        for index in self.indexes:
+            if old_subtask is not None:
+                index.subtask_removed(old_subtask)
+            index.subtask_added(subtask)
+        if subtask.subtask_id >= self.next_subtask_id:
+            self.next_subtask_id = subtask.subtask_id + 1
+
+    def remove_task(self, task_id: int) -> tuple:
+        """
+        Remove a task and all of its subtasks.
+        :param task_id: The ID of the task to remove.
+        :return: A tuple of the removed Task (or None) and the list of removed Subtask objects.
+        """
+        task = self.tasks_by_id.pop(task_id, None)
+        subtasks = list(self.subtasks_by_task.pop(task_id, {}).values())
+        for subtask in subtasks:
+            del self.subtasks_by_id[subtask.subtask_id]
+        for index in self.indexes:
+            for subtask in subtasks:
+                index.subtask_removed(subtask)
+            if task is not None:
+                index.task_removed(task)
+        return task, subtasks
+
+    def remove_subtask(self, subtask_id: int):
+        """
+        Remove a subtask.
+        :param subtask_id: The ID of the subtask to remove.
+        :return: The removed Subtask, or None if there was no subtask with that ID.
+        """
+        subtask = self.subtasks_by_id.pop(subtask_id, None)
+        if subtask is not None:
+            self._unindex_subtask(subtask)
+            for index in self.indexes:
+                index.subtask_removed(subtask)
+        return subtask
+
+    def get_task(self, task_id: int):
+        """
+        Returns the task with the given ID, or None if it does not exist.
+        """
+        return self.tasks_by_id.get(task_id)
+
+    def get_subtask(self, subtask_id: int):
+        """
+        Returns the subtask with the given ID, or None if it does not exist.
+        """
+        return self.subtasks_by_id.get(subtask_id)
+
+    def has_task(self, task_id: int) -> bool:
+        """
+        Returns True if a task with the given ID exists.
+        """
+        return task_id in self.tasks_by_id
+
+    def subtasks_of(self, task_id: int):
+        """
+        Returns an iterable view of the subtasks that belong to the given task.
+        """
+        return self.subtasks_by_task.get(task_id, {}).values()
+
+    def _unindex_subtask(self, subtask: Subtask):
+        """
+        Remove a subtask from the per-task index, dropping the task's entry when it becomes empty.
+        """
+        siblings = self.subtasks_by_task.get(subtask.task_id)
+        if siblings is not None:
+            siblings.pop(subtask.subtask_id, None)
+            if not siblings:
+                del self.subtasks_by_task[subtask.task_id]
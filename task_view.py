@@ -1,20 +1,57 @@
 import tkinter as tk  # Import tkinter for creating the GUI
-from tkinter import ttk  # Import ttk for advanced widgets like Treeview
+from tkinter import ttk, messagebox  # Import ttk for advanced widgets like Treeview and messagebox for alerts
+import events  # Import the change event kinds published by TaskManagerLogic
+import metrics  # Import the opt-in instrumentation that times table refreshes
+from datetime import date  # Import date to give the derived overdue counts today's date
+from task_model import parse_date  # Import parse_date to read the date filter entries
 
 class TaskView:
-    def __init__(self, notebook, logic):
+    SEARCH_DELAY = 150  # Milliseconds after the last keystroke in the search box before the table is filtered
+
+    def __init__(self, notebook, logic, page_size: int = None):
         """
         Initialize the TaskView class.
         This class manages the display of tasks and subtasks in the Task Viewer tab.
         :param notebook: The parent ttk.Notebook where the tabs will be added.
         :param logic: An instance of TaskManagerLogic to access the task and subtask data.
+        :param page_size: If set, the task table is virtualized: only this many rows exist in the Treeview
+                          and they are swapped as the user scrolls. If None, every task gets a row.
         """
         self.logic = logic  # Reference to the business logic that holds tasks and subtasks
+        self.page_size = page_size  # Number of visible rows in virtualized mode (None = show all rows)
+        self.offset = 0  # Index of the first visible task in virtualized mode
+        self.task_ids = []  # Ordered IDs of all tasks that can be shown (used by virtualized mode)
+        self.filters = {}  # Active TaskQuery filters (empty = show every task in ID order)
+
+        # Rows currently in the Treeviews, keyed by ID, so refreshes only touch rows that changed
+        self.rendered_tasks = {}  # Task ID -> row tuple shown in the task table
+        self.rendered_subtasks = {}  # Subtask ID -> row tuple shown in the subtask table
 
         # Create Task Viewer Tab
         tab1 = ttk.Frame(notebook)  # Create a new tab
         notebook.add(tab1, text="Task Viewer")  # Add the tab to the notebook
 
+        # Filter bar: a search box, equality filters and a due date range, answered by the logic's indexes
+        filter_frame = tk.Frame(tab1)
+        filter_frame.pack(pady=(10, 0))
+        self.filter_entries = {}  # Filter name -> Entry widget
+        tk.Label(filter_frame, text="Search").pack(side="left")
+        search_entry = tk.Entry(filter_frame, width=20)
+        search_entry.pack(side="left", padx=(2, 8))
+        search_entry.bind("<KeyRelease>", self.on_search_key)  # Filter as the user types
+        search_entry.bind("<Return>", lambda event: self.apply_filters())
+        self.filter_entries["text"] = search_entry
+        self.search_after_id = None  # Pending filter run after typing in the search box
+        for name, label in (("status", "Status"), ("category", "Category"), ("priority", "Priority"),
+                            ("due_from", "Due From"), ("due_to", "Due To")):
+            tk.Label(filter_frame, text=label).pack(side="left")
+            entry = tk.Entry(filter_frame, width=12)
+            entry.pack(side="left", padx=(2, 8))
+            entry.bind("<Return>", lambda event: self.apply_filters())
+            self.filter_entries[name] = entry
+        tk.Button(filter_frame, text="Apply", command=self.apply_filters).pack(side="left")
+        tk.Button(filter_frame, text="Clear", command=self.clear_filters).pack(side="left", padx=(4, 0))
+
         # Main Task Table (Treeview) to display tasks
         self.main_task_frame = tk.Frame(tab1)  # Create a frame to hold the task table
         self.main_task_frame.pack(pady=10)  # Add some padding for better spacing
@@ -24,14 +61,25 @@ class TaskView:
         main_task_label.pack()
 
         # Define columns for the Main Task Table (Treeview)
-        main_task_columns = ("Task ID", "Task Name", "Category", "Priority", "Start Date", "Due Date", "Status", "Progress", "Notes")
-        self.main_task_table = ttk.Treeview(self.main_task_frame, columns=main_task_columns, show="headings")
+        # The last three columns are derived from the task's subtasks (see rollups.py)
+        main_task_columns = ("Task ID", "Task Name", "Category", "Priority", "Start Date", "Due Date", "Status", "Progress", "Notes",
+                             "Subtasks Done", "Subtask Progress", "Overdue Subtasks")
+        self.main_task_table = ttk.Treeview(self.main_task_frame, columns=main_task_columns, show="headings",
+                                            height=page_size or 10)
 
         # Set column headings and widths
         for col in main_task_columns:
             self.main_task_table.heading(col, text=col)  # Set heading for each column
             self.main_task_table.column(col, width=100)  # Set column width
 
+        # In virtualized mode the scrollbar moves the window of tasks instead of scrolling the Treeview
+        if page_size:
+            self.task_scrollbar = ttk.Scrollbar(self.main_task_frame, orient="vertical", command=self.on_task_scroll)
+            self.task_scrollbar.pack(side="right", fill="y")
+            self.main_task_table.bind("<MouseWheel>", self.on_task_wheel)  # Windows and macOS
+            self.main_task_table.bind("<Button-4>", self.on_task_wheel)  # Linux scroll up
+            self.main_task_table.bind("<Button-5>", self.on_task_wheel)  # Linux scroll down
+
         self.main_task_table.pack()  # Pack the Treeview into the frame
 
         # Load tasks into the Main Task Table
@@ -59,47 +107,261 @@ class TaskView:
         # Bind selection in the main task table to load subtasks
         self.main_task_table.bind("<<TreeviewSelect>>", self.on_task_select)
 
+    @metrics.timed("view_refresh")
     def refresh_task_table(self):
         """
         Refreshes the task table and reloads subtasks if a task is selected.
-        This method clears the table and reloads all tasks from the logic.
+        Only rows that were added, changed or removed since the last refresh are touched in the Treeview.
+        In virtualized mode only the visible window of tasks is rendered.
         """
-        # Clear the main task table
-        for item in self.main_task_table.get_children():
-            self.main_task_table.delete(item)
-
-        # Reload all tasks from the logic
-        for task in self.logic.tasks:
-            self.main_task_table.insert("", "end", values=task.as_list())  # Insert task data into the table
+        tasks = self.logic.query(**self.filters) if self.filters else None  # Matching tasks when filtered
+        self.logic.rollups.set_today(date.today())  # Recounts overdue subtasks once when the day changes
+        if self.page_size:
+            if tasks is None:
+                self.task_ids = self.logic.get_task_ids()  # Cheap copy of the ordered IDs; rows are built per window
+            else:
+                self.task_ids = [task.task_id for task in tasks]
+            self.render_task_window()
+        else:
+            # Rows that should be shown
+            rows = {task.task_id: self.task_row(task) for task in (self.logic.tasks if tasks is None else tasks)}
+            self.rendered_tasks = self.sync_rows(self.main_task_table, self.rendered_tasks, rows)
 
         # Check if a task is currently selected and load its subtasks
-        selected_item = self.main_task_table.focus()  # Get currently selected task (if any)
-        if selected_item:
-            task_id = self.main_task_table.item(selected_item)['values'][0]  # Get the task ID of the selected task
+        task_id = self.get_selected_task_id()  # Get currently selected task (if any)
+        if task_id is not None:
             self.load_subtasks(task_id)  # Load the subtasks for the selected task
 
+    @metrics.timed("view_apply_events")
+    def apply_events(self, batch: list):
+        """
+        Applies a batch of change events from TaskManagerLogic with one minimal update of the tables.
+        Only the tasks named in the events are re-rendered; a bulk reload falls back to refresh_task_table.
+        :param batch: List of events.Event objects, in the order they were published.
+        """
+        metrics.count("view_events", len(batch))
+        kinds = {event.kind for event in batch}
+        if events.BULK_RELOAD in kinds:
+            self.refresh_task_table()  # Anything may have changed; let the diff work it out
+            return
+
+        # Collect the affected tasks (the last event for each task wins)
+        changed_task_ids = {}  # Task ID -> True if it still exists, False if it was deleted
+        subtask_parent_ids = set()  # Tasks whose subtask list changed
+        for event in batch:
+            if event.kind in (events.TASK_ADDED, events.TASK_UPDATED):
+                changed_task_ids[event.task_id] = True
+            elif event.kind == events.TASK_DELETED:
+                changed_task_ids[event.task_id] = False
+                subtask_parent_ids.add(event.task_id)
+            elif event.kind in (events.SUBTASK_ADDED, events.SUBTASK_UPDATED, events.SUBTASK_DELETED):
+                subtask_parent_ids.add(event.task_id)
+
+        # Changed tasks may now (not) match the filters, and with a search text so may the parents of changed
+        # subtasks (their names are searched too); re-run the indexed query
+        if (changed_task_ids and self.filters) or (subtask_parent_ids and "text" in self.filters):
+            self.refresh_task_table()
+            return
+        if changed_task_ids:
+            if self.page_size:
+                if events.TASK_ADDED in kinds or events.TASK_DELETED in kinds:
+                    self.task_ids = self.logic.get_task_ids()  # The set of tasks changed
+                self.render_task_window()
+            else:
+                self.update_task_rows(changed_task_ids)
+
+        # Subtask changes only affect the derived columns of their parent tasks; update those that are shown
+        for task_id in subtask_parent_ids.difference(changed_task_ids):
+            old_row = self.rendered_tasks.get(task_id)
+            if old_row is not None:
+                row = self.task_row(self.logic.get_task(task_id))
+                if row != old_row:
+                    self.main_task_table.item(str(task_id), values=row)
+                    self.rendered_tasks[task_id] = row
+
+        # Reload the subtask table only if the selected task's subtasks changed
+        task_id = self.get_selected_task_id()
+        if task_id is not None and task_id in subtask_parent_ids:
+            self.load_subtasks(task_id)
+        elif task_id is None and self.rendered_subtasks and subtask_parent_ids:
+            self.load_subtasks(None)  # The selected task was deleted; clear its subtasks
+
+    def apply_filters(self):
+        """
+        Reads the filter bar and shows only the matching tasks.
+        Empty entries are ignored; the due dates must be YYYY-MM-DD. The search text matches words (or the
+        beginnings of words) in the task name, notes and subtask names.
+        """
+        filters = {}
+        for name, entry in self.filter_entries.items():
+            value = entry.get().strip()
+            if not value:
+                continue
+            if name in ("due_from", "due_to"):
+                value = parse_date(value)
+                if isinstance(value, str):
+                    messagebox.showwarning("Input Error", f"Invalid date {entry.get()!r} (use YYYY-MM-DD).")
+                    return
+            filters[name] = value
+        self.filters = filters
+        self.offset = 0
+        self.refresh_task_table()
+
+    def on_search_key(self, event):
+        """
+        Filters the table shortly after the user stops typing in the search box, so a burst of keystrokes
+        runs one search. Keys that do not change the text (e.g. arrows) do nothing.
+        """
+        entry = self.filter_entries["text"]
+        if self.search_after_id is not None:
+            entry.after_cancel(self.search_after_id)
+            self.search_after_id = None
+        if entry.get().strip() != self.filters.get("text", ""):
+            self.search_after_id = entry.after(self.SEARCH_DELAY, self.run_search)
+
+    def run_search(self):
+        """
+        Applies the search box (together with the rest of the filter bar) to the task table.
+        """
+        self.search_after_id = None
+        self.apply_filters()
+
+    def clear_filters(self):
+        """
+        Empties the filter bar and shows every task again.
+        """
+        for entry in self.filter_entries.values():
+            entry.delete(0, "end")
+        self.filters = {}
+        self.offset = 0
+        self.refresh_task_table()
+
+    def update_task_rows(self, changed_task_ids: dict):
+        """
+        Inserts, updates or removes only the given tasks in the (non-virtualized) task table.
+        New tasks are appended, matching their position at the end of the logic's task order.
+        :param changed_task_ids: Task ID -> True if the task still exists, False if it was deleted.
+        """
+        for task_id, exists in changed_task_ids.items():
+            task = self.logic.get_task(task_id) if exists else None
+            if task is None:
+                if self.rendered_tasks.pop(task_id, None) is not None:
+                    self.main_task_table.delete(str(task_id))
+                continue
+            row = self.task_row(task)
+            old_row = self.rendered_tasks.get(task_id)
+            if old_row is None:
+                self.main_task_table.insert("", "end", iid=str(task_id), values=row)
+            elif old_row != row:
+                self.main_task_table.item(str(task_id), values=row)
+            self.rendered_tasks[task_id] = row
+
+    @metrics.timed("view_render_window")
+    def render_task_window(self):
+        """
+        Renders the visible window of tasks in virtualized mode and updates the scrollbar.
+        The cost depends on page_size, not on the number of tasks.
+        """
+        total = len(self.task_ids)
+        self.offset = max(0, min(self.offset, total - self.page_size))  # Keep the window inside the list
+        visible_ids = self.task_ids[self.offset:self.offset + self.page_size]
+        rows = {task_id: self.task_row(self.logic.get_task(task_id)) for task_id in visible_ids}
+        self.rendered_tasks = self.sync_rows(self.main_task_table, self.rendered_tasks, rows)
+
+        # Size and position the scrollbar thumb to match the visible window
+        if total:
+            self.task_scrollbar.set(self.offset / total, min(self.offset + self.page_size, total) / total)
+        else:
+            self.task_scrollbar.set(0, 1)
+
+    def on_task_scroll(self, *args):
+        """
+        Moves the visible window of tasks when the scrollbar is used (virtualized mode only).
+        :param args: Scrollbar command arguments: ("moveto", fraction) or ("scroll", amount, "units"/"pages").
+        """
+        if args[0] == "moveto":
+            self.offset = int(float(args[1]) * len(self.task_ids))
+        elif args[0] == "scroll":
+            step = self.page_size if args[2] == "pages" else 1
+            self.offset += int(args[1]) * step
+        self.render_task_window()
+
+    def on_task_wheel(self, event):
+        """
+        Scrolls the visible window of tasks with the mouse wheel (virtualized mode only).
+        :param event: The mouse wheel event.
+        """
+        direction = -1 if event.num == 4 or getattr(event, "delta", 0) > 0 else 1
+        self.on_task_scroll("scroll", direction * 3, "units")
+        return "break"  # Stop the Treeview from scrolling its own (already visible) rows
+
+    def task_row(self, task) -> tuple:
+        """
+        Returns the values shown for a task: its own fields followed by the columns derived from its subtasks.
+        """
+        return task.as_row() + self.logic.rollups.row(task.task_id)
+
+    @staticmethod
+    def sync_rows(table, rendered: dict, rows: dict) -> dict:
+        """
+        Makes a Treeview show the given rows by applying only the difference to what it shows now.
+        Items use the record ID as their Treeview ID, so rows can be updated or removed without searching.
+        :param table: The Treeview to update.
+        :param rendered: Record ID -> row tuple currently shown in the table.
+        :param rows: Record ID -> row tuple that should be shown, in display order.
+        :return: The new rendered mapping (rows).
+        """
+        # Remove rows that should no longer be shown
+        stale = [str(record_id) for record_id in rendered if record_id not in rows]
+        if stale:
+            table.delete(*stale)
+
+        # Move kept rows if their relative order changed (e.g. a different filter or sort)
+        kept = [record_id for record_id in rows if record_id in rendered]
+        if kept != [record_id for record_id in rendered if record_id in rows]:
+            for index, record_id in enumerate(kept):
+                table.move(str(record_id), "", index)
+
+        # Insert new rows at their position and update rows whose values changed
+        count = len(kept)  # Number of items left in the table
+        updated = 0
+        for index, (record_id, row) in enumerate(rows.items()):
+            old_row = rendered.get(record_id)
+            if old_row is None:
+                table.insert("", "end" if index >= count else index, iid=str(record_id), values=row)
+                count += 1
+            elif old_row != row:
+                table.item(str(record_id), values=row)
+                updated += 1
+        metrics.count("view_rows_touched", len(stale) + count - len(kept) + updated)  # Deleted, inserted, updated
+        return rows
+
+    def get_selected_task_id(self):
+        """
+        Returns the ID of the task that has the focus in the task table, or None.
+        """
+        selected_item = self.main_task_table.focus()  # Get the selected item in the task table
+        if selected_item:
+            return int(selected_item)  # Treeview items are identified by their Task ID
+        return None
+
     def on_task_select(self, event):
         """
         Loads subtasks when a task is selected in the main task table.
         This method is triggered when the user selects a task in the Treeview.
         :param event: The event object that holds the event information.
         """
-        selected_item = self.main_task_table.focus()  # Get the selected item in the task table
-        if selected_item:
-            task_id = self.main_task_table.item(selected_item)['values'][0]  # Get the task ID of the selected task
+        task_id = self.get_selected_task_id()  # Get the task ID of the selected task
+        if task_id is not None:
             self.load_subtasks(task_id)  # Load the corresponding subtasks for this task
 
+    @metrics.timed("view_load_subtasks")
     def load_subtasks(self, task_id):
         """
         Loads subtasks related to the selected task into the subtask table.
-        This method clears the current subtask table and reloads the subtasks for the selected task.
+        Only the subtasks that were added, changed or removed since the table was last filled are touched.
         :param task_id: The ID of the task whose subtasks are to be loaded.
         """
-        # Clear the subtask table before loading new data
-        for item in self.subtask_table.get_children():
-            self.subtask_table.delete(item)
-
-        # Load subtasks that are associated with the selected task ID
-        for subtask in self.logic.subtasks:
-            if subtask.task_id == task_id:  # Check if the subtask belongs to the selected task
-                self.subtask_table.insert("", "end", values=subtask.as_list())  # Insert subtask data into the table
+        # Look up the subtasks of the selected task through the per-task index
+        rows = {subtask.subtask_id: subtask.as_row() for subtask in self.logic.get_subtasks(task_id)}
+        self.rendered_subtasks = self.sync_rows(self.subtask_table, self.rendered_subtasks, rows)
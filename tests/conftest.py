@@ -0,0 +1,48 @@
+"""
+Shared setup for the test suite. Run it from the repository root with `python -m pytest -q`.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # Make the app modules importable
+
+import pytest
+
+from storage import StorageBackend
+
+
+class MemoryStorage(StorageBackend):
+    """An incremental backend that keeps the initial data in memory and records every batch of changes."""
+
+    incremental = True
+
+    def __init__(self, tasks=(), subtasks=()):
+        self.tasks, self.subtasks = list(tasks), list(subtasks)
+        self.batches = []  # Every list of changes passed to apply_changes, in order
+
+    def load_data(self):
+        return list(self.tasks), list(self.subtasks)
+
+    def apply_changes(self, tasks, subtasks, changes):
+        self.batches.append(list(changes))
+
+
+def task_data(**changes) -> dict:
+    """
+    Returns the attributes of a valid new task, with `changes` applied.
+    """
+    data = {"name": "Task", "category": "Work", "priority": "High", "start_date": "2024-01-01",
+            "due_date": "2024-02-01", "status": "Open", "progress": 0, "notes": ""}
+    data.update(changes)
+    return data
+
+
+@pytest.fixture
+def excel_file(tmp_path):
+    """
+    Path of an empty workbook in the app's format, in a temporary directory.
+    """
+    from excel_handler import ExcelHandler
+    path = str(tmp_path / "tasks.xlsx")
+    ExcelHandler(path).create_excel_file()
+    return path
@@ -0,0 +1,142 @@
+"""
+The local HTTP API (api_server.py), exercised over real connections: ETags and 304 answers, validation errors,
+missing records, bulk adds and failed saves.
+"""
+import asyncio
+import http.client
+import json
+import threading
+
+import pytest
+
+from conftest import MemoryStorage, task_data
+from api_server import TaskApiServer
+from task_manager_logic import TaskManagerLogic
+
+
+class FailingStorage(MemoryStorage):
+    """A MemoryStorage whose writes raise while `failing` is True."""
+
+    failing = False
+
+    def apply_changes(self, tasks, subtasks, changes):
+        if self.failing:
+            raise OSError("disk full")
+        super().apply_changes(tasks, subtasks, changes)
+
+
+class Client:
+    """Sends requests to a TaskApiServer running on its own event loop thread."""
+
+    def __init__(self, server: TaskApiServer):
+        self.server = server
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        asyncio.run_coroutine_threadsafe(server.start(), self.loop).result(10)
+
+    def request(self, method: str, path: str, body=None, headers: dict = None) -> tuple:
+        """
+        Send one request and return (status, headers, decoded JSON body or None).
+        """
+        connection = http.client.HTTPConnection("127.0.0.1", self.server.port, timeout=10)
+        data = body if isinstance(body, (bytes, type(None))) else json.dumps(body).encode()
+        connection.request(method, path, body=data, headers=headers or {})
+        response = connection.getresponse()
+        payload = response.read()
+        connection.close()
+        return response.status, dict(response.getheaders()), json.loads(payload) if payload else None
+
+    def close(self):
+        asyncio.run_coroutine_threadsafe(self.server.stop(), self.loop).result(10)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(10)
+
+
+@pytest.fixture
+def storage():
+    return FailingStorage()
+
+
+@pytest.fixture
+def client(storage):
+    logic = TaskManagerLogic(storage)
+    client = Client(TaskApiServer(logic, port=0, merge_interval=None))
+    yield client
+    client.close()
+    logic.close()
+
+
+def test_etag_changes_with_the_data(client):
+    status, headers, body = client.request("GET", "/tasks")
+    assert status == 200 and body["tasks"] == []
+    etag = headers["ETag"]
+    status, _, body = client.request("GET", "/tasks", headers={"If-None-Match": etag})
+    assert (status, body) == (304, None)
+
+    status, _, task = client.request("POST", "/tasks", task_data(name="Write tests"))
+    assert status == 201 and task["name"] == "Write tests"
+    status, headers, body = client.request("GET", "/tasks", headers={"If-None-Match": etag})
+    assert status == 200 and headers["ETag"] != etag and [row["task_id"] for row in body["tasks"]] == [task["task_id"]]
+
+    restarted = TaskApiServer(client.server.logic, port=0)
+    assert restarted.etag(client.server.version) != headers["ETag"]  # Another process never matches an old ETag
+
+
+def test_invalid_requests_are_answered_with_400(client):
+    task = client.request("POST", "/tasks", task_data())[2]
+    assert client.request("POST", "/tasks", b"{not json")[0] == 400
+    assert client.request("POST", "/tasks", [1, 2])[0] == 400
+    assert client.request("GET", "/tasks?limit=ten")[0] == 400
+    assert client.request("GET", "/query?limit=x")[0] == 400
+    status, _, body = client.request("PATCH", f"/tasks/{task['task_id']}", {"colour": "red"})
+    assert status == 400 and "colour" in body["error"]
+    assert client.request("PATCH", f"/tasks/{task['task_id']}", {"name": ""})[0] == 400
+    assert client.request("PATCH", f"/tasks/{task['task_id']}", [])[0] == 400
+    assert client.request("PUT", "/tasks")[0] == 405
+
+
+def test_missing_records_are_answered_with_404(client):
+    assert client.request("GET", "/tasks/7")[0] == 404
+    assert client.request("GET", "/tasks/abc")[0] == 404
+    assert client.request("DELETE", "/subtasks/7")[0] == 404
+    assert client.request("PATCH", "/subtasks/7", {"name": "x"})[0] == 404
+    assert client.request("GET", "/nothing")[0] == 404
+
+
+def test_patch_and_delete(client):
+    task = client.request("POST", "/tasks", task_data())[2]
+    subtask = client.request("POST", "/subtasks", {"task_id": task["task_id"], "name": "Sub", "status": "Open",
+                                                   "progress": 0, "due_date": "2024-01-10"})[2]
+    status, _, body = client.request("PATCH", f"/subtasks/{subtask['subtask_id']}", {"status": "Completed"})
+    assert status == 200 and body["status"] == "Completed" and body["due_date"] == "2024-01-10"
+    status, _, body = client.request("GET", f"/tasks/{task['task_id']}")
+    assert [row["status"] for row in body["subtasks"]] == ["Completed"]
+    assert client.request("DELETE", f"/tasks/{task['task_id']}")[0] == 204
+    assert client.request("GET", f"/subtasks?task_id={task['task_id']}")[2]["subtasks"] == []
+
+
+def test_bulk_add_validates_every_row(client):
+    rows = [task_data(name="First"), {"name": "No dates"}, task_data(name="Third")]
+    status, _, body = client.request("POST", "/tasks/bulk", rows)
+    assert status == 400 and "row 2" in body["error"]
+    assert client.request("GET", "/tasks")[2]["total"] == 0  # Nothing is added when a row is invalid
+
+    status, _, body = client.request("POST", "/tasks/bulk?skip_invalid=1", rows)
+    assert status == 201
+    assert [row["name"] for row in body["added"]] == ["First", "Third"]
+    assert [row["row"] for row in body["skipped"]] == [2]
+
+    status, _, body = client.request("POST", "/tasks/bulk", [task_data(), "not a row"])
+    assert status == 400 and body["error"] == "row 2: expected a JSON object"
+    assert client.request("POST", "/tasks/bulk", {"name": "x"})[0] == 400
+
+
+def test_failed_save_is_answered_with_503(client, storage):
+    storage.failing = True
+    status, _, body = client.request("POST", "/tasks", task_data())
+    assert status == 503 and "disk full" in body["error"]
+    assert client.request("DELETE", "/tasks/99")[0] == 404  # Its own error comes first
+    storage.failing = False
+    assert client.request("POST", "/tasks", task_data())[0] == 201
+    assert storage.batches  # The change of the failed request was saved with the next flush
@@ -0,0 +1,109 @@
+"""
+Archived tasks (archive.py) go to one shard per due month, are stored once, keep their IDs reserved, and are
+only read from the shards a query needs.
+"""
+import os
+from datetime import date
+
+from conftest import task_data
+from archive import Archive, UNDATED
+from excel_handler import ExcelHandler
+from journal import JournaledStorage
+from task_manager_logic import TaskManagerLogic
+from task_model import Task, Subtask
+
+
+def make_task(task_id: int, due_date, name: str = None) -> Task:
+    """
+    Returns a task with the given ID and default values for everything else.
+    """
+    return Task(task_id, name or f"Task {task_id}", "Work", "High", "2024-01-01", due_date, "Completed", 100, "")
+
+
+def make_subtask(subtask_id: int, task_id: int) -> Subtask:
+    """
+    Returns a subtask of the given task with default values for everything else.
+    """
+    return Subtask(subtask_id, task_id, f"Subtask {subtask_id}", "Completed", 100, None, None)
+
+
+def test_tasks_are_sharded_by_due_month(tmp_path):
+    archive = Archive(str(tmp_path / "archive"))
+    tasks = [make_task(1, "2024-01-05"), make_task(2, "2024-01-31"), make_task(3, "2024-03-01"), make_task(4, "")]
+    shards = archive.add(tasks, {1: [make_subtask(10, 1), make_subtask(11, 1)], 4: [make_subtask(12, 4)]})
+
+    assert shards == {"2024-01": 2, "2024-03": 1, UNDATED: 1}
+    assert archive.shard_names() == ["2024-01", "2024-03", UNDATED]
+    manifest = archive.manifest()
+    assert manifest["shards"] == {"2024-01": {"tasks": 2, "subtasks": 2}, "2024-03": {"tasks": 1, "subtasks": 0},
+                                  UNDATED: {"tasks": 1, "subtasks": 1}}
+    assert (manifest["next_task_id"], manifest["next_subtask_id"]) == (5, 13)
+    assert archive.stats() == {"tasks": 4, "subtasks": 3, "shards": 3}
+    assert [subtask.subtask_id for subtask in archive.subtasks_of(tasks[0])] == [10, 11]
+
+
+def test_archiving_a_task_again_keeps_one_copy(tmp_path):
+    archive = Archive(str(tmp_path / "archive"))
+    name = 'Parse "subtask_id" fields'  # Must not be counted as a subtask
+    archive.add([make_task(1, "2024-01-05", name)], {1: [make_subtask(10, 1)]})
+    # As after a crash between writing the archive and saving the active data, with a changed record
+    archive.add([make_task(1, "2024-01-05", name)], {1: [make_subtask(10, 1), make_subtask(11, 1)]})
+
+    with open(archive.shard_path("2024-01"), encoding="utf-8") as file:
+        assert len(file.readlines()) == 1
+    assert archive.manifest()["shards"]["2024-01"] == {"tasks": 1, "subtasks": 2}
+    assert [task.name for task in archive.query()] == [name]
+
+
+def test_archived_ids_are_never_handed_out_again(excel_file):
+    logic = TaskManagerLogic(JournaledStorage(ExcelHandler(excel_file)))
+    for number in range(300):
+        task = logic.add_task(task_data(due_date="2020-01-15" if number >= 150 else "2024-06-01", status="Completed"))
+        logic.add_subtask({"task_id": task.task_id, "name": "Sub", "status": "Completed", "progress": 100,
+                           "due_date": None, "completed_date": None})
+    assert logic.archive_tasks(before=date(2021, 1, 1)) == {"2020-01": 150}
+    manifest = logic.archive.manifest()
+    assert (manifest["next_task_id"], manifest["next_subtask_id"]) == (301, 301)
+    assert logic.close()
+    os.remove(excel_file + ".ids")  # Without the shared ID blocks, only the manifest knows the archived IDs
+
+    # A new process replays one journaled delete per archived task, then hands out IDs above the archive's
+    logic = TaskManagerLogic(JournaledStorage(ExcelHandler(excel_file)))
+    assert logic.get_task_ids() == list(range(1, 151))
+    assert len(logic.subtasks) == 150
+    task = logic.add_task(task_data())
+    assert task.task_id == 301
+    assert logic.add_subtask({"task_id": task.task_id, "name": "Sub", "status": "Open", "progress": 0,
+                              "due_date": None, "completed_date": None}).subtask_id == 301
+    assert logic.close()
+
+
+def test_query_only_loads_shards_in_the_due_range(tmp_path):
+    directory = str(tmp_path / "archive")
+    Archive(directory).add([make_task(1, "2024-01-05"), make_task(2, "2024-02-10"), make_task(3, "2024-03-20"),
+                            make_task(4, "")], {})
+    archive = Archive(directory)
+
+    found = archive.query(due_from=date(2024, 2, 1), due_to=date(2024, 3, 31))
+    assert [task.task_id for task in found] == [2, 3]
+    assert set(archive.shards) == {"2024-02", "2024-03"}
+    assert [task.task_id for task in archive.query(due_from=date(2024, 2, 15))] == [3]
+    assert UNDATED not in archive.shards
+    assert [task.task_id for task in archive.query()] == [1, 2, 3, 4]
+
+
+def test_shard_is_reloaded_when_its_file_changes(tmp_path):
+    directory = str(tmp_path / "archive")
+    archive = Archive(directory)
+    archive.add([make_task(1, "2024-01-05")], {})
+    first = archive.load_shard("2024-01")
+    assert archive.load_shard("2024-01") is first  # Unchanged file: kept in memory
+
+    Archive(directory).add([make_task(2, "2024-01-06")], {})  # Another process archives into the same shard
+    second = archive.load_shard("2024-01")
+    assert second is not first
+    assert sorted(task.task_id for task in second.store.tasks_by_id.values()) == [1, 2]
+
+    os.remove(archive.shard_path("2024-01"))
+    assert archive.load_shard("2024-01").stamp is None
+    assert "2024-01" not in archive.shards
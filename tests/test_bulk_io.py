@@ -0,0 +1,117 @@
+"""
+Bulk imports and exports (bulk_io.py and TaskManagerLogic.add_tasks_bulk / add_subtasks_bulk): invalid rows are
+reported with their row number or skipped, and dates and numbers survive a round trip through every file format.
+"""
+import io
+import json
+from datetime import date
+
+import pytest
+
+import bulk_io
+import cli
+from conftest import MemoryStorage, task_data
+from task_manager_logic import TaskManagerLogic
+from task_model import Task, Subtask
+
+
+def sample_records() -> tuple:
+    """
+    Returns tasks and subtasks with dates, numbers, free text and characters that need quoting.
+    """
+    tasks = [Task(1, "Report, final", "Work", "High", date(2024, 1, 31), date(2024, 2, 29), "Open", 0, ""),
+             Task(2, 'Say "hi"', "Home", "Low", date(2024, 3, 1), "TBD", "Completed", 12.5, "line 1\nline 2"),
+             Task(3, "Plain", "Work", "Medium", date(2023, 12, 31), date(2024, 1, 1), "In Progress", 100, "Ünïcode")]
+    subtasks = [Subtask(1, 1, "Draft", "Completed", 100, date(2024, 2, 1), date(2024, 1, 20)),
+                Subtask(2, 3, "Review", "Open", 0, "", "")]
+    return tasks, subtasks
+
+
+def test_missing_fields_are_reported_with_their_row_number():
+    storage = MemoryStorage()
+    logic = TaskManagerLogic(storage)
+    rows = [task_data(), task_data(), {"name": "Only a name"}, task_data()]
+    with pytest.raises(ValueError, match=r"^row 13: missing required task field\(s\): category, start_date, due_date$"):
+        logic.add_tasks_bulk(rows, first_row=11)
+    assert list(logic.tasks) == []  # Nothing is added when a row is invalid
+
+    logic.add_task(task_data())
+    with pytest.raises(ValueError, match=r"^row 2: task 99 does not exist$"):
+        logic.add_subtasks_bulk([{"task_id": 1, "name": "Sub", "status": "Open"},
+                                 {"task_id": 99, "name": "Sub", "status": "Open"}])
+    with pytest.raises(ValueError, match=r"^row 1: invalid task_id 'one'$"):
+        logic.add_subtasks_bulk([{"task_id": "one", "name": "Sub", "status": "Open"}])
+    assert list(logic.subtasks) == []
+    assert logic.close() and len(storage.batches) == 1
+
+
+def test_invalid_rows_can_be_skipped():
+    storage = MemoryStorage()
+    logic = TaskManagerLogic(storage)
+    logic.save_queue.debounce = 60  # Only the flush below writes
+    added, skipped = logic.add_tasks_bulk([task_data(name="First"), {"name": "x"}, task_data(name="Third")],
+                                          skip_invalid=True)
+    assert [(task.task_id, task.name) for task in added] == [(1, "First"), (2, "Third")]
+    assert skipped == [(2, "missing required task field(s): category, start_date, due_date")]
+
+    added, skipped = logic.add_subtasks_bulk([{"task_id": "7", "name": "Sub", "status": "Open"},
+                                              {"task_id": "2", "name": "Sub", "status": "Open"}], skip_invalid=True)
+    assert [(subtask.subtask_id, subtask.task_id) for subtask in added] == [(1, 2)]  # CSV IDs are text
+    assert skipped == [(1, "task 7 does not exist")]
+    assert logic.flush()
+    assert len(storage.batches) == 1 and len(storage.batches[0]) == 3
+    assert logic.close()
+
+
+def test_rows_that_are_not_objects_are_rejected():
+    logic = TaskManagerLogic(MemoryStorage())
+    rows = [task_data(), [1, 2], "name", None, task_data()]
+    with pytest.raises(ValueError, match=r"^row 2: expected an object with named fields, got list$"):
+        logic.add_tasks_bulk(rows)
+    added, skipped = logic.add_tasks_bulk(rows, skip_invalid=True)
+    assert len(added) == 2 and [number for number, _ in skipped] == [2, 3, 4]
+    with pytest.raises(ValueError, match=r"^row 1: expected an object"):
+        logic.add_subtasks_bulk([42])
+    assert logic.close()
+
+
+def test_cli_import_reports_rows_that_are_not_objects(excel_file, tmp_path, capsys):
+    path = tmp_path / "tasks.jsonl"
+    path.write_text("\n".join(json.dumps(row) for row in (task_data(), [1, 2], task_data())) + "\n")
+    assert cli.main(["--file", excel_file, "import", "tasks", str(path)]) == 1
+    assert "row 2: expected an object" in capsys.readouterr().err
+
+    assert cli.main(["--file", excel_file, "import", "tasks", str(path), "--skip-invalid"]) == 0
+    assert "skipped record 2" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize("file_format", ["csv", "json", "jsonl"])
+def test_dates_and_numbers_survive_a_round_trip(tmp_path, file_format):
+    tasks, subtasks = sample_records()
+    task_file, subtask_file = str(tmp_path / f"tasks.{file_format}"), str(tmp_path / f"subtasks.{file_format}")
+    assert bulk_io.write_records(task_file, Task.FIELDS, (task.as_row() for task in tasks)) == 3
+    assert bulk_io.write_records(subtask_file, Subtask.FIELDS, (subtask.as_row() for subtask in subtasks)) == 2
+
+    logic = TaskManagerLogic(MemoryStorage())
+    logic.add_tasks_bulk(bulk_io.read_records(task_file))
+    logic.add_subtasks_bulk(bulk_io.read_records(subtask_file))
+    assert [task.as_row() for task in logic.tasks] == [task.as_row() for task in tasks]
+    assert [subtask.as_row() for subtask in logic.subtasks] == [subtask.as_row() for subtask in subtasks]
+    assert logic.close()
+
+
+def test_json_values_are_plain_json():
+    assert bulk_io.json_value(date(2024, 2, 29)) == "2024-02-29"
+    assert [bulk_io.json_value(value) for value in (0, 12.5, "", None, "TBD")] == [0, 12.5, "", None, "TBD"]
+    stream = io.StringIO()
+    bulk_io.write_rows(stream, Task.FIELDS, [sample_records()[0][0].as_row()], "jsonl")
+    assert json.loads(stream.getvalue())["due_date"] == "2024-02-29"
+
+
+def test_json_array_is_streamed_across_chunk_boundaries():
+    text = json.dumps([{"name": "a" * 10, "value": [1, {"b": "]"}]}, {"name": "x"}, {}])
+    records = list(bulk_io._iter_json_array(io.StringIO(text), chunk_size=3))
+    assert records == json.loads(text)
+    for broken in ("", "{}", "[{}", "[{"):
+        with pytest.raises(ValueError):
+            list(bulk_io._iter_json_array(io.StringIO(broken), chunk_size=3))
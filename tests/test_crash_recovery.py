@@ -0,0 +1,138 @@
+"""
+Saves must survive a killed writer, failed writes must be reported and retried, and saving must not change
+file permissions or rewrite the workbook on every close (journal.py, save_queue.py, storage.py).
+"""
+import os
+import stat
+import subprocess
+import sys
+import time
+
+import pytest
+
+from conftest import MemoryStorage, task_data
+from excel_handler import ExcelHandler
+from journal import JournaledStorage
+from storage import UMASK, replace_atomically
+from task_manager_logic import TaskManagerLogic
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # Directory containing the app modules
+
+# Child process: add tasks forever and print each task ID after its save was flushed
+WRITER = """
+import sys
+from excel_handler import ExcelHandler
+from journal import JournaledStorage
+from task_manager_logic import TaskManagerLogic
+
+logic = TaskManagerLogic(JournaledStorage(ExcelHandler(sys.argv[1]), checkpoint_bytes=int(sys.argv[2])))
+while True:
+    task = logic.add_task({"name": "Task", "category": "Crash", "priority": "High", "start_date": "2024-01-01",
+                           "due_date": "2024-02-01", "status": "Open", "progress": 0, "notes": "x" * 200})
+    if logic.flush():
+        print(task.task_id, flush=True)
+"""
+
+
+class FailingStorage(MemoryStorage):
+    """A MemoryStorage whose writes raise while `failing` is True."""
+
+    def __init__(self):
+        super().__init__()
+        self.failing = True
+
+    def apply_changes(self, tasks, subtasks, changes):
+        if self.failing:
+            raise OSError("disk full")
+        super().apply_changes(tasks, subtasks, changes)
+
+
+@pytest.mark.parametrize("checkpoint_bytes", [300, 6000])
+def test_killed_writer_loses_no_acknowledged_save(tmp_path, checkpoint_bytes):
+    excel_file = str(tmp_path / "crash.xlsx")
+    acknowledged = 0
+    for delay in (0.8, 1.1, 1.4):  # Small checkpoints, so some kills land in the middle of an Excel rewrite
+        child = subprocess.Popen([sys.executable, "-c", WRITER, excel_file, str(checkpoint_bytes)], cwd=ROOT,
+                                 stdout=subprocess.PIPE, text=True, env=dict(os.environ, PYTHONPATH=ROOT))
+        time.sleep(delay)
+        child.kill()
+        saved = {int(line) for line in child.stdout.read().split()}
+        child.wait()
+
+        tasks, _ = JournaledStorage(ExcelHandler(excel_file)).load_data()  # Must load, whatever was interrupted
+        assert saved <= {task.task_id for task in tasks}
+        acknowledged += len(saved)
+    assert acknowledged  # The writer got far enough to report saves
+
+
+def test_failed_save_is_reported_and_retried():
+    storage = FailingStorage()
+    logic = TaskManagerLogic(storage)
+    task = logic.add_task(task_data())
+
+    assert not logic.flush()
+    assert isinstance(logic.save_error, OSError)
+    assert logic.save_queue.failures == 1
+
+    storage.failing = False
+    assert logic.flush()  # Retried right away instead of after the backoff
+    assert logic.save_error is None
+    assert [kind for batch in storage.batches for kind, _ in batch] == ["upsert_task"]
+    assert storage.batches[0][0][1].task_id == task.task_id
+    assert logic.close()
+
+
+def test_failed_save_is_retried_in_the_background():
+    storage = FailingStorage()
+    logic = TaskManagerLogic(storage)
+    logic.save_queue.debounce = 0.01
+    logic.add_task(task_data())
+    deadline = time.monotonic() + 5
+    while not logic.save_queue.failures and time.monotonic() < deadline:
+        time.sleep(0.01)
+    storage.failing = False
+    while not storage.batches and time.monotonic() < deadline:
+        time.sleep(0.05)  # The first retry comes after SaveQueue.RETRY_DELAY
+    assert storage.batches
+    assert logic.close()
+
+
+def test_close_reports_unsaved_changes():
+    logic = TaskManagerLogic(FailingStorage())
+    logic.add_task(task_data())
+    assert not logic.close()
+    assert isinstance(logic.save_error, OSError)
+
+
+def test_replaced_file_keeps_its_permissions(tmp_path):
+    path = str(tmp_path / "data.bin")
+    with open(path, "wb") as file:
+        file.write(b"old")
+    os.chmod(path, 0o644)
+    replace_atomically(path, lambda temp_path: open(temp_path, "wb").close())
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o644
+
+    new_path = str(tmp_path / "new.bin")
+    replace_atomically(new_path, lambda temp_path: open(temp_path, "wb").close())
+    assert stat.S_IMODE(os.stat(new_path).st_mode) == 0o666 & ~UMASK
+
+
+def test_close_checkpoints_only_after_enough_own_writes(excel_file):
+    logic = TaskManagerLogic(JournaledStorage(ExcelHandler(excel_file)))
+    logic.add_task(task_data())
+    workbook = os.stat(excel_file).st_mtime_ns
+    assert logic.close()
+    assert logic.storage.journal.has_entries()  # A small journal is left for the next checkpoint
+    assert os.stat(excel_file).st_mtime_ns == workbook
+
+    reader = TaskManagerLogic(JournaledStorage(ExcelHandler(excel_file), close_checkpoint_bytes=0))
+    assert len(reader.tasks) == 1
+    assert reader.close()  # Wrote nothing, so it never rewrites the workbook
+    assert os.stat(excel_file).st_mtime_ns == workbook
+
+    writer = TaskManagerLogic(JournaledStorage(ExcelHandler(excel_file), close_checkpoint_bytes=0))
+    writer.add_task(task_data())
+    assert writer.close()
+    assert not writer.storage.journal.has_entries()
+    tasks, _ = ExcelHandler(excel_file).load_data()
+    assert len(tasks) == 2
@@ -0,0 +1,120 @@
+"""
+Change events (events.py): the EventBus calls its subscribers in order, and the TkEventDispatcher delivers every
+event published during one pass of the Tk loop as a single batch, in publish order.
+"""
+import threading
+
+import events
+from conftest import MemoryStorage, task_data
+from events import EventBus, TkEventDispatcher
+from task_manager_logic import TaskManagerLogic
+
+
+class FakeRoot:
+    """Stands in for the Tk root: collects the callbacks passed to after_idle and after until the test runs them."""
+
+    def __init__(self):
+        self.idle = []  # Callbacks waiting for the loop to become idle
+        self.timers = []  # (milliseconds, callback) waiting for their delay
+
+    def after_idle(self, callback):
+        self.idle.append(callback)
+
+    def after(self, milliseconds, callback):
+        self.timers.append((milliseconds, callback))
+
+    def run_idle(self):
+        """
+        Run the idle callbacks, as Tk does once the current pass of the event loop is over.
+        """
+        callbacks, self.idle = self.idle, []
+        for callback in callbacks:
+            callback()
+
+    def run_timers(self):
+        """
+        Run the timer callbacks that are due.
+        """
+        timers, self.timers = self.timers, []
+        for _, callback in timers:
+            callback()
+
+
+def kinds(batch) -> list:
+    """
+    Returns the (kind, task ID, subtask ID) of each event in a batch.
+    """
+    return [(event.kind, event.task_id, event.subtask_id) for event in batch]
+
+
+def test_bus_calls_subscribers_in_order():
+    bus = EventBus()
+    bus.publish(events.TASK_ADDED, 1)  # No subscribers: nothing happens
+    received = []
+    unsubscribe = bus.subscribe(lambda event: received.append(("first", event.kind)))
+    bus.subscribe(lambda event: received.append(("second", event.kind)))
+    bus.subscribe(lambda event: event.kind == events.TASK_ADDED and unsubscribe())  # Allowed while publishing
+    bus.publish(events.TASK_ADDED, 1)
+    bus.publish(events.TASK_DELETED, 1)
+    assert received == [("first", events.TASK_ADDED), ("second", events.TASK_ADDED), ("second", events.TASK_DELETED)]
+
+
+def test_events_of_one_cycle_arrive_as_one_batch():
+    root, bus = FakeRoot(), EventBus()
+    dispatcher = TkEventDispatcher(root, bus)
+    batches = []
+    dispatcher.subscribe(batches.append)
+
+    bus.publish(events.TASK_ADDED, 1)
+    bus.publish(events.SUBTASK_ADDED, 1, 10)
+    bus.publish(events.TASK_UPDATED, 1)
+    assert len(root.idle) == 1 and batches == []  # One delivery is scheduled, nothing is delivered yet
+    root.run_idle()
+    assert [kinds(batch) for batch in batches] == [[(events.TASK_ADDED, 1, None), (events.SUBTASK_ADDED, 1, 10),
+                                                   (events.TASK_UPDATED, 1, None)]]
+
+    bus.publish(events.TASK_DELETED, 1)  # The next cycle gets its own batch
+    root.run_idle()
+    assert [kinds(batch) for batch in batches[1:]] == [[(events.TASK_DELETED, 1, None)]]
+    root.run_idle()
+    assert len(batches) == 2  # Nothing queued: no empty batch
+
+
+def test_events_from_other_threads_are_delivered_by_the_poll():
+    root, bus = FakeRoot(), EventBus()
+    dispatcher = TkEventDispatcher(root, bus, poll_interval=20)
+    batches = []
+    dispatcher.subscribe(batches.append)
+
+    thread = threading.Thread(target=lambda: [bus.publish(events.SAVE_COMPLETED) for _ in range(3)])
+    thread.start()
+    thread.join()
+    assert root.idle == []  # Tk must not be touched from the writer thread
+    bus.publish(events.TASK_ADDED, 4)
+    root.run_timers()
+    assert [kinds(batch) for batch in batches] == [[(events.SAVE_COMPLETED, None, None)] * 3 +
+                                                   [(events.TASK_ADDED, 4, None)]]
+    assert [milliseconds for milliseconds, _ in root.timers] == [20]  # The poll schedules itself again
+    root.run_idle()  # The idle delivery scheduled by the Tk-thread event finds nothing left
+    assert len(batches) == 1
+
+
+def test_logic_changes_are_batched_in_order():
+    root = FakeRoot()
+    logic = TaskManagerLogic(MemoryStorage())
+    logic.save_queue.debounce = 60  # Keep save events out of this cycle
+    dispatcher = TkEventDispatcher(root, logic.events)
+    batches = []
+    dispatcher.subscribe(batches.append)
+
+    task = logic.add_task(task_data())
+    subtask = logic.add_subtask({"task_id": task.task_id, "name": "Sub", "status": "Open", "progress": 0,
+                                 "due_date": None, "completed_date": None})
+    logic.update_task(task.task_id, {"status": "Completed"})
+    logic.delete_task(task.task_id)
+    root.run_idle()
+    assert [kinds(batch) for batch in batches] == [[(events.TASK_ADDED, task.task_id, None),
+                                                   (events.SUBTASK_ADDED, task.task_id, subtask.subtask_id),
+                                                   (events.TASK_UPDATED, task.task_id, None),
+                                                   (events.TASK_DELETED, task.task_id, None)]]
+    assert logic.close()
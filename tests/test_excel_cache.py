@@ -0,0 +1,121 @@
+"""
+The sidecar cache of parsed rows (excel_handler.py) is only used while it matches the workbook: a changed size,
+mtime or BLAKE2 hash, or a damaged or foreign cache file, makes the handler parse the workbook again.
+"""
+import os
+import pickle
+
+import pytest
+
+from excel_handler import CACHE_VERSION, ExcelHandler
+from task_model import Task, Subtask
+
+
+def rows(tasks, subtasks) -> tuple:
+    """
+    Returns the loaded records as plain rows, for comparing two loads.
+    """
+    return [task.as_row() for task in tasks], [subtask.as_row() for subtask in subtasks]
+
+
+def sample_data(count: int) -> tuple:
+    """
+    Returns `count` tasks with one subtask each.
+    """
+    tasks = [Task(task_id, f"Task {task_id}", "Work", "High", None, None, "Open", 0, f"Notes {task_id}")
+             for task_id in range(1, count + 1)]
+    subtasks = [Subtask(task_id, task_id, f"Subtask {task_id}", "Open", 0, None, None)
+                for task_id in range(1, count + 1)]
+    return tasks, subtasks
+
+
+def rewrite_cache(handler: ExcelHandler, header=None, data: bytes = None):
+    """
+    Replace the cache file with another header (keeping the rows) or with raw bytes.
+    """
+    if data is None:
+        with open(handler.cache_file, "rb") as file:
+            pickle.load(file)
+            cached_rows = pickle.load(file)
+        data = pickle.dumps(header, protocol=5) + pickle.dumps(cached_rows, protocol=5)
+    with open(handler.cache_file, "wb") as file:
+        file.write(data)
+
+
+@pytest.fixture
+def parses(monkeypatch):
+    """
+    Counts how often a workbook is parsed instead of read from the cache.
+    """
+    calls = []
+    iter_chunks = ExcelHandler.iter_chunks
+
+    def counting_iter_chunks(self, *args, **kwargs):
+        calls.append(self.excel_file)
+        return iter_chunks(self, *args, **kwargs)
+
+    monkeypatch.setattr(ExcelHandler, "iter_chunks", counting_iter_chunks)
+    return calls
+
+
+@pytest.fixture
+def handler(excel_file):
+    """
+    A handler whose workbook holds three tasks and whose cache matches it.
+    """
+    handler = ExcelHandler(excel_file)
+    handler.save_data(*sample_data(3))
+    return handler
+
+
+def test_unchanged_workbook_is_read_from_the_cache(handler, parses):
+    loaded = ExcelHandler(handler.excel_file).load_data()
+    assert parses == []
+    assert rows(*loaded) == rows(*ExcelHandler(handler.excel_file, cache=False).load_data())
+
+
+@pytest.mark.parametrize("field", [0, 1, 2], ids=["size", "mtime", "hash"])
+def test_cache_with_another_key_is_discarded(handler, parses, field):
+    key = list(handler.cache_key())
+    key[field] = key[field] + 1 if field < 2 else "0" * len(key[field])
+    rewrite_cache(handler, header=(CACHE_VERSION, Task.FIELDS, Subtask.FIELDS, tuple(key)))
+
+    assert rows(*handler.load_data()) == rows(*sample_data(3))
+    assert len(parses) == 1
+    handler.load_data()
+    assert len(parses) == 1  # The cache was rewritten for the parsed workbook
+
+
+def test_workbook_changed_by_another_program_is_parsed(handler, parses):
+    stat = os.stat(handler.excel_file)
+    ExcelHandler(handler.excel_file, cache=False).save_data(*sample_data(5))  # Leaves the old cache behind
+    os.utime(handler.excel_file, ns=(stat.st_atime_ns, stat.st_mtime_ns))  # Even with the old mtime
+
+    assert rows(*handler.load_data()) == rows(*sample_data(5))
+    assert len(parses) == 1
+
+    with open(handler.excel_file, "r+b") as file:
+        file.write(b"\0")  # Damage a byte: same size and mtime, another hash
+    os.utime(handler.excel_file, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert handler.read_cache() is None
+
+
+@pytest.mark.parametrize("damage", ["truncated", "corrupt", "empty", "newer_protocol", "old_version"])
+def test_damaged_or_foreign_cache_is_discarded(handler, parses, damage):
+    with open(handler.cache_file, "rb") as file:
+        data = file.read()
+    if damage == "truncated":
+        rewrite_cache(handler, data=data[:len(data) // 2])
+    elif damage == "corrupt":
+        rewrite_cache(handler, data=data[:2] + b"\xff" * (len(data) - 2))
+    elif damage == "empty":
+        rewrite_cache(handler, data=b"")
+    elif damage == "newer_protocol":
+        rewrite_cache(handler, data=b"\x80\x63" + data[2:])  # Written by a pickle protocol this Python lacks
+    else:
+        rewrite_cache(handler, header=(CACHE_VERSION - 1, Task.FIELDS, Subtask.FIELDS, handler.cache_key()))
+
+    assert handler.read_cache() is None
+    assert rows(*handler.load_data()) == rows(*sample_data(3))
+    assert len(parses) == 1
+    assert handler.read_cache() is not None  # Replaced by a valid cache
@@ -0,0 +1,69 @@
+"""
+Replaying journal entries (journal.replay) must give the same data as applying them one by one to full lists.
+"""
+import random
+
+from journal import replay
+from storage import UPSERT_TASK, UPSERT_SUBTASK, DELETE_TASK, DELETE_SUBTASK
+from task_model import Task, Subtask
+
+
+def naive_replay(tasks, subtasks, changes) -> tuple:
+    """
+    Apply the changes by scanning the lists, the obviously correct way.
+    """
+    tasks, subtasks = list(tasks), list(subtasks)
+    for kind, value in changes:
+        if kind == UPSERT_TASK:
+            tasks = [task for task in tasks if task.task_id != value.task_id] + [value]
+        elif kind == UPSERT_SUBTASK:
+            if any(task.task_id == value.task_id for task in tasks):
+                subtasks = [subtask for subtask in subtasks if subtask.subtask_id != value.subtask_id] + [value]
+        elif kind == DELETE_TASK:
+            tasks = [task for task in tasks if task.task_id != value]
+            subtasks = [subtask for subtask in subtasks if subtask.task_id != value]
+        else:
+            subtasks = [subtask for subtask in subtasks if subtask.subtask_id != value]
+    return tasks, subtasks
+
+
+def rows(records) -> list:
+    """
+    Returns the sorted rows of the records, to compare lists whose order differs.
+    """
+    return sorted(record.as_row() for record in records)
+
+
+def test_replay_matches_applying_each_change():
+    rng = random.Random(3)
+    tasks = [Task(i, f"Task {i}", "Work", "High", "2024-01-01", "2024-02-01", "Open", 0, "") for i in range(1, 41)]
+    subtasks = [Subtask(i, rng.randrange(1, 45), f"Subtask {i}", "Open", 0, None, None) for i in range(1, 121)]
+    changes = []
+    for step in range(2000):
+        choice = rng.random()
+        if choice < 0.2:
+            task_id = rng.randrange(1, 60)
+            changes.append((UPSERT_TASK, Task(task_id, f"Task {step}", "Work", "High", None, None, "Open", 0, "")))
+        elif choice < 0.6:  # New subtasks, edits and moves to another (possibly deleted) task
+            changes.append((UPSERT_SUBTASK, Subtask(rng.randrange(1, 200), rng.randrange(1, 60), f"Subtask {step}",
+                                                    "Open", 0, None, None)))
+        elif choice < 0.8:
+            changes.append((DELETE_TASK, rng.randrange(1, 60)))
+        else:
+            changes.append((DELETE_SUBTASK, rng.randrange(1, 200)))
+
+    for end in (1, 10, 100, 2000):
+        actual = replay(tasks, subtasks, changes[:end])
+        expected = naive_replay(tasks, subtasks, changes[:end])
+        assert rows(actual[0]) == rows(expected[0])
+        assert rows(actual[1]) == rows(expected[1])
+
+
+def test_replaying_many_task_deletes_removes_their_subtasks():
+    tasks = [Task(i, f"Task {i}", "Work", "High", None, None, "Open", 0, "") for i in range(1, 2001)]
+    subtasks = [Subtask(i, (i - 1) // 3 + 1, f"Subtask {i}", "Open", 0, None, None) for i in range(1, 6001)]
+    changes = [(DELETE_TASK, task_id) for task_id in range(1, 2001, 2)]  # As archiving a backlog journals them
+    tasks, subtasks = replay(tasks, subtasks, changes)
+    assert [task.task_id for task in tasks] == list(range(2, 2001, 2))
+    assert len(subtasks) == 3000
+    assert all(subtask.task_id % 2 == 0 for subtask in subtasks)
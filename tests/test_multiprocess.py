@@ -0,0 +1,95 @@
+"""
+Several processes sharing one journaled Excel file must never hand out the same ID, lose or resurrect tasks,
+or end up with data that differs from the file (journal.py, file_lock.py).
+"""
+import multiprocessing
+import random
+
+from conftest import task_data
+from excel_handler import ExcelHandler
+from journal import JournaledStorage
+from task_manager_logic import TaskManagerLogic
+
+PROCESSES = 3  # Number of processes writing at the same time
+OPERATIONS = 60  # Random operations per process
+
+
+def open_logic(excel_file: str) -> TaskManagerLogic:
+    """
+    Open the shared file with small checkpoints, so the workbook is rewritten while other processes write,
+    and with a checkpoint whenever a process that wrote closes.
+    """
+    return TaskManagerLogic(JournaledStorage(ExcelHandler(excel_file), checkpoint_bytes=4 * 1024,
+                                             close_checkpoint_bytes=0))
+
+
+def state_of(tasks, subtasks) -> tuple:
+    """
+    Returns a comparable picture of the data: sorted task rows and sorted subtask rows.
+    """
+    return sorted(task.as_row() for task in tasks), sorted(subtask.as_row() for subtask in subtasks)
+
+
+def worker(number: int, excel_file: str, barrier, results):
+    """
+    Add, edit and delete records at random, merging the other processes' changes now and then, and report
+    the IDs this process handed out and deleted together with its data after a final merge.
+    """
+    rng = random.Random(number)
+    logic = open_logic(excel_file)
+    logic.save_queue.debounce = 0.01
+    added_tasks, added_subtasks, deleted_tasks = [], [], []
+    for step in range(OPERATIONS):
+        choice = rng.random()
+        task_ids = logic.get_task_ids()
+        if choice < 0.45 or not task_ids:
+            added_tasks.append(logic.add_task(task_data(name=f"p{number}-{step}", category=f"P{number}")).task_id)
+        elif choice < 0.65:
+            subtask = logic.add_subtask({"task_id": rng.choice(task_ids), "name": f"p{number}-{step}",
+                                         "status": "Open", "progress": 0, "due_date": None, "completed_date": None})
+            added_subtasks.append(subtask.subtask_id)
+        elif choice < 0.85:
+            logic.update_task(rng.choice(task_ids), {"notes": f"edited by p{number} at {step}"})
+        elif choice < 0.92:
+            own = [task_id for task_id in added_tasks if logic.task_exists(task_id) and task_id not in deleted_tasks]
+            if own:
+                task_id = rng.choice(own)
+                logic.delete_task(task_id)
+                deleted_tasks.append(task_id)
+        else:
+            logic.flush()
+            logic.merge_remote_changes()
+
+    logic.flush()
+    barrier.wait()  # Everyone has written everything
+    logic.merge_remote_changes()
+    results.put((number, added_tasks, added_subtasks, deleted_tasks, state_of(logic.tasks, logic.subtasks)))
+    barrier.wait()  # Do not checkpoint on close until every process has merged
+    logic.close()
+
+
+def test_concurrent_writers_share_one_file(excel_file):
+    barrier, results = multiprocessing.Barrier(PROCESSES), multiprocessing.Queue()
+    children = [multiprocessing.Process(target=worker, args=(number, excel_file, barrier, results))
+                for number in range(PROCESSES)]
+    for child in children:
+        child.start()
+    reports = [results.get(timeout=120) for _ in children]
+    for child in children:
+        child.join(timeout=60)
+        assert child.exitcode == 0
+
+    storage = JournaledStorage(ExcelHandler(excel_file))
+    tasks, subtasks = storage.load_data()
+    task_ids = {task.task_id for task in tasks}
+    all_tasks = [task_id for report in reports for task_id in report[1]]
+    all_subtasks = [subtask_id for report in reports for subtask_id in report[2]]
+    deleted = {task_id for report in reports for task_id in report[3]}
+
+    assert len(all_tasks) == len(set(all_tasks)), "duplicate task IDs handed out"
+    assert len(all_subtasks) == len(set(all_subtasks)), "duplicate subtask IDs handed out"
+    assert set(all_tasks) - deleted <= task_ids, "tasks were lost"
+    assert not deleted & task_ids, "deleted tasks came back"
+    for number, *_, state in reports:
+        assert state == state_of(tasks, subtasks), f"process {number} does not match the file after merging"
+    assert not storage.journal.has_entries(), "the journal was not checkpointed on close"
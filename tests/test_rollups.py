@@ -0,0 +1,139 @@
+"""
+The incrementally maintained rollups and dashboard aggregates (rollups.py) must always equal a recomputation
+from scratch, whatever sequence of mutations and day changes led to them.
+"""
+import math
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from conftest import MemoryStorage
+from rollups import subtask_progress
+from task_manager_logic import TaskManagerLogic
+from task_model import Task, Subtask, is_completed
+
+STATUSES = ("Open", "In Progress", "Completed", "Done", "Blocked")
+PROGRESS = (0, 10, 25.5, 50, 100, "n/a", "")
+START = date(2024, 1, 1)
+TASKS = 300  # Tasks in the initial store, with one to three subtasks each
+
+
+def random_subtask(rng, subtask_id: int, task_id: int) -> Subtask:
+    due = START + timedelta(days=rng.randrange(120)) if rng.random() < 0.9 else "someday"
+    return Subtask(subtask_id, task_id, f"Subtask {subtask_id}", rng.choice(STATUSES), rng.choice(PROGRESS), due, None)
+
+
+def brute_force(logic, today: date) -> dict:
+    """
+    Recompute every derived value by scanning all tasks and subtasks.
+    """
+    per_task = {}
+    subtasks_by_status = {}
+    overdue_subtasks = 0
+    for subtask in logic.subtasks:
+        totals = per_task.setdefault(subtask.task_id, [0, 0, 0, 0])
+        totals[0] += 1
+        totals[2] += subtask_progress(subtask)
+        if is_completed(subtask.status):
+            totals[1] += 1
+        elif isinstance(subtask.due_date, date) and subtask.due_date < today:
+            totals[3] += 1
+            overdue_subtasks += 1
+        subtasks_by_status[subtask.status] = subtasks_by_status.get(subtask.status, 0) + 1
+
+    by_category_status, windows = {}, {"overdue": 0, "today": 0, "next_7_days": 0, "later": 0, "no_due_date": 0}
+    for task in logic.tasks:
+        statuses = by_category_status.setdefault(task.category, {})
+        statuses[task.status] = statuses.get(task.status, 0) + 1
+        if is_completed(task.status):
+            continue
+        if not isinstance(task.due_date, date):
+            windows["no_due_date"] += 1
+        elif task.due_date < today:
+            windows["overdue"] += 1
+        elif task.due_date == today:
+            windows["today"] += 1
+        elif task.due_date <= today + timedelta(days=7):
+            windows["next_7_days"] += 1
+        else:
+            windows["later"] += 1
+    rollups = {task_id: {"subtasks": totals[0], "completed_subtasks": totals[1],
+                         "progress": totals[2] / totals[0], "overdue_subtasks": totals[3]}
+               for task_id, totals in per_task.items()}
+    return {"rollups": rollups, "by_category_status": by_category_status, "due_windows": windows,
+            "subtasks_by_status": subtasks_by_status, "overdue_subtasks": overdue_subtasks}
+
+
+def check(logic, today: date, step: int):
+    """
+    Assert that the incremental values equal the brute-force recomputation.
+    """
+    expected = brute_force(logic, today)
+    dashboard = logic.dashboard(today)
+    for key in ("by_category_status", "due_windows", "subtasks_by_status", "overdue_subtasks"):
+        assert dashboard[key] == expected[key], f"step {step}: {key} differs"
+    empty = {"subtasks": 0, "completed_subtasks": 0, "progress": None, "overdue_subtasks": 0}
+    for task in logic.tasks:
+        actual = logic.rollups.rollup(task.task_id)
+        wanted = expected["rollups"].get(task.task_id, empty)
+        if wanted["progress"] is None:
+            assert actual["progress"] is None, f"step {step}: task {task.task_id} has progress without subtasks"
+        else:
+            assert math.isclose(actual["progress"], wanted["progress"], abs_tol=1e-9), \
+                f"step {step}: progress of task {task.task_id} differs"
+        assert dict(actual, progress=None) == dict(wanted, progress=None), f"step {step}: task {task.task_id} differs"
+
+
+@pytest.mark.parametrize("seed", [1, 2])
+def test_rollups_match_brute_force(seed):
+    rng = random.Random(seed)
+    tasks, subtasks = [], []
+    for task_id in range(1, TASKS + 1):
+        due = START + timedelta(days=rng.randrange(120)) if rng.random() < 0.95 else ""
+        tasks.append(Task(task_id, f"Task {task_id}", f"Category {task_id % 12}", "High", START, due,
+                          rng.choice(STATUSES), 0, ""))
+        for _ in range(rng.randrange(1, 4)):
+            subtasks.append(random_subtask(rng, len(subtasks) + 1, task_id))
+    logic = TaskManagerLogic(MemoryStorage(tasks, subtasks))
+
+    today = START + timedelta(days=60)
+    check(logic, today, 0)
+    for step in range(1, 3001):
+        choice = rng.random()
+        task_ids = logic.store.tasks_by_id
+        if choice < 0.3:
+            task_id = rng.randrange(1, TASKS + 1)
+            if task_id in task_ids:
+                logic.add_subtask({field: value for field, value in
+                                   zip(Subtask.FIELDS[1:], random_subtask(rng, 0, task_id).as_row()[1:])})
+        elif choice < 0.6:
+            subtask_id = rng.randrange(1, logic.store.next_subtask_id)
+            if subtask_id in logic.store.subtasks_by_id:
+                changes = {"status": rng.choice(STATUSES), "progress": rng.choice(PROGRESS)}
+                target = rng.randrange(1, TASKS + 1)
+                if rng.random() < 0.1 and target in task_ids:
+                    changes["task_id"] = target  # Move it to another task
+                if rng.random() < 0.3:
+                    changes["due_date"] = START + timedelta(days=rng.randrange(120))
+                logic.update_subtask(subtask_id, changes)
+        elif choice < 0.75:
+            subtask_id = rng.randrange(1, logic.store.next_subtask_id)
+            if subtask_id in logic.store.subtasks_by_id:
+                logic.delete_subtask(subtask_id)
+        elif choice < 0.9:
+            task_id = rng.randrange(1, TASKS + 1)
+            if task_id in task_ids:
+                logic.update_task(task_id, {"status": rng.choice(STATUSES),
+                                            "due_date": START + timedelta(days=rng.randrange(120))})
+        elif choice < 0.98:
+            task_id = rng.randrange(1, TASKS + 1)
+            if task_id in task_ids:
+                logic.delete_task(task_id)
+        else:
+            today += timedelta(days=rng.choice((-3, 1, 2)))
+            logic.rollups.set_today(today)
+        if step % 100 == 0:
+            check(logic, today, step)
+    check(logic, today, 3000)
+    assert logic.close()
@@ -0,0 +1,89 @@
+"""
+The background writer (save_queue.py) merges bursts of save requests into one write, never lets a steady stream
+of requests postpone a write beyond max_wait, and reports through flush() and close() whether everything was written.
+"""
+import threading
+import time
+
+import pytest
+
+from conftest import MemoryStorage, task_data
+from save_queue import SaveQueue
+from task_manager_logic import TaskManagerLogic
+
+
+class CountingSave:
+    """A save_func that counts its calls, can be made to fail, and can be held inside the write."""
+
+    def __init__(self):
+        self.calls = 0
+        self.error = None  # Raised by every call while set
+        self.written = threading.Event()  # Set after each call
+        self.release = threading.Event()  # Calls wait for this while `hold` is True
+        self.hold = False
+
+    def __call__(self):
+        if self.hold:
+            self.release.wait(5)
+        self.calls += 1
+        self.written.set()
+        if self.error is not None:
+            raise self.error
+
+
+def test_burst_of_changes_is_written_once():
+    storage = MemoryStorage()
+    logic = TaskManagerLogic(storage)
+    logic.save_queue.debounce = 60  # Nothing is written on its own during the test
+    for number in range(50):
+        logic.add_task(task_data(name=f"Task {number}"))
+    assert storage.batches == []
+
+    assert logic.flush() is True
+    assert len(storage.batches) == 1 and len(storage.batches[0]) == 50  # One write with every change
+    assert (logic.save_queue.requests, logic.save_queue.writes, logic.save_queue.coalesced) == (50, 1, 49)
+    assert logic.flush() is True and len(storage.batches) == 1  # Nothing left to write
+    assert logic.close() is True
+
+
+def test_steady_requests_are_written_within_max_wait():
+    save = CountingSave()
+    queue = SaveQueue(save, lambda: (), debounce=60, max_wait=0.2)
+    started = time.monotonic()
+    while not save.written.is_set() and time.monotonic() - started < 5:
+        queue.request_save()  # Every request restarts the debounce window
+        time.sleep(0.01)
+    elapsed = time.monotonic() - started
+    assert save.calls == 1
+    assert 0.2 <= elapsed < 5
+    assert queue.close() is True
+
+
+def test_flush_and_close_report_failed_writes():
+    save = CountingSave()
+    queue = SaveQueue(save, lambda: (), debounce=60)
+    save.error = OSError("disk full")
+    queue.request_save()
+    assert queue.flush() is False
+    assert isinstance(queue.last_error, OSError) and queue.failures == 1 and not queue.idle
+
+    save.error = None
+    assert queue.flush() is True  # Retried at once instead of after the backoff
+    assert (save.calls, queue.writes, queue.last_error) == (2, 1, None)
+
+    save.error = OSError("disk full")
+    queue.request_save()
+    assert queue.close() is False  # The writer stops without retrying
+    with pytest.raises(RuntimeError):
+        queue.request_save()
+
+
+def test_flush_gives_up_after_its_timeout():
+    save = CountingSave()
+    queue = SaveQueue(save, lambda: (), debounce=60)
+    save.hold = True
+    queue.request_save()
+    assert queue.flush(timeout=0.1) is False  # Still inside save_func
+    save.release.set()
+    assert queue.flush() is True
+    assert queue.close() is True and save.calls == 1
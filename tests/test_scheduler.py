@@ -0,0 +1,188 @@
+"""
+The due-date scheduler (scheduler.py) must fire exactly the reminders and overdue notices a brute-force
+recomputation of every record's deadlines gives, through edits, deletes, completions and reloads.
+"""
+import random
+from collections import Counter
+from datetime import date, datetime, timedelta
+
+import pytest
+
+import events
+from conftest import MemoryStorage, task_data
+from excel_handler import ExcelHandler
+from journal import JournaledStorage
+from scheduler import REMINDER, OVERDUE
+from task_manager_logic import TaskManagerLogic
+from task_model import Task, Subtask, is_completed
+
+STATUSES = ("Open", "In Progress", "Completed", "Blocked")
+START = datetime(2024, 1, 1, 9, 30)
+
+
+class Clock:
+    """A clock the test moves forward by hand."""
+
+    def __init__(self, now: datetime):
+        self.now = now
+
+    def __call__(self) -> datetime:
+        return self.now
+
+
+def stages(record, lead: timedelta) -> list:
+    """
+    Returns the (time, stage) pairs of a record's deadline, or none if it is completed or has no real due date.
+    """
+    if not isinstance(record.due_date, date) or is_completed(record.status):
+        return []
+    start_of_day = datetime.combine(record.due_date, datetime.min.time())
+    return [(start_of_day - lead, REMINDER), (start_of_day + timedelta(days=1), OVERDUE)]
+
+
+def records(logic) -> list:
+    """
+    Returns the (("task"/"subtask", ID), record) pairs of every task and subtask.
+    """
+    return [(("task", task.task_id), task) for task in logic.tasks] + \
+           [(("subtask", subtask.subtask_id), subtask) for subtask in logic.subtasks]
+
+
+def expected_fired(logic, since: datetime, now: datetime) -> Counter:
+    """
+    Returns the stages that should fire when the clock moves from `since` to `now`, computed from scratch.
+    """
+    lead = logic.deadlines.lead
+    return Counter((stage, key) for key, record in records(logic)
+                   for fire_at, stage in stages(record, lead) if since < fire_at <= now)
+
+
+def check_schedule(logic, now: datetime, step: int):
+    """
+    Assert that every live heap entry is the first stage after `now` of an open, dated record.
+    """
+    scheduler = logic.deadlines
+    scheduled = {entry[2]: entry[0] for entry in scheduler.heap if scheduler.versions.get(entry[2]) == entry[1]}
+    expected = {}
+    for key, record in records(logic):
+        later = [fire_at for fire_at, _ in stages(record, scheduler.lead) if fire_at > now]
+        if later:
+            expected[key] = later[0]
+    assert scheduled == expected, f"step {step}: scheduled deadlines differ"
+    assert len(scheduler) == len(expected)
+
+
+def random_due(rng, now: datetime) -> date:
+    """
+    A due date from two days before to nine days after `now`.
+    """
+    return (now + timedelta(days=rng.randrange(-2, 10))).date()
+
+
+def time_of(logic, key: tuple, stage: str) -> datetime:
+    """
+    Returns the time a stage of a record's deadline fires.
+    """
+    record = logic.store.get_task(key[1]) if key[0] == "task" else logic.store.get_subtask(key[1])
+    return dict((stage, fire_at) for fire_at, stage in stages(record, logic.deadlines.lead))[stage]
+
+
+@pytest.mark.parametrize("seed", [1, 2])
+def test_fired_deadlines_match_brute_force(seed):
+    rng = random.Random(seed)
+    clock = Clock(START)
+    tasks = [Task(task_id, f"Task {task_id}", "Work", "High", START.date(), random_due(rng, START),
+                  rng.choice(STATUSES), 0, "") for task_id in range(1, 201)]
+    subtasks = [Subtask(subtask_id, rng.randrange(1, 201), f"Subtask {subtask_id}", rng.choice(STATUSES), 0,
+                        random_due(rng, START) if rng.random() < 0.9 else "", None) for subtask_id in range(1, 201)]
+    logic = TaskManagerLogic(MemoryStorage(tasks, subtasks), load=False)
+    logic.deadlines.clock = clock
+    logic.load_data()
+    logic.deadlines.COMPACT_MIN = 16  # Rebuild the heap without stale entries now and then
+    published = []
+    logic.events.subscribe(lambda event: published.append(event) if event.kind in (
+        events.DEADLINE_REMINDER, events.DEADLINE_OVERDUE) else None)
+
+    check_schedule(logic, clock.now, 0)
+    total = 0
+    for step in range(1, 3001):
+        choice = rng.random()
+        task_ids = logic.get_task_ids()
+        subtask_ids = list(logic.store.subtasks_by_id)
+        if choice < 0.3 and task_ids:  # Reschedule: the old heap entry goes stale (lazy deletion)
+            logic.update_task(rng.choice(task_ids), {"due_date": random_due(rng, clock.now),
+                                                     "status": rng.choice(STATUSES)})
+        elif choice < 0.5 and subtask_ids:
+            logic.update_subtask(rng.choice(subtask_ids), {"due_date": random_due(rng, clock.now),
+                                                           "status": rng.choice(STATUSES)})
+        elif choice < 0.6 and task_ids:
+            logic.delete_task(rng.choice(task_ids))
+        elif choice < 0.7:
+            task = logic.add_task(task_data(start_date=clock.now.date(), due_date=random_due(rng, clock.now)))
+            if rng.random() < 0.5:
+                logic.add_subtask({"task_id": task.task_id, "name": "New", "status": "Open", "progress": 0,
+                                   "due_date": random_due(rng, clock.now), "completed_date": None})
+        elif choice < 0.75 and subtask_ids:
+            logic.delete_subtask(rng.choice(subtask_ids))
+        else:
+            since, clock.now = clock.now, clock.now + timedelta(minutes=rng.randrange(1, 600))
+            expected = expected_fired(logic, since, clock.now)
+            fired = logic.fire_deadlines(clock.now)
+            assert Counter(fired) == expected, f"step {step}: fired deadlines differ"
+            assert [time_of(logic, key, stage) for stage, key in fired] == \
+                sorted(time_of(logic, key, stage) for stage, key in fired)
+            total += len(fired)
+            check_schedule(logic, clock.now, step)
+    assert total and len(published) == total  # Every fired deadline was published once
+    assert logic.deadlines.stale <= len(logic.deadlines.heap)
+    assert logic.close()
+
+
+def test_deadlines_are_rebuilt_after_an_excel_import(tmp_path):
+    clock = Clock(START)
+    source = TaskManagerLogic(MemoryStorage(), load=False)
+    source.load_data()
+    source.add_task(task_data(due_date="2024-01-03"))
+    early = source.add_task(task_data(due_date="2024-01-02"))
+    source.add_subtask({"task_id": early.task_id, "name": "Sub", "status": "Open", "progress": 0,
+                        "due_date": "2024-01-05", "completed_date": None})
+    imported = str(tmp_path / "imported.xlsx")
+    source.export_excel(imported)
+    assert source.close()
+
+    excel_file = str(tmp_path / "tasks.xlsx")
+    ExcelHandler(excel_file).create_excel_file()
+    logic = TaskManagerLogic(JournaledStorage(ExcelHandler(excel_file)), load=False)
+    logic.deadlines.clock = clock
+    logic.load_data()
+    logic.add_task(task_data(due_date="2024-01-20"))  # Replaced by the import; its deadline must go too
+    armed = []
+    logic.deadlines.listener = armed.append
+
+    logic.import_excel(imported)
+    assert armed[-1] == datetime(2024, 1, 2)  # Re-armed for the earliest imported deadline (task 1's reminder)
+    check_schedule(logic, clock.now, 0)
+    clock.now = datetime(2024, 1, 7)
+    assert Counter(logic.fire_deadlines(clock.now)) == expected_fired(logic, START, clock.now)
+    assert logic.close()
+
+
+def test_excel_import_skips_archived_ids(tmp_path):
+    excel_file = str(tmp_path / "tasks.xlsx")
+    ExcelHandler(excel_file).create_excel_file()
+    logic = TaskManagerLogic(ExcelHandler(excel_file))  # No shared ID blocks: only the archive knows the IDs
+    for _ in range(5):
+        logic.add_task(task_data(due_date="2020-01-15", status="Completed"))
+    logic.archive_tasks(before=date(2021, 1, 1))
+    assert logic.archive.manifest()["next_task_id"] == 6
+
+    imported = str(tmp_path / "imported.xlsx")
+    source = TaskManagerLogic(MemoryStorage())
+    source.add_task(task_data())
+    source.export_excel(imported)
+    assert source.close()
+
+    logic.import_excel(imported)
+    assert logic.get_task_ids() == [1]
+    assert logic.add_task(task_data()).task_id == 6  # Not one of the archived IDs 2-5
+    assert logic.close()
@@ -0,0 +1,129 @@
+"""
+Full-text searches (search_index.py) must find exactly the tasks a scan of every task's and subtask's words
+finds, however the records were added, edited, moved and deleted.
+"""
+import random
+
+import pytest
+
+from conftest import MemoryStorage, task_data
+from search_index import tokenize
+from task_manager_logic import TaskManagerLogic
+from task_model import Task, Subtask
+
+# A small vocabulary with shared prefixes, so prefix terms often match several words
+VOCABULARY = ("report", "reports", "review", "rev", "plan", "planning", "plant", "budget", "bud", "client",
+              "design", "Überblick", "übung", "fix_2", "draft", "meeting", "meet")
+
+
+def phrase(rng, words: int) -> str:
+    """
+    A text of a few words from the vocabulary, sometimes followed by punctuation.
+    """
+    return " ".join(rng.choice(VOCABULARY) for _ in range(words)) + rng.choice(("", ".", ",", "!"))
+
+
+def scan(logic, text: str, prefix: bool = True) -> set:
+    """
+    Returns the IDs of the tasks matching every word of the text, found by scanning every record.
+    """
+    words = {}
+    for task in logic.tasks:
+        words[task.task_id] = set(tokenize(task.name) + tokenize(task.notes))
+    for subtask in logic.subtasks:
+        words[subtask.task_id].update(tokenize(subtask.name))
+    terms = set(tokenize(text))
+
+    def matches(term, task_words):
+        return any(word.startswith(term) for word in task_words) if prefix else term in task_words
+    return {task_id for task_id, task_words in words.items() if all(matches(term, task_words) for term in terms)}
+
+
+def random_query(rng) -> str:
+    """
+    A search text: a whole word, a prefix, or two terms in mixed case.
+    """
+    word = rng.choice(VOCABULARY).lower()
+    choice = rng.random()
+    if choice < 0.3:
+        return word
+    if choice < 0.7:
+        return word[:rng.randrange(1, len(word) + 1)]  # A prefix
+    return f"{word[:3]} {rng.choice(VOCABULARY)[:2].upper()}"  # Several terms, all of which must match
+
+
+def check(logic, rng, step: int):
+    """
+    Assert that random searches find the same tasks as a scan, through the index and through logic.search.
+    """
+    for _ in range(20):
+        text = random_query(rng)
+        expected = scan(logic, text)
+        assert logic.search_index.search(text) == expected, f"step {step}: search {text!r} differs"
+        assert [task.task_id for task in logic.search(text)] == sorted(expected)
+        assert logic.search_index.search(text, prefix=False) == scan(logic, text, prefix=False)
+
+
+@pytest.mark.parametrize("seed", [1, 2])
+def test_search_matches_scan_after_random_mutations(seed):
+    rng = random.Random(seed)
+    tasks = [Task(task_id, phrase(rng, 2), "Work", "High", "2024-01-01", "2024-02-01", "Open", 0,
+                  phrase(rng, 3) if rng.random() < 0.5 else "") for task_id in range(1, 101)]
+    subtasks = [Subtask(subtask_id, rng.randrange(1, 101), phrase(rng, 2), "Open", 0, "", None)
+                for subtask_id in range(1, 151)]
+    logic = TaskManagerLogic(MemoryStorage(tasks, subtasks))
+
+    check(logic, rng, 0)
+    for step in range(1, 1501):
+        choice = rng.random()
+        task_ids = logic.get_task_ids()
+        subtask_ids = list(logic.store.subtasks_by_id)
+        if choice < 0.2 and task_ids:
+            logic.update_task(rng.choice(task_ids), {"name": phrase(rng, 2), "notes": phrase(rng, 2)})
+        elif choice < 0.4 and subtask_ids:
+            changes = {"name": phrase(rng, 2)}
+            if rng.random() < 0.3 and task_ids:
+                changes["task_id"] = rng.choice(task_ids)  # Move it to another task
+            logic.update_subtask(rng.choice(subtask_ids), changes)
+        elif choice < 0.6:
+            logic.add_task(task_data(name=phrase(rng, 2), notes=phrase(rng, 1)))
+        elif choice < 0.75 and task_ids:
+            logic.add_subtask({"task_id": rng.choice(task_ids), "name": phrase(rng, 2), "status": "Open",
+                               "progress": 0, "due_date": "", "completed_date": ""})
+        elif choice < 0.85 and task_ids:
+            logic.delete_task(rng.choice(task_ids))
+        elif subtask_ids:
+            logic.delete_subtask(rng.choice(subtask_ids))
+        if step % 100 == 0:
+            check(logic, rng, step)
+    assert logic.close()
+
+
+def test_subtask_words_find_their_task():
+    logic = TaskManagerLogic(MemoryStorage())
+    first = logic.add_task(task_data(name="Quarterly report"))
+    second = logic.add_task(task_data(name="Budget"))
+    subtask = logic.add_subtask({"task_id": first.task_id, "name": "Call the client", "status": "Open",
+                                 "progress": 0, "due_date": "", "completed_date": ""})
+    index = logic.search_index
+
+    assert index.search("cli") == {first.task_id}
+    assert index.search("cli", prefix=False) == set()
+    assert index.search("report client") == {first.task_id}
+    assert index.search("report budget") == set()
+    assert index.search("  ,. ") is None  # No words, no filter
+
+    logic.update_subtask(subtask.subtask_id, {"name": "Email the supplier"})
+    assert index.search("client") == set()
+    assert index.search("supplier") == {first.task_id}
+
+    logic.update_subtask(subtask.subtask_id, {"task_id": second.task_id})
+    assert index.search("supplier") == {second.task_id}
+    assert index.search("budget supplier") == {second.task_id}
+
+    logic.delete_subtask(subtask.subtask_id)
+    assert index.search("supplier") == set()
+    logic.delete_task(first.task_id)
+    assert index.search("report") == set()
+    assert index.search("budget") == {second.task_id}
+    assert logic.close()
@@ -0,0 +1,139 @@
+"""
+Indexed queries (task_query.py) must return exactly what a linear filter and sort over every task returns,
+through random adds, edits and deletes.
+"""
+import random
+from datetime import date, timedelta
+from functools import cmp_to_key
+
+import pytest
+
+from task_model import Task
+from task_query import TaskIndex, TaskQuery
+from task_store import TaskStore
+
+STATUSES = ("Open", "In Progress", "Completed", "Blocked")
+CATEGORIES = ("Work", "Home", "Study")
+PRIORITIES = ("High", "Medium", "Low")
+FIRST_DAY = date(2024, 1, 1)
+SORT_KEYS = ("due_date", "-due_date", "start_date", "-start_date", "name", "-progress", "status", "-priority")
+
+
+def random_date(rng):
+    """
+    A date in the first 40 days of 2024, or a value that is not a date (empty or free text).
+    """
+    choice = rng.random()
+    if choice < 0.1:
+        return ""
+    if choice < 0.15:
+        return "TBD"
+    return FIRST_DAY + timedelta(days=rng.randrange(40))
+
+
+def random_task(rng, task_id: int) -> Task:
+    """
+    Returns a task with random field values.
+    """
+    return Task(task_id, f"Task {rng.randrange(50)}", rng.choice(CATEGORIES), rng.choice(PRIORITIES),
+                random_date(rng), random_date(rng), rng.choice(STATUSES), rng.choice((0, 25, 50, 100, "")), "")
+
+
+def random_filters(rng) -> dict:
+    """
+    Returns a random combination of equality filters, date bounds, sort keys and limit.
+    """
+    filters = {}
+    for field, values in (("status", STATUSES), ("category", CATEGORIES), ("priority", PRIORITIES)):
+        if rng.random() < 0.3:
+            filters[field] = rng.choice(values) if rng.random() < 0.5 else rng.sample(values, 2)
+    for bound in ("due_from", "due_to", "start_from", "start_to"):
+        if rng.random() < 0.25:
+            filters[bound] = FIRST_DAY + timedelta(days=rng.randrange(-2, 42))  # Often equal to a task's date
+    if rng.random() < 0.7:
+        filters["sort"] = rng.sample(SORT_KEYS, rng.randrange(1, 3))
+    if rng.random() < 0.3:
+        filters["limit"] = rng.randrange(0, 20)
+    return filters
+
+
+def rank(value) -> tuple:
+    """
+    Sort rank of a value: dates and numbers first, then text, then empty values.
+    """
+    if value is None or value == "":
+        return 2, ""
+    return (1, value) if isinstance(value, str) else (0, value)
+
+
+def linear_query(tasks, status=None, category=None, priority=None, due_from=None, due_to=None,
+                 start_from=None, start_to=None, sort=None, limit=None) -> list:
+    """
+    Filter and sort by checking every task.
+    """
+    def accepts(value, accepted):
+        return accepted is None or value in (accepted if isinstance(accepted, list) else [accepted])
+
+    def in_range(value, start, end):
+        if start is None and end is None:
+            return True
+        return isinstance(value, date) and (start is None or start <= value) and (end is None or value <= end)
+
+    def compare(first, second):
+        for key in sort or []:
+            a, b = rank(getattr(first, key.lstrip("-"))), rank(getattr(second, key.lstrip("-")))
+            if a != b:
+                return (-1 if a < b else 1) * (-1 if key.startswith("-") else 1)
+        return first.task_id - second.task_id  # Ties keep the ID order
+
+    found = [task for task in tasks
+             if accepts(task.status, status) and accepts(task.category, category)
+             and accepts(task.priority, priority) and in_range(task.due_date, due_from, due_to)
+             and in_range(task.start_date, start_from, start_to)]
+    found.sort(key=cmp_to_key(compare))
+    return found if limit is None else found[:limit]
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_query_matches_linear_filter(seed):
+    rng = random.Random(seed)
+    store, index = TaskStore(), TaskIndex()
+    store.add_index(index)
+    store.load([random_task(rng, task_id) for task_id in range(1, 301)], [])  # Bulk load: sorted on first use
+    queries = TaskQuery(store, index)
+    next_id = 301
+
+    for step in range(1500):
+        choice = rng.random()
+        task_ids = list(store.tasks_by_id)
+        if choice < 0.25 and task_ids:
+            store.add_task(random_task(rng, rng.choice(task_ids)))  # Edit: every field may change
+        elif choice < 0.35 and task_ids:
+            store.remove_task(rng.choice(task_ids))
+        elif choice < 0.45:
+            store.add_task(random_task(rng, next_id))
+            next_id += 1
+        else:
+            filters = random_filters(rng)
+            expected = [task.task_id for task in linear_query(store.tasks, **filters)]
+            assert [task.task_id for task in queries.query(**filters)] == expected, f"step {step}: {filters}"
+
+    assert all(entries == sorted(entries) for entries in index.dates.values())
+
+
+def test_date_bounds_are_inclusive():
+    store, index = TaskStore(), TaskIndex()
+    store.add_index(index)
+    for task_id, due in enumerate((date(2024, 1, 1), date(2024, 1, 2), date(2024, 1, 3), "", "TBD"), start=1):
+        store.add_task(Task(task_id, "Task", "Work", "High", due, due, "Open", 0, ""))
+    queries = TaskQuery(store, index)
+
+    found = queries.query(due_from=date(2024, 1, 2), due_to=date(2024, 1, 3), sort=["-due_date"])
+    assert [task.task_id for task in found] == [3, 2]
+    assert [task.task_id for task in queries.query(due_to=date(2024, 1, 1))] == [1]
+    assert [task.task_id for task in queries.query(sort=["due_date"])] == [1, 2, 3, 5, 4]  # Dates, text, empty
+    assert [task.task_id for task in queries.query(sort=["-due_date"], limit=3)] == [4, 5, 3]
+    with pytest.raises(ValueError):
+        queries.query(due_from="2024-01-01")
+    with pytest.raises(ValueError):
+        queries.query(sort=["colour"])
@@ -0,0 +1,153 @@
+"""
+The in-memory TaskStore (task_store.py) hands out unique IDs, keeps the subtasks-per-task index and the
+attached StoreIndex objects in step with every mutation, and ignores deletes of records that do not exist.
+"""
+import threading
+
+import events
+from conftest import MemoryStorage, task_data
+from task_manager_logic import TaskManagerLogic
+from task_model import Task, Subtask
+from task_store import StoreIndex, TaskStore
+
+
+class RecordingIndex(StoreIndex):
+    """A StoreIndex that records every hook call."""
+
+    def __init__(self):
+        self.calls = []
+
+    def clear(self):
+        self.calls.append(("clear",))
+
+    def task_added(self, task):
+        self.calls.append(("task_added", task.task_id, task.name))
+
+    def task_removed(self, task):
+        self.calls.append(("task_removed", task.task_id, task.name))
+
+    def subtask_added(self, subtask):
+        self.calls.append(("subtask_added", subtask.subtask_id, subtask.task_id))
+
+    def subtask_removed(self, subtask):
+        self.calls.append(("subtask_removed", subtask.subtask_id, subtask.task_id))
+
+
+def make_task(task_id: int, name: str = "Task") -> Task:
+    """
+    Returns a task with the given ID and default values for everything else.
+    """
+    return Task(task_id, name, "Work", "High", "2024-01-01", "2024-02-01", "Open", 0, "")
+
+
+def make_subtask(subtask_id: int, task_id: int) -> Subtask:
+    """
+    Returns a subtask of the given task with default values for everything else.
+    """
+    return Subtask(subtask_id, task_id, f"Subtask {subtask_id}", "Open", 0, None, None)
+
+
+def test_add_replace_and_remove_keep_the_indexes_in_step():
+    store = TaskStore()
+    store.load([make_task(1), make_task(5)], [make_subtask(1, 1), make_subtask(2, 1), make_subtask(3, 5)])
+    index = RecordingIndex()
+    store.add_index(index)  # Filled with the records already in the store
+    assert index.calls == [("clear",), ("task_added", 1, "Task"), ("task_added", 5, "Task"),
+                           ("subtask_added", 1, 1), ("subtask_added", 2, 1), ("subtask_added", 3, 5)]
+    assert [subtask.subtask_id for subtask in store.subtasks_of(1)] == [1, 2]
+
+    index.calls.clear()
+    store.add_task(make_task(1, "Renamed"))  # A replacement is reported as removed, then added
+    store.add_subtask(make_subtask(2, 5))  # Moved to task 5
+    assert index.calls == [("task_removed", 1, "Task"), ("task_added", 1, "Renamed"),
+                           ("subtask_removed", 2, 1), ("subtask_added", 2, 5)]
+    assert [subtask.subtask_id for subtask in store.subtasks_of(1)] == [1]
+    assert [subtask.subtask_id for subtask in store.subtasks_of(5)] == [3, 2]
+    assert store.get_task(1).name == "Renamed" and store.has_task(5) and not store.has_task(2)
+
+    index.calls.clear()
+    task, subtasks = store.remove_task(5)
+    assert task.task_id == 5 and sorted(subtask.subtask_id for subtask in subtasks) == [2, 3]
+    assert store.get_subtask(2) is None and list(store.subtasks_of(5)) == [] and 5 not in store.subtasks_by_task
+    assert sorted(index.calls) == [("subtask_removed", 2, 5), ("subtask_removed", 3, 5), ("task_removed", 5, "Task")]
+
+    index.calls.clear()
+    assert store.remove_subtask(1).subtask_id == 1
+    assert 1 not in store.subtasks_by_task  # The empty entry of the parent is dropped
+    assert index.calls == [("subtask_removed", 1, 1)]
+
+
+def test_removing_missing_records_changes_nothing():
+    store = TaskStore()
+    store.load([make_task(1)], [make_subtask(1, 1)])
+    index = RecordingIndex()
+    store.add_index(index)
+    index.calls.clear()
+    assert store.remove_task(2) == (None, [])
+    assert store.remove_subtask(7) is None
+    assert index.calls == []
+    assert list(store.tasks_by_id) == [1] and list(store.subtasks_by_id) == [1]
+
+
+def test_ids_are_unique_and_never_reused():
+    store = TaskStore()
+    store.load([make_task(3)], [make_subtask(8, 3)])  # Counters move past the loaded IDs
+    assert (store.allocate_task_id(), store.allocate_subtask_id()) == (4, 9)
+    store.remove_task(3)
+    assert store.allocate_task_id() == 5  # Deleted IDs are not handed out again
+    store.add_task(make_task(10))
+    assert store.allocate_task_id() == 11
+
+
+def test_reserved_id_blocks_are_used_first():
+    store = TaskStore()
+    requests = []
+
+    def reserve_ids(kind, minimum):
+        requests.append((kind, minimum))
+        start = max(100, minimum)
+        return range(start, start + 2) if kind == "task" else None
+
+    store.reserve_ids = reserve_ids
+    assert [store.allocate_task_id() for _ in range(3)] == [100, 101, 102]
+    assert store.allocate_subtask_id() == 1  # No block: fall back to the counter
+    assert requests[:2] == [("task", 1), ("task", 102)]
+
+
+def test_next_id_block_is_reserved_in_the_background():
+    store = TaskStore()
+    release = threading.Event()
+    callers = []
+
+    def reserve_ids(kind, minimum):
+        callers.append(threading.current_thread().name)
+        if len(callers) > 1:
+            release.wait(5)  # Another process holds the lock
+        return range(minimum, minimum + len(callers))
+
+    store.reserve_ids = reserve_ids
+    assert store.allocate_task_id() == 1  # Returns while the next block is still being reserved
+    assert callers[0] == threading.current_thread().name  # Only the first block is reserved on the caller's thread
+    release.set()
+    assert [store.allocate_task_id() for _ in range(2)] == [2, 3]
+    assert callers[1:] and all(name == "IdReserver" for name in callers[1:])
+
+
+def test_logic_does_not_save_or_publish_deletes_of_missing_records():
+    storage = MemoryStorage()
+    logic = TaskManagerLogic(storage)
+    task = logic.add_task(task_data())
+    assert logic.flush()
+    published = []
+    logic.events.subscribe(lambda event: published.append(event.kind) if event.kind in (
+        events.TASK_DELETED, events.SUBTASK_DELETED) else None)
+
+    logic.delete_task(task.task_id + 1)
+    logic.delete_subtask(1)
+    assert logic.flush()
+    assert published == [] and len(storage.batches) == 1
+
+    logic.delete_task(task.task_id)
+    assert logic.close()
+    assert published == [events.TASK_DELETED]
+    assert storage.batches[-1] == [("delete_task", task.task_id)]